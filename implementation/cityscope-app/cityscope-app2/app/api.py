@@ -0,0 +1,71 @@
+# app/api.py
+#
+# Export endpoints, served alongside the Streamlit app:
+#   uvicorn api:app --app-dir app --port 8502
+
+import os
+import tempfile
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from export import MEDIA_TYPES, export, neighborhood_batches, poi_batches, stream
+
+app = FastAPI(title="CityScope export")
+
+# GeoPackage is spooled to disk and streamed back in pieces of this size
+FILE_CHUNK_BYTES = 1 << 20
+
+
+def _response(fmt: str, batches, crs: str, name: str) -> StreamingResponse:
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(400, f"Unknown format {fmt!r}; choose from {sorted(MEDIA_TYPES)}")
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    if fmt != "gpkg":
+        return StreamingResponse(stream(fmt, batches, crs), media_type=MEDIA_TYPES[fmt], headers=headers)
+
+    fd, path = tempfile.mkstemp(suffix=".gpkg")
+    os.close(fd)
+    try:
+        export(fmt, batches, crs, path, layer=name)
+    except Exception:
+        os.remove(path)
+        raise
+
+    def chunks():
+        with open(path, "rb") as f:
+            while data := f.read(FILE_CHUNK_BYTES):
+                yield data
+
+    return StreamingResponse(
+        chunks(), media_type=MEDIA_TYPES[fmt], headers=headers,
+        background=BackgroundTask(os.remove, path),
+    )
+
+
+@app.get("/export/neighborhoods")
+def export_neighborhoods(
+    format: str = "parquet",
+    weights: Optional[List[float]] = Query(None, description="Four weights in SCORE_COLUMNS order"),
+    normalizer: str = "min_max",
+):
+    try:
+        batches, crs = neighborhood_batches(weights=weights, normalizer=normalizer)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return _response(format, batches, crs, "neighborhoods")
+
+
+@app.get("/export/pois")
+def export_pois(
+    format: str = "parquet",
+    bbox: Optional[List[float]] = Query(None, description="min_lon, min_lat, max_lon, max_lat"),
+    categories: Optional[List[str]] = Query(None),
+    city: Optional[str] = None,
+):
+    if bbox is not None and len(bbox) != 4:
+        raise HTTPException(400, "bbox needs four values: min_lon, min_lat, max_lon, max_lat")
+    batches, crs = poi_batches(bbox=bbox, categories=categories, city=city)
+    return _response(format, batches, crs, "pois")
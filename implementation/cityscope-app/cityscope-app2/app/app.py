@@ -1,30 +1,69 @@
 # app/app.py
 
 import os
+import time
+
+# Startup timings (shown in the sidebar) are measured from here
+_IMPORT_START = time.perf_counter()
+
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+
+# Only light modules are imported up front. folium, plotly and
+# geopandas are imported by the sections that draw with them, so the first
+# paint does not wait for them.
+from metrics import NORMALIZERS, SCORE_COLUMNS, compute_scores  # noqa: E402
+from payloads import filter_metrics, map_frame, read_metrics  # noqa: E402
+from radius_cube import RADII_M, RadiusCube, radius_cube_path, with_radius_densities  # noqa: E402
+from snapshot import (  # noqa: E402
+    SNAPSHOT_NORMALIZER,
+    display_geojson,
+    display_rows,
+    read_snapshot,
+    snapshot_path,
+)
+from spatial_weights import SpatialWeights, smooth_scores, weights_path  # noqa: E402
+from store import processed_dir  # noqa: E402
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+
+@st.cache_resource(max_entries=8)
+def load_data(data_dir: str, normalizer: str = "min_max", smoothing: float = 0.0,
+              radius_m: int = None):
+    """
+    Load and score the metrics of one data release once per process.
+
+    cache_resource hands every session the same frame (cache_data would give
+    each session its own deserialized copy). Scoring and file parsing are
+    also memoized on disk (see disk_cache.py), so a restarted process reuses
+    the previous results; scripts/05_warm_cache.py fills them before traffic.
+
+    Keyed by `data_dir`, so a release swapped in by scripts/refresh_service.py
+    is picked up on the next rerun while the previous one stays cached for
+    sessions that are mid-render.
+
+    `smoothing` > 0 blends each component score with its neighbors' mean
+    (spatial lag over the weights written by scripts/04_build_store.py).
+    `radius_m` scores POI counts within that distance of each centroid
+    instead of per-polygon densities.
+
+    With default settings the prebuilt snapshot (scripts/04_build_store.py)
+    is read as is: scores already computed, nothing parsed.
+    """
+    default = normalizer == SNAPSHOT_NORMALIZER and smoothing == 0 and radius_m is None
+    if default and os.path.exists(snapshot_path(data_dir)):
+        return read_snapshot(snapshot_path(data_dir)).drop(
+            columns=["display_geojson", "display_lon", "display_lat"]
+        )
 
-import folium
-import geopandas as gpd
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import streamlit as st
-from streamlit_folium import st_folium
-
-from metrics import compute_scores
-
-DATA_PROCESSED = "data/processed"
-
-
-@st.cache_data
-def load_data():
-    metrics_path = os.path.join(DATA_PROCESSED, "neighborhood_metrics.parquet")
-    geo_path = os.path.join(DATA_PROCESSED, "neighborhoods_full.geojson")
-
-    metrics = pd.read_parquet(metrics_path)
-    metrics = compute_scores(metrics)
-
-    gdf = gpd.read_file(geo_path)
-    return metrics, gdf
+    metrics = read_metrics(data_dir)
+    if radius_m is not None:
+        metrics = with_radius_densities(metrics, RadiusCube(radius_cube_path(data_dir)), radius_m)
+    scored = compute_scores(metrics, normalizer=normalizer)
+    if smoothing > 0:
+        scored = smooth_scores(scored, SpatialWeights.load(weights_path(data_dir)), smoothing)
+    return scored
 
 
 def summary_section(metrics: pd.DataFrame):
@@ -42,26 +81,40 @@ def summary_section(metrics: pd.DataFrame):
         )
 
 
-def map_section(filtered_metrics: pd.DataFrame, full_gdf: gpd.GeoDataFrame):
-    st.subheader("Neighborhood Map (Composite Score)")
+@st.cache_resource(max_entries=2)
+def load_display_geometry(data_dir: str):
+    """Snapshot rows with map-ready geometry, or None without a snapshot."""
+    if not os.path.exists(snapshot_path(data_dir)):
+        return None
+    return read_snapshot(snapshot_path(data_dir))[
+        ["neighborhood_name", "display_geojson", "display_lon", "display_lat"]
+    ]
 
-    gdf_scores = full_gdf.merge(
-        filtered_metrics[["neighborhood_name", "composite_score"]],
-        on="neighborhood_name",
-        how="inner",
-    )
 
-    gdf_scores_4326 = gdf_scores.to_crs(epsg=4326)
+def map_section(filtered_metrics: pd.DataFrame, data_dir: str):
+    import folium
+    from streamlit_folium import st_folium
 
-    center = gdf_scores_4326.geometry.centroid
-    center_lat = center.y.mean()
-    center_lon = center.x.mean()
+    st.subheader("Neighborhood Map (Composite Score)")
+
+    scores = filtered_metrics[["neighborhood_name", "composite_score"]]
+    display = load_display_geometry(data_dir)
+    rows = None if display is None else display_rows(display, scores)
+    if rows is not None:
+        # Snapshot geometry is already simplified GeoJSON in EPSG:4326
+        geo_data = display_geojson(rows)
+        center_lat, center_lon = rows["display_lat"].mean(), rows["display_lon"].mean()
+    else:
+        geo_data = map_frame(scores, data_dir)
+        center = geo_data.geometry.centroid
+        center_lat = center.y.mean()
+        center_lon = center.x.mean()
 
     m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
 
     folium.Choropleth(
-        geo_data=gdf_scores_4326,
-        data=gdf_scores_4326,
+        geo_data=geo_data,
+        data=scores,
         columns=["neighborhood_name", "composite_score"],
         key_on="feature.properties.neighborhood_name",
         fill_opacity=0.7,
@@ -70,7 +123,7 @@ def map_section(filtered_metrics: pd.DataFrame, full_gdf: gpd.GeoDataFrame):
     ).add_to(m)
 
     folium.GeoJson(
-        gdf_scores_4326,
+        geo_data,
         tooltip=folium.features.GeoJsonTooltip(
             fields=["neighborhood_name", "composite_score"],
             aliases=["Neighborhood:", "Composite score:"],
@@ -81,25 +134,232 @@ def map_section(filtered_metrics: pd.DataFrame, full_gdf: gpd.GeoDataFrame):
     st_folium(m, width=900, height=500)
 
 
-def top_neighborhoods_section(filtered: pd.DataFrame):
-    st.subheader("Top Neighborhoods by Composite Score")
+@st.cache_resource(max_entries=8)
+def load_client_map(data_dir: str, normalizer: str, smoothing: float, radius_m: int):
+    """
+    URL of the client map's GeoJSON, written once per release and scoring
+    settings, and the frame whose rows the map's features carry.
+    """
+    import geopandas as gpd
+    import shapely
+
+    from client_map import map_data_url
+
+    metrics = load_data(data_dir, normalizer, smoothing, radius_m)
+    scores = metrics[["neighborhood_name", "composite_score", "avg_rent"]]
+    display = load_display_geometry(data_dir)
+    rows = None if display is None else display_rows(display, scores)
+    if rows is not None:
+        rows = rows[rows["display_geojson"].notna()]
+        gdf = gpd.GeoDataFrame(
+            rows[scores.columns],
+            geometry=shapely.from_geojson(rows["display_geojson"].to_numpy()),
+            crs="EPSG:4326",
+        )
+    else:
+        gdf = map_frame(scores, data_dir)
+    return map_data_url(gdf), gdf.drop(columns="geometry").reset_index(drop=True)
 
-    top10 = filtered.sort_values("composite_score", ascending=False).head(10)
+
+def client_map_section(data_dir: str, normalizer: str, smoothing: float, radius_m: int,
+                       max_rent, min_score):
+    from client_map import client_map
+
+    st.subheader("Neighborhood Map (Composite Score)")
+    st.caption("The sidebar filters are applied in the browser; the map itself is sent once.")
+    data_url, rows = load_client_map(data_dir, normalizer, smoothing, radius_m)
+    clicked = client_map(data_url, max_rent, min_score, height=560, key="client_map")
+    if clicked is not None and clicked < len(rows):
+        row = rows.iloc[clicked]
+        st.caption(
+            f"Selected: **{row['neighborhood_name']}**, composite score "
+            f"{row['composite_score']:.1f}, average rent ${row['avg_rent']:,.0f}"
+        )
+
+
+@st.cache_resource(max_entries=2)
+def load_poi_store(data_dir: str):
+    from poi_store import PoiStore, poi_store_path
+
+    path = poi_store_path(data_dir)
+    if not os.path.exists(path):
+        return None
+    return PoiStore(path)
+
+
+@st.cache_resource(max_entries=2)
+def load_density_surfaces(data_dir: str):
+    from density import DensitySurfaces, density_path
+
+    if not os.path.exists(density_path(data_dir)):
+        return None
+    return DensitySurfaces(density_path(data_dir))
+
+
+@st.cache_resource(max_entries=2)
+def load_poi_dataset(data_dir: str):
+    """
+    Path of the release's partitioned POI dataset, or None when it is missing
+    or was built before it carried neighborhood_name.
+    """
+    import pyarrow.dataset as ds
+    from poi_dataset import poi_dataset_path
+
+    path = poi_dataset_path(data_dir)
+    if not os.path.exists(path):
+        return None
+    if "neighborhood_name" not in ds.dataset(path, format="parquet", partitioning="hive").schema.names:
+        return None
+    return path
+
+
+@st.fragment
+def poi_section(filtered: pd.DataFrame, data_dir: str):
+    import streamlit.components.v1 as components
+    from layer_data import deck_page
+    from poi_store import CATEGORIES, MAP_HEIGHT_PX, MAP_WIDTH_PX, poi_layers, viewport_bbox
+
+    st.subheader("Points of Interest")
+
+    store = load_poi_store(data_dir)
+    if store is None:
+        st.info("Run scripts/04_build_store.py to enable the points of interest map.")
+        return
+
+    names = list(filtered["neighborhood_name"].unique())
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        categories = st.multiselect("Categories", options=CATEGORIES, default=CATEGORIES)
+    with col2:
+        focus = st.selectbox("Center on", options=["All visible"] + sorted(names))
+    with col3:
+        zoom = st.slider("Zoom", 9, 17, 12)
+
+    surfaces = load_density_surfaces(data_dir)
+    show_density = surfaces is not None and st.checkbox(
+        "Density surface", help="Kernel density of the selected categories (50 m grid)."
+    )
+
+    center = store.center(categories, names if focus == "All visible" else [focus])
+    if center is None:
+        st.info("No points of interest for the current filters.")
+        return
+
+    # Only POIs inside the viewport are sent; low zooms get grid clusters.
+    center_lat, center_lon = center
+    bbox = viewport_bbox(center_lat, center_lon, zoom, MAP_WIDTH_PX, MAP_HEIGHT_PX)
+    layers = poi_layers(
+        store, names, categories, bbox=bbox, zoom=zoom, dataset_path=load_poi_dataset(data_dir)
+    )
+    if show_density:
+        layers = [surfaces.bitmap_layer(c) for c in categories] + layers
+
+    components.html(
+        deck_page(layers, center_lat, center_lon, zoom), width=MAP_WIDTH_PX, height=MAP_HEIGHT_PX
+    )
+
+    centroids = load_display_geometry(data_dir)
+    if show_density and categories and centroids is not None:
+        # Snapshot rows are in store order, the same index `filtered` keeps
+        rows = centroids.loc[filtered.index]
+        density = pd.DataFrame({"neighborhood_name": rows["neighborhood_name"]})
+        for category in categories:
+            density[category] = surfaces.sample(
+                category, rows["display_lon"].to_numpy(), rows["display_lat"].to_numpy()
+            ).round(1)
+        st.caption("Density at each neighborhood centroid (points per km²)")
+        st.dataframe(
+            density.sort_values(categories[0], ascending=False), hide_index=True
+        )
+
+
+@st.cache_resource(max_entries=2)
+def load_name_index(data_dir: str):
+    from name_index import NameIndex, name_index_path
+
+    path = name_index_path(data_dir)
+    if not os.path.exists(path):
+        return None
+    return NameIndex(path)
+
+
+@st.fragment
+def place_search_section(filtered: pd.DataFrame, data_dir: str):
+    st.subheader("Near a Place")
+
+    index = load_name_index(data_dir)
+    if index is None:
+        st.info("Run scripts/04_build_store.py to enable place search.")
+        return
+
+    query = st.text_input("Search places by name or brand", placeholder="e.g. Whole Foods, UBC")
+    if not query.strip():
+        return
+
+    # Every hit goes into the distance ranking; only the tables are truncated
+    hits = index.search(query)
+    if hits.empty:
+        st.info(f"No places match {query!r}.")
+        return
+
+    # filtered keeps the store's row index, the same rows the name index uses
+    nearest = index.nearest_to(hits, rows=filtered.index.to_numpy())
+    nearest = nearest.merge(
+        filtered[["avg_rent", "composite_score"]],
+        left_on="row",
+        right_index=True,
+        how="inner",
+    )
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.caption(f"{len(hits)} matching places")
+        st.dataframe(hits[["name", "category", "neighborhood_name"]].head(20), hide_index=True)
+    with col2:
+        nearest["nearest_km"] = (nearest["nearest_m"] / 1000).round(2)
+        st.dataframe(
+            nearest[["neighborhood_name", "nearest_km", "nearest_place", "avg_rent", "composite_score"]]
+            .head(20)
+            .set_index("neighborhood_name")
+        )
+
+
+# Figure builders are memoized on just the rows/columns they plot, so a rerun
+# triggered elsewhere on the page gets the cached figure back.
+@st.cache_data(max_entries=32)
+def top_neighborhoods_figure(top10: pd.DataFrame):
+    import plotly.express as px
+
+    hover = [c for c in top10.columns if c not in ("neighborhood_name", "composite_score")]
     fig = px.bar(
         top10,
         x="neighborhood_name",
         y="composite_score",
-        hover_data=["avg_rent", "transit_score", "schools_score", "amenities_score"],
+        hover_data=hover,
     )
     fig.update_layout(xaxis_title="", yaxis_title="Composite score")
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def tradeoff_section(filtered: pd.DataFrame):
-    st.subheader("Rent vs Transit Density (Tradeoff)")
+@st.cache_data(max_entries=32)
+def stability_figure(top: pd.DataFrame, top_k: int):
+    import plotly.express as px
+
+    fig = px.bar(
+        top,
+        x="neighborhood_name",
+        y="p_top_k",
+        hover_data=["mean_rank", "rank_p05", "rank_p95", "default_rank"],
+    )
+    fig.update_layout(xaxis_title="", yaxis_title=f"P(top {top_k})", yaxis_range=[0, 1])
+    return fig
+
 
-    fig = px.scatter(
-        filtered,
+@st.cache_data(max_entries=32)
+def tradeoff_figure(points: pd.DataFrame):
+    import plotly.express as px
+
+    return px.scatter(
+        points,
         x="avg_rent",
         y="transit_per_km2",
         color="composite_score",
@@ -109,9 +369,95 @@ def tradeoff_section(filtered: pd.DataFrame):
             "transit_per_km2": "Transit stops per km²",
         },
     )
+
+
+@st.cache_data(max_entries=64)
+def profile_figure(nbhd1: str, vals1: tuple, nbhd2: str, vals2: tuple):
+    import plotly.graph_objects as go
+
+    labels = ["Affordability", "Transit", "Schools", "Amenities"]
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatterpolar(r=list(vals1), theta=labels, fill="toself", name=nbhd1)
+    )
+    fig.add_trace(
+        go.Scatterpolar(r=list(vals2), theta=labels, fill="toself", name=nbhd2)
+    )
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        showlegend=True,
+    )
+    return fig
+
+
+def top_neighborhoods_section(filtered: pd.DataFrame):
+    st.subheader("Top Neighborhoods by Composite Score")
+
+    hover = ["avg_rent", "transit_score", "schools_score", "amenities_score"]
+    if "access_score" in filtered.columns:
+        hover += ["access_score", "access_p50_m"]
+    top10 = filtered.sort_values("composite_score", ascending=False).head(10)
+    fig = top_neighborhoods_figure(top10[["neighborhood_name", "composite_score", *hover]])
     st.plotly_chart(fig, use_container_width=True)
 
 
+@st.cache_data(max_entries=16)
+def load_rank_stability(scored: pd.DataFrame, n_samples: int, top_k: int, alpha):
+    from sensitivity import rank_stability
+
+    return rank_stability(scored, n_samples=n_samples, top_k=top_k, alpha=alpha)
+
+
+@st.fragment
+def rank_stability_section(filtered: pd.DataFrame):
+    st.subheader("Ranking Stability (Weight Sensitivity)")
+
+    if len(filtered) < 2:
+        st.info("At least two neighborhoods must match the filters to compare rankings.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        n_samples = st.select_slider(
+            "Weight samples", options=[10_000, 50_000, 100_000, 250_000], value=100_000
+        )
+    with col2:
+        top_k = st.slider("Top k", 1, min(25, len(filtered)), min(10, len(filtered)))
+    with col3:
+        spread = st.selectbox(
+            "Weights sampled",
+            options=["Uniformly", "Near the defaults"],
+            help="Dirichlet samples over all weightings, or concentrated around the default weights.",
+        )
+    alpha = None if spread == "Uniformly" else 20.0
+
+    stability = load_rank_stability(
+        filtered[["neighborhood_name", "composite_score", *SCORE_COLUMNS]],
+        n_samples, top_k, alpha,
+    )
+    if stability.attrs["n_samples"] < n_samples:
+        st.caption(
+            f"Ranked under {stability.attrs['n_samples']:,} samples to keep this fast "
+            f"for {len(filtered):,} neighborhoods (P(top-k) within ±0.01)."
+        )
+    if stability["rank_p95"].isna().any():
+        from sensitivity import RANK_BINS
+
+        st.caption(f"Percentile ranks past {RANK_BINS} are not tracked and are left blank.")
+
+    st.plotly_chart(stability_figure(stability.head(15), top_k), use_container_width=True)
+    st.dataframe(stability.set_index("neighborhood_name"))
+
+
+def tradeoff_section(filtered: pd.DataFrame):
+    st.subheader("Rent vs Transit Density (Tradeoff)")
+
+    points = filtered[["neighborhood_name", "avg_rent", "transit_per_km2", "composite_score"]]
+    st.plotly_chart(tradeoff_figure(points), use_container_width=True)
+
+
+@st.fragment
 def neighborhood_comparison_section(metrics: pd.DataFrame):
     st.subheader("Neighborhood Comparison (Side by Side)")
 
@@ -162,23 +508,10 @@ def neighborhood_comparison_section(metrics: pd.DataFrame):
     st.markdown("#### Profile comparison")
 
     dims = ["affordability_score", "transit_score", "schools_score", "amenities_score"]
-    labels = ["Affordability", "Transit", "Schools", "Amenities"]
 
-    vals1 = [data1[d] for d in dims]
-    vals2 = [data2[d] for d in dims]
-
-    fig = go.Figure()
-    fig.add_trace(
-        go.Scatterpolar(r=vals1, theta=labels, fill="toself", name=nbhd1)
-    )
-    fig.add_trace(
-        go.Scatterpolar(r=vals2, theta=labels, fill="toself", name=nbhd2)
-    )
-    fig.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-        showlegend=True,
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    vals1 = tuple(float(data1[d]) for d in dims)
+    vals2 = tuple(float(data2[d]) for d in dims)
+    st.plotly_chart(profile_figure(nbhd1, vals1, nbhd2, vals2), use_container_width=True)
 
     st.markdown("#### Detailed metrics table")
     comp_df = (
@@ -199,14 +532,80 @@ def neighborhood_comparison_section(metrics: pd.DataFrame):
     st.dataframe(comp_df)
 
 
+@st.cache_resource(max_entries=8)
+def load_similarity_index(data_dir: str, normalizer: str = "min_max"):
+    """Built once per release and normalizer, alongside load_data."""
+    from similarity import SimilarityIndex
+
+    return SimilarityIndex(load_data(data_dir, normalizer))
+
+
+@st.fragment
+def similar_neighborhoods_section(data_dir: str, normalizer: str, max_rent: int):
+    st.subheader("Similar Neighborhoods")
+
+    index = load_similarity_index(data_dir, normalizer)
+    if len(index) < 2:
+        st.info("Not enough neighborhoods to compare.")
+        return
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        label = st.selectbox("Find neighborhoods like", options=sorted(index.labels), key="similar_to")
+    with col2:
+        k = st.slider("How many", 1, min(20, len(index) - 1), min(5, len(index) - 1))
+    with col3:
+        capped = st.checkbox("Within max rent", value=True)
+
+    similar = index.query(index.row_of(label), k=k, max_rent=max_rent if capped else None)
+    if similar.empty:
+        st.info("No neighborhoods match within the rent cap.")
+        return
+    st.caption(f"Distance over standardized {', '.join(index.columns)}")
+    st.dataframe(similar.drop(columns="row").set_index("neighborhood"))
+
+
 def main():
+    run_start = time.perf_counter()
     st.set_page_config(page_title="CityScope", layout="wide")
     st.title("CityScope: Real Estate & Community Data Explorer (BC – Neighborhoods)")
 
-    metrics, gdf = load_data()
+    # Resolved once per rerun so every section reads the same release
+    data_dir = processed_dir()
 
     # Sidebar filters
     st.sidebar.header("Filters")
+
+    normalizer = st.sidebar.selectbox(
+        "Score normalization",
+        options=list(NORMALIZERS),
+        format_func=lambda n: n.replace("_", "-"),
+    )
+    smoothing = 0.0
+    if os.path.exists(weights_path(data_dir)):
+        smoothing = st.sidebar.slider(
+            "Neighbor smoothing",
+            0.0,
+            1.0,
+            0.0,
+            step=0.1,
+            help="Blend each score with the average of adjacent neighborhoods.",
+        )
+    radius_m = None
+    if os.path.exists(radius_cube_path(data_dir)):
+        radius_m = st.sidebar.select_slider(
+            "Amenity catchment",
+            options=[None] + RADII_M,
+            format_func=lambda r: "Within neighborhood" if r is None else f"{r:,} m",
+            help="Count amenities within a radius of each neighborhood's center instead of inside its boundary.",
+        )
+    load_start = time.perf_counter()
+    metrics = load_data(data_dir, normalizer, smoothing, radius_m)
+    load_seconds = time.perf_counter() - load_start
+    from_snapshot = (
+        normalizer == SNAPSHOT_NORMALIZER and smoothing == 0 and radius_m is None
+        and os.path.exists(snapshot_path(data_dir))
+    )
     
     # Handle rent filter - if all neighborhoods have the same rent, create a range
     rent_min = metrics["avg_rent"].min()
@@ -234,16 +633,33 @@ def main():
     )
     min_score = st.sidebar.slider("Minimum composite score", 0, 100, 0)
 
-    filtered = metrics[
-        (metrics["avg_rent"] <= max_rent)
-        & (metrics["composite_score"] >= min_score)
-    ].copy()
+    client_side_map = st.sidebar.toggle(
+        "Filter map in browser",
+        help="Send the map once and apply the sidebar filters to it in the browser.",
+    )
+
+    filtered = filter_metrics(metrics, max_rent, min_score)
 
     summary_section(metrics)
-    map_section(filtered, gdf)
+    if client_side_map:
+        client_map_section(data_dir, normalizer, smoothing, radius_m, max_rent, min_score)
+    else:
+        map_section(filtered, data_dir)
+    poi_section(filtered, data_dir)
+    place_search_section(filtered, data_dir)
     top_neighborhoods_section(filtered)
+    rank_stability_section(filtered)
     tradeoff_section(filtered)
     neighborhood_comparison_section(metrics)
+    similar_neighborhoods_section(data_dir, normalizer, max_rent)
+
+    with st.sidebar.expander("Startup timings"):
+        st.caption(
+            f"Module imports: {IMPORT_SECONDS * 1000:.0f} ms (once per process)  \n"
+            f"Data load: {load_seconds * 1000:.0f} ms"
+            f"{' (snapshot)' if from_snapshot else ''}  \n"
+            f"Full run: {(time.perf_counter() - run_start) * 1000:.0f} ms"
+        )
 
 
 if __name__ == "__main__":
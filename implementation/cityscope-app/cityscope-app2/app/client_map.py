@@ -0,0 +1,83 @@
+# app/client_map.py
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import shapely
+import streamlit.components.v1 as components
+
+from layer_data import COORD_DECIMALS
+
+# The component's page; Streamlit serves every file under this directory
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "client_map_frontend")
+MAP_DATA_DIR = os.path.join(FRONTEND_DIR, "data")
+
+_component = components.declare_component("client_map", path=FRONTEND_DIR)
+
+
+def feature_collection(gdf_4326, columns) -> dict:
+    """
+    GeoJSON for the client-side map: geometry snapped to COORD_DECIMALS
+    (drops duplicate vertices) plus only the attributes the filters need.
+    """
+    geoms = shapely.set_precision(gdf_4326.geometry.to_numpy(), 10.0 ** -COORD_DECIMALS)
+    props = {
+        col: np.round(gdf_4326[col].to_numpy(dtype=np.float64), 2).tolist()
+        if gdf_4326[col].dtype.kind == "f" else gdf_4326[col].tolist()
+        for col in columns
+    }
+    features = [
+        {
+            "type": "Feature",
+            "geometry": json.loads(shapely.to_geojson(geom)),
+            "properties": {col: props[col][i] for col in columns},
+        }
+        for i, geom in enumerate(geoms)
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def write_map_data(collection: dict, directory: str = None) -> str:
+    """
+    Write the GeoJSON next to the component's index.html, named by its
+    content hash, and return its URL relative to the component page. The
+    same data always gets the same URL, so the browser fetches it once.
+    """
+    directory = directory or MAP_DATA_DIR
+    text = json.dumps(collection, separators=(",", ":"))
+    name = f"map_{hashlib.sha256(text.encode()).hexdigest()[:16]}.json"
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    return f"{os.path.basename(directory)}/{name}"
+
+
+def map_data_url(gdf_4326) -> str:
+    """Features carry their frame row, which a click on the map returns."""
+    gdf = gdf_4326.assign(row=np.arange(len(gdf_4326)))
+    return write_map_data(feature_collection(gdf, ["row", "neighborhood_name", "composite_score", "avg_rent"]))
+
+
+def client_map(data_url: str, max_rent, min_score, height: int, key: str = None):
+    """
+    Leaflet map filtered in the browser from the sidebar state.
+
+    The iframe is mounted once; on later reruns only `max_rent` and
+    `min_score` (and the short `data_url`) cross the wire, and the page
+    restyles the features it already has. Returns the row of the last
+    neighborhood clicked, or None.
+    """
+    return _component(
+        data_url=data_url,
+        max_rent=float(max_rent),
+        min_score=float(min_score),
+        height=height,
+        key=key,
+        default=None,
+    )
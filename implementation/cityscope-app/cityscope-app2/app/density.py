@@ -0,0 +1,254 @@
+# app/density.py
+
+import base64
+import json
+import os
+
+import numpy as np
+
+from poi_store import CATEGORIES, CATEGORY_COLORS
+from store import processed_dir
+
+DENSITY_DIRNAME = "density"
+
+# Ground resolution and Gaussian bandwidth, metres
+CELL_M = 50
+SIGMA_M = 300
+TILE = 256
+
+EARTH_RADIUS_M = 6_378_137.0
+
+
+def density_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), DENSITY_DIRNAME)
+
+
+def to_mercator(lon, lat):
+    """EPSG:4326 -> EPSG:3857 metres, the plane deck.gl draws bitmaps in."""
+    lon, lat = np.asarray(lon, dtype=np.float64), np.asarray(lat, dtype=np.float64)
+    x = EARTH_RADIUS_M * np.radians(lon)
+    y = EARTH_RADIUS_M * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    return x, y
+
+
+def to_lonlat(x, y):
+    lon = np.degrees(np.asarray(x) / EARTH_RADIUS_M)
+    lat = np.degrees(2 * np.arctan(np.exp(np.asarray(y) / EARTH_RADIUS_M)) - np.pi / 2)
+    return lon, lat
+
+
+def gaussian_kernel(sigma_cells: float) -> np.ndarray:
+    radius = int(np.ceil(3 * sigma_cells))
+    r = np.arange(-radius, radius + 1)
+    k1 = np.exp(-0.5 * (r / sigma_cells) ** 2)
+    kernel = np.outer(k1, k1)
+    return kernel / kernel.sum()
+
+
+def fft_convolve(grid: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """
+    'same'-size linear convolution via real FFTs: O(N log N) in grid cells,
+    independent of how many points were binned.
+    """
+    kh, kw = kernel.shape
+    shape = (grid.shape[0] + kh - 1, grid.shape[1] + kw - 1)
+    fshape = [int(2 ** np.ceil(np.log2(n))) for n in shape]
+    out = np.fft.irfft2(np.fft.rfft2(grid, fshape) * np.fft.rfft2(kernel, fshape), fshape)
+    top, left = kh // 2, kw // 2
+    return out[top:top + grid.shape[0], left:left + grid.shape[1]]
+
+
+def kde_surface(x, y, origin, shape, cell: float, sigma: float) -> np.ndarray:
+    """
+    Smoothed point count per cell on a (rows, cols) grid whose top-left
+    corner is `origin` (x0, y_top) in web-mercator metres, with square
+    `cell` size.
+    """
+    rows, cols = shape
+    c = np.floor((x - origin[0]) / cell).astype(np.int64)
+    r = np.floor((origin[1] - y) / cell).astype(np.int64)
+    inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+    counts = np.bincount(r[inside] * cols + c[inside], minlength=rows * cols)
+    grid = counts.reshape(rows, cols).astype(np.float64)
+
+    smooth = fft_convolve(grid, gaussian_kernel(sigma / cell))
+    # FFT round-off leaves tiny negatives
+    return np.maximum(smooth, 0)
+
+
+def build_density_surfaces(lon, lat, category, bounds, path: str = None,
+                           cell_m: float = CELL_M, sigma_m: float = SIGMA_M):
+    """
+    Kernel density surface per POI category over `bounds` (lon/lat), written
+    as compressed float16 tiles (for sampling) plus a PNG (for display).
+
+    Web-mercator inflates distances by 1/cos(lat), so the grid cell and
+    bandwidth are scaled to stay `cell_m` / `sigma_m` on the ground.
+    """
+    path = path or density_path()
+    os.makedirs(path, exist_ok=True)
+
+    min_lon, min_lat, max_lon, max_lat = bounds
+    scale = 1 / np.cos(np.radians((min_lat + max_lat) / 2))
+    cell, sigma = cell_m * scale, sigma_m * scale
+
+    (x0, x1), (y0, y1) = to_mercator([min_lon, max_lon], [min_lat, max_lat])
+    pad = 3 * sigma
+    x0, y0, x1, y1 = x0 - pad, y0 - pad, x1 + pad, y1 + pad
+    shape = (int(np.ceil((y1 - y0) / cell)), int(np.ceil((x1 - x0) / cell)))
+    origin = (x0, y0 + shape[0] * cell)
+
+    x, y = to_mercator(lon, lat)
+    category = np.asarray(category)
+    meta = {
+        "origin": origin, "cell": cell, "shape": shape, "tile": TILE,
+        "cell_m": cell_m, "sigma_m": sigma_m, "categories": {},
+    }
+    for name in CATEGORIES:
+        mask = category == name
+        # Points per km² of ground
+        surface = kde_surface(x[mask], y[mask], origin, shape, cell, sigma) / (cell_m * cell_m / 1e6)
+        _write_surface(path, name, surface, TILE)
+        meta["categories"][name] = {"points": int(mask.sum()), "max": float(surface.max())}
+
+    lon_w, lat_s = to_lonlat(origin[0], origin[1] - shape[0] * cell)
+    lon_e, lat_n = to_lonlat(origin[0] + shape[1] * cell, origin[1])
+    meta["bounds"] = [float(lon_w), float(lat_s), float(lon_e), float(lat_n)]
+    _write_meta(path, meta)
+    return path
+
+
+def patch_density_surfaces(lon, lat, category, sign, path: str = None):
+    """
+    Apply POI changes to surfaces written by build_density_surfaces: `sign`
+    is +1 for each added point and -1 for each removed one.
+
+    The KDE is linear in the points, so a change only adds or subtracts its
+    own kernel. Each touched category convolves just the window around its
+    changed points (padded by the kernel radius) and adds that to the stored
+    surface; untouched categories are not read or rewritten.
+    """
+    path = path or density_path()
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    (x0, y_top), cell, tile = meta["origin"], meta["cell"], meta["tile"]
+    rows, cols = meta["shape"]
+    # Same ground-scaled bandwidth as the build
+    kernel = gaussian_kernel(meta["sigma_m"] / meta["cell_m"])
+    pad = kernel.shape[0] // 2
+
+    x, y = to_mercator(lon, lat)
+    c = np.floor((x - x0) / cell).astype(np.int64)
+    r = np.floor((y_top - y) / cell).astype(np.int64)
+    category, sign = np.asarray(category), np.asarray(sign, dtype=np.float64)
+    inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+
+    for name in sorted(set(category[inside].tolist()) & set(meta["categories"])):
+        m = inside & (category == name)
+        r0, r1 = max(r[m].min() - pad, 0), min(r[m].max() + pad + 1, rows)
+        c0, c1 = max(c[m].min() - pad, 0), min(c[m].max() + pad + 1, cols)
+        grid = np.zeros((r1 - r0, c1 - c0))
+        np.add.at(grid, (r[m] - r0, c[m] - c0), sign[m])
+        delta = fft_convolve(grid, kernel) / (meta["cell_m"] * meta["cell_m"] / 1e6)
+
+        surface = _read_surface(path, name, (rows, cols), tile)
+        surface[r0:r1, c0:c1] = np.maximum(surface[r0:r1, c0:c1] + delta, 0)
+        _write_surface(path, name, surface, tile)
+        meta["categories"][name]["points"] += int(sign[m].sum())
+        meta["categories"][name]["max"] = float(surface.max())
+
+    _write_meta(path, meta)
+    return path
+
+
+def _read_surface(path: str, name: str, shape, tile: int) -> np.ndarray:
+    surface = np.zeros(shape, dtype=np.float32)
+    with np.load(os.path.join(path, f"{name}.npz")) as npz:
+        for key in npz.files:
+            tr, tc = (int(v) for v in key[1:].split("_"))
+            block = npz[key]
+            surface[tr * tile:tr * tile + block.shape[0], tc * tile:tc * tile + block.shape[1]] = block
+    return surface
+
+
+def _write_surface(path: str, name: str, surface: np.ndarray, tile: int):
+    """float16 tiles (for sampling) and a PNG (for display) of one category."""
+    rows, cols = surface.shape
+    tiles = {
+        f"t{r}_{c}": surface[r * tile:(r + 1) * tile, c * tile:(c + 1) * tile].astype(np.float16)
+        for r in range(-(-rows // tile))
+        for c in range(-(-cols // tile))
+    }
+    np.savez_compressed(os.path.join(path, f"{name}.npz"), **tiles)
+    _write_png(surface, CATEGORY_COLORS[name], os.path.join(path, f"{name}.png"))
+
+
+def _write_meta(path: str, meta: dict):
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+
+def _write_png(surface: np.ndarray, color, path: str):
+    """Category colour with alpha rising with density (99th percentile = opaque)."""
+    from PIL import Image
+
+    top = np.percentile(surface[surface > 0], 99) if (surface > 0).any() else 1.0
+    alpha = np.clip(surface / top, 0, 1)
+    rgba = np.empty(surface.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = color
+    rgba[..., 3] = (np.sqrt(alpha) * 200).astype(np.uint8)
+    Image.fromarray(rgba, "RGBA").save(path, optimize=True)
+
+
+class DensitySurfaces:
+    """Read side: point sampling from the tiles and PNGs for a BitmapLayer."""
+
+    def __init__(self, path: str = None):
+        self.path = path or density_path()
+        with open(os.path.join(self.path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.bounds = self.meta["bounds"]
+        self._tiles = {}
+        self._urls = {}
+
+    def _npz(self, category: str):
+        if category not in self._tiles:
+            # Tiles load lazily on first access to each key
+            self._tiles[category] = np.load(os.path.join(self.path, f"{category}.npz"))
+        return self._tiles[category]
+
+    def sample(self, category: str, lon, lat) -> np.ndarray:
+        """Density (points per km²) at each lon/lat; NaN outside the surface."""
+        x, y = to_mercator(lon, lat)
+        (ox, oy), cell, tile = self.meta["origin"], self.meta["cell"], self.meta["tile"]
+        rows, cols = self.meta["shape"]
+        r = np.floor((oy - y) / cell).astype(np.int64)
+        c = np.floor((x - ox) / cell).astype(np.int64)
+        inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+
+        out = np.full(r.shape, np.nan)
+        npz = self._npz(category)
+        tr, tc = r // tile, c // tile
+        for key in set(zip(tr[inside].tolist(), tc[inside].tolist())):
+            sel = inside & (tr == key[0]) & (tc == key[1])
+            block = npz[f"t{key[0]}_{key[1]}"]
+            out[sel] = block[r[sel] - key[0] * tile, c[sel] - key[1] * tile]
+        return out
+
+    def image_data_url(self, category: str) -> str:
+        # Encoded once per process (the app caches this object); PNGs run to
+        # hundreds of KB
+        if category not in self._urls:
+            with open(os.path.join(self.path, f"{category}.png"), "rb") as f:
+                self._urls[category] = "data:image/png;base64," + base64.b64encode(f.read()).decode()
+        return self._urls[category]
+
+    def bitmap_layer(self, category: str, **kwargs) -> dict:
+        """BitmapLayer spec for layer_data.deck_page."""
+        return {
+            "type": "BitmapLayer",
+            "id": f"density-{category}",
+            "props": {"image": self.image_data_url(category), "bounds": self.bounds, "opacity": 0.8, **kwargs},
+        }
@@ -0,0 +1,122 @@
+# app/disk_cache.py
+
+import functools
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.environ.get("CITYSCOPE_CACHE_DIR", os.path.join("data", "cache", "memo"))
+MAX_CACHE_BYTES = int(os.environ.get("CITYSCOPE_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Bump to invalidate every entry (e.g. after changing the key format).
+CACHE_FORMAT = 1
+
+
+def file_fingerprint(path: str):
+    """Cheap identity of an input file: path, size and modification time."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (path, None)
+    return (path, st.st_size, st.st_mtime_ns)
+
+
+def _token(obj, h):
+    """Feed a stable representation of a call argument into hash `h`."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr(list(obj.columns)).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(str(obj.dtype).encode() + str(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"(")
+        for item in obj:
+            _token(item, h)
+        h.update(b")")
+    elif isinstance(obj, dict):
+        for k in sorted(obj):
+            _token(k, h)
+            _token(obj[k], h)
+    else:
+        h.update(repr(obj).encode())
+    h.update(b"|")
+
+
+def _key(func, version, inputs, args, kwargs) -> str:
+    h = hashlib.sha1()
+    _token((CACHE_FORMAT, func.__module__, func.__qualname__, version), h)
+    _token([file_fingerprint(p) for p in inputs], h)
+    _token(args, h)
+    _token(kwargs, h)
+    return h.hexdigest()
+
+
+def evict(max_bytes: int = MAX_CACHE_BYTES, cache_dir: str = CACHE_DIR):
+    """Delete least recently used entries until the cache fits in `max_bytes`."""
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime_ns, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def disk_memo(version: int = 1, inputs=()):
+    """
+    Memoize a function's result on disk, across processes and restarts.
+
+    The key combines the function name, `version` (bump it when the function's
+    logic changes), fingerprints of the `inputs` files (or a callable that
+    maps the call arguments to paths) and the call arguments. Entries are pickles in
+    CACHE_DIR; a hit refreshes the entry's mtime, which drives LRU eviction.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            paths = inputs(*args, **kwargs) if callable(inputs) else inputs
+            path = os.path.join(CACHE_DIR, _key(func, version, paths, args, kwargs) + ".pkl")
+
+            try:
+                with open(path, "rb") as f:
+                    result = pickle.load(f)
+                os.utime(path)
+                return result
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass
+
+            result = func(*args, **kwargs)
+
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            evict()
+            return result
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
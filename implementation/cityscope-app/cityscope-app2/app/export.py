@@ -0,0 +1,208 @@
+# app/export.py
+
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+
+from metrics import ACCESS_COLUMN, NORMALIZERS, SCORE_COLUMNS, compute_scores
+from poi_dataset import iter_pois
+from store import GEOMETRY_COLUMN, open_store, store_crs, store_path
+
+FORMATS = ["parquet", "gpkg", "ndjson"]
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "gpkg": "application/geopackage+sqlite3",
+    "ndjson": "application/geo+json-seq",
+}
+
+# Rows per written chunk; memory use scales with this, not with the export.
+BATCH_ROWS = 8192
+
+# Columns the scores are computed from (see metrics.raw_components)
+RAW_SCORE_INPUTS = [
+    "avg_rent", "transit_service_per_km2", "transit_per_km2", "schools_per_km2", "amenities_per_km2",
+    ACCESS_COLUMN,
+]
+
+
+def neighborhood_batches(base: str = None, weights=None, normalizer: str = "min_max",
+                         batch_rows: int = BATCH_ROWS):
+    """
+    Scored neighborhoods with WKB geometry, streamed from the memory-mapped
+    store as Arrow tables of at most `batch_rows` rows.
+
+    Normalization needs every row, so the few raw score inputs are read whole
+    (one float column each); geometry and the other columns are only ever
+    touched one slice at a time. Returns (batches, crs).
+    """
+    if normalizer not in NORMALIZERS:
+        raise ValueError(f"Unknown normalizer {normalizer!r}; choose from {sorted(NORMALIZERS)}")
+    if weights is not None and len(weights) != len(SCORE_COLUMNS):
+        raise ValueError(f"weights must have {len(SCORE_COLUMNS)} values, got {len(weights)}")
+    table = open_store(store_path(base))
+    inputs = table.select([c for c in RAW_SCORE_INPUTS if c in table.column_names]).to_pandas()
+    scored = compute_scores.uncached(inputs, weights, normalizer)
+    score_columns = [c for c in scored.columns if c not in inputs.columns]
+    scores = {c: scored[c].to_numpy(dtype=np.float64) for c in score_columns}
+
+    def batches():
+        for start in range(0, table.num_rows, batch_rows):
+            chunk = table.slice(start, batch_rows)
+            stop = start + chunk.num_rows
+            for col in score_columns:
+                chunk = chunk.append_column(col, pa.array(scores[col][start:stop]))
+            yield chunk.rename_columns(
+                ["geometry" if c == GEOMETRY_COLUMN else c for c in chunk.column_names]
+            ).replace_schema_metadata(None)
+
+    return batches(), store_crs(table)
+
+
+def poi_batches(bbox=None, categories=None, city=None, path: str = None,
+                batch_rows: int = BATCH_ROWS):
+    """POIs from the partitioned dataset with WKB point geometry (EPSG:4326)."""
+
+    def batches():
+        for batch in iter_pois(bbox, categories, city, path=path, batch_rows=batch_rows):
+            chunk = pa.Table.from_batches([batch])
+            if "hilbert" in chunk.column_names:
+                chunk = chunk.drop_columns(["hilbert"])
+            points = shapely.points(chunk["lon"].to_numpy(), chunk["lat"].to_numpy())
+            yield chunk.append_column("geometry", pa.array(shapely.to_wkb(points), pa.binary()))
+
+    return batches(), "EPSG:4326"
+
+
+def _geo_metadata(crs: str) -> dict:
+    from pyproj import CRS
+
+    return {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {
+            "geometry": {"encoding": "WKB", "geometry_types": [], "crs": CRS(crs).to_json_dict()}
+        },
+    }
+
+
+def write_parquet(batches, sink, crs: str):
+    """GeoParquet, one row group per batch."""
+    writer = None
+    try:
+        for chunk in batches:
+            if writer is None:
+                schema = chunk.schema.with_metadata({b"geo": json.dumps(_geo_metadata(crs)).encode()})
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(chunk.cast(writer.schema))
+            yield
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_ndjson(batches, sink, crs: str):
+    """Newline-delimited GeoJSON features, reprojected to EPSG:4326 (RFC 7946)."""
+    from pyproj import Transformer
+
+    to_4326 = None
+    if crs.upper() not in ("EPSG:4326", "OGC:CRS84"):
+        to_4326 = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+
+    for chunk in batches:
+        geoms = shapely.from_wkb(chunk["geometry"].to_numpy(zero_copy_only=False))
+        if to_4326 is not None:
+            geoms = shapely.transform(
+                geoms, lambda xy: np.column_stack(to_4326.transform(xy[:, 0], xy[:, 1]))
+            )
+        geometry = shapely.to_geojson(geoms)
+        rows = chunk.drop_columns(["geometry"]).to_pylist()
+        lines = [
+            '{"type":"Feature","geometry":%s,"properties":%s}\n' % (
+                g, json.dumps({k: None if isinstance(v, float) and v != v else v for k, v in row.items()})
+            )
+            for g, row in zip(geometry, rows)
+        ]
+        sink.write("".join(lines).encode("utf-8"))
+        yield
+
+
+def write_gpkg(batches, path: str, crs: str, layer: str):
+    """GeoPackage layer, appended one batch at a time."""
+    import geopandas as gpd
+
+    for i, chunk in enumerate(batches):
+        df = chunk.drop_columns(["geometry"]).to_pandas()
+        gdf = gpd.GeoDataFrame(
+            df, geometry=gpd.GeoSeries.from_wkb(chunk["geometry"].to_numpy(zero_copy_only=False)), crs=crs
+        )
+        gdf.to_file(path, layer=layer, driver="GPKG", mode="a" if i else "w")
+        yield
+
+
+def export(fmt: str, batches, crs: str, out, layer: str = "export"):
+    """Write every batch to `out` (a path; for parquet/ndjson also a file object)."""
+    if fmt == "gpkg":
+        writer = write_gpkg(batches, out, crs, layer)
+    elif fmt == "parquet":
+        writer = write_parquet(batches, out, crs)
+    elif fmt == "ndjson":
+        if isinstance(out, str):
+            with open(out, "wb") as f:
+                return export(fmt, batches, crs, f, layer)
+        writer = write_ndjson(batches, out, crs)
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; choose from {FORMATS}")
+    rows = 0
+    for _ in writer:
+        rows += 1
+    return rows
+
+
+class _ChunkSink:
+    """Write-only file object whose bytes are drained after every batch."""
+
+    def __init__(self):
+        self.parts, self.position, self.closed = [], 0, False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def stream(fmt: str, batches, crs: str):
+    """
+    Bytes of a parquet or ndjson export, yielded as each batch is written,
+    for an HTTP response. (GeoPackage is an SQLite file and needs a path.)
+    """
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = write_parquet(batches, sink, crs)
+    elif fmt == "ndjson":
+        writer = write_ndjson(batches, sink, crs)
+    else:
+        raise ValueError(f"{fmt!r} cannot be streamed; choose parquet or ndjson")
+    for _ in writer:
+        yield sink.drain()
+    # Parquet writes its footer on close
+    yield sink.drain()
@@ -0,0 +1,71 @@
+# app/layer_data.py
+
+import base64
+import json
+import os
+
+import numpy as np
+
+# ~1 m at Vancouver's latitude; more digits only add JSON bytes.
+COORD_DECIMALS = 5
+
+DECK_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "deck_page.html")
+SPEC_PLACEHOLDER = "/*DECK_SPEC*/"
+
+
+def _buffer(values, dtype) -> str:
+    """Little-endian bytes of `values` as base64, for a typed array in the page."""
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode("ascii")
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+def scatter_layer(layer_id: str, lon, lat, color, radius=None, tooltip_html=None, **kwargs) -> dict:
+    """
+    ScatterplotLayer whose attributes go to deck.gl as binary buffers.
+
+    Positions (float32 lon/lat pairs), radii (float32) and per-row colours
+    (an (n, 3) or (n, 4) uint8 array; a flat [r, g, b(, a)] list is a
+    constant) are base64 typed arrays that deck_page hands to deck.gl as
+    attributes, so the payload grows with bytes per point instead of one JSON
+    object each. Only the tooltip strings stay JSON. Other keyword arguments
+    are layer props in pydeck's snake_case.
+    """
+    position = np.column_stack([np.asarray(lon), np.asarray(lat)])
+    layer = {
+        "type": "ScatterplotLayer",
+        "id": layer_id,
+        "length": len(position),
+        "attributes": {"getPosition": {"value": _buffer(position, "<f4"), "type": "float32", "size": 2}},
+        "props": {_camel(k): v for k, v in kwargs.items()},
+    }
+    color = np.asarray(color)
+    if color.ndim == 2:
+        layer["attributes"]["getFillColor"] = {
+            "value": _buffer(color, "u1"), "type": "uint8", "size": color.shape[1], "normalized": True,
+        }
+    else:
+        layer["props"]["getFillColor"] = color.tolist()
+    if radius is not None:
+        layer["attributes"]["getRadius"] = {"value": _buffer(radius, "<f4"), "type": "float32", "size": 1}
+    if tooltip_html is not None:
+        layer["tooltips"] = np.asarray(tooltip_html, dtype=object).tolist()
+    return layer
+
+
+def deck_page(layers, latitude: float, longitude: float, zoom: float) -> str:
+    """
+    Self-contained HTML (for components.html) drawing `layers` with deck.gl
+    over OpenStreetMap tiles.
+
+    `layers` are scatter_layer specs, or {"type": "BitmapLayer", "id", "props"}
+    for images such as density.DensitySurfaces.bitmap_layer.
+    """
+    with open(DECK_PAGE) as f:
+        page = f.read()
+    spec = {"layers": list(layers), "view": {"latitude": latitude, "longitude": longitude, "zoom": zoom}}
+    # Inside <script>: keep tooltip markup from closing the tag
+    return page.replace(SPEC_PLACEHOLDER, json.dumps(spec).replace("</", "<\\/"))
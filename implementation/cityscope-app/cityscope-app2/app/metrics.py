@@ -1,7 +1,24 @@
 # app/metrics.py
 
+import warnings
+
+import numpy as np
 import pandas as pd
 
+from disk_cache import disk_memo
+
+SCORE_COLUMNS = ["affordability_score", "transit_score", "schools_score", "amenities_score"]
+
+# Weights for composite score (same order as SCORE_COLUMNS)
+DEFAULT_WEIGHTS = np.array([0.4, 0.3, 0.2, 0.1])
+
+# Population-weighted median distance to amenities (scripts/compute_access.py);
+# scored as an extra column, outside the composite.
+ACCESS_COLUMN = "access_p50_m"
+
+# Winsorizing percentiles for the "robust" normalizer
+ROBUST_CLIP = (5, 95)
+
 
 def min_max(series: pd.Series) -> pd.Series:
     min_v, max_v = series.min(), series.max()
@@ -10,25 +27,142 @@ def min_max(series: pd.Series) -> pd.Series:
     return 100 * (series - min_v) / (max_v - min_v)
 
 
-def compute_scores(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+def raw_components(df: pd.DataFrame) -> np.ndarray:
+    """
+    (n_neighborhoods, 4) float matrix of raw inputs in SCORE_COLUMNS order.
 
-    # Affordability: lower rent => higher score
-    aff_raw = df["avg_rent"]
-    df["affordability_score"] = 100 - min_max(aff_raw)
+    Rent is negated so that, like the other inputs, higher means better.
+    """
+    # GTFS departures per hour (scripts/ingest_gtfs.py) beat OSM station counts
+    transit = "transit_service_per_km2" if "transit_service_per_km2" in df.columns else "transit_per_km2"
+    return np.column_stack(
+        [
+            -df["avg_rent"].to_numpy(dtype=np.float64),
+            df[transit].to_numpy(dtype=np.float64),
+            df["schools_per_km2"].to_numpy(dtype=np.float64),
+            df["amenities_per_km2"].to_numpy(dtype=np.float64),
+        ]
+    )
 
-    df["transit_score"] = min_max(df["transit_per_km2"])
-    df["schools_score"] = min_max(df["schools_per_km2"])
-    df["amenities_score"] = min_max(df["amenities_per_km2"])
 
-    # Weights for composite score
-    w_afford, w_transit, w_school, w_amen = 0.4, 0.3, 0.2, 0.1
+def _column_stats(stat, x: np.ndarray, *args) -> np.ndarray:
+    """A nan-aware per-column statistic; all-NaN columns give NaN, silently."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return stat(x, *args, axis=0)
 
-    df["composite_score"] = (
-        w_afford * df["affordability_score"]
-        + w_transit * df["transit_score"]
-        + w_school * df["schools_score"]
-        + w_amen * df["amenities_score"]
-    )
+
+def _keep_nan(x: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Missing inputs stay missing instead of scoring as constants."""
+    return np.where(np.isnan(x), np.nan, out)
+
+
+def _min_max_matrix(x: np.ndarray) -> np.ndarray:
+    lo, hi = _column_stats(np.nanmin, x), _column_stats(np.nanmax, x)
+    span = hi - lo
+    # Constant columns score 50, as in min_max()
+    return _keep_nan(x, np.where(span > 0, 100 * (x - lo) / np.where(span > 0, span, 1), 50.0))
+
+
+def _percentile_matrix(x: np.ndarray) -> np.ndarray:
+    """Percentile rank 0-100 among a column's known values; ties share their average rank."""
+    out = np.full_like(x, np.nan)
+    for j in range(x.shape[1]):
+        valid = ~np.isnan(x[:, j])
+        col = x[valid, j]
+        n = len(col)
+        if n < 2:
+            out[valid, j] = 50.0
+            continue
+        ordered = np.sort(col)
+        rank = (
+            np.searchsorted(ordered, col, side="left")
+            + np.searchsorted(ordered, col, side="right") - 1
+        ) / 2
+        out[valid, j] = 100 * rank / (n - 1)
+    return out
+
+
+def _zscore_matrix(x: np.ndarray) -> np.ndarray:
+    """z-scores mapped to 0-100 (mean 50, +-3 sd at the ends)."""
+    mean, std = _column_stats(np.nanmean, x), _column_stats(np.nanstd, x)
+    z = np.where(std > 0, (x - mean) / np.where(std > 0, std, 1), 0.0)
+    return _keep_nan(x, np.clip(50 + z * (50 / 3), 0, 100))
+
+
+def _robust_matrix(x: np.ndarray) -> np.ndarray:
+    """Min-max after winsorizing each column, so one outlier can't flatten the rest."""
+    lo, hi = _column_stats(np.nanpercentile, x, ROBUST_CLIP)
+    return _min_max_matrix(np.clip(x, lo, hi))
+
+
+NORMALIZERS = {
+    "min_max": _min_max_matrix,
+    "percentile": _percentile_matrix,
+    "zscore": _zscore_matrix,
+    "robust": _robust_matrix,
+}
+
+
+def component_scores(df: pd.DataFrame, normalizer: str = "min_max") -> np.ndarray:
+    """(n_neighborhoods, 4) component scores on a 0-100 scale."""
+    try:
+        normalize = NORMALIZERS[normalizer]
+    except KeyError:
+        raise ValueError(f"Unknown normalizer {normalizer!r}; choose from {sorted(NORMALIZERS)}")
+    return normalize(raw_components(df))
+
+
+def check_weights(weights) -> np.ndarray:
+    """
+    `weights` as a float array, one vector or one per row, in SCORE_COLUMNS
+    order. Raises ValueError unless every vector is finite, non-negative and
+    has a positive sum (composite scores divide by it).
+    """
+    w = np.asarray(weights, dtype=np.float64)
+    if w.ndim not in (1, 2) or w.shape[-1] != len(SCORE_COLUMNS):
+        raise ValueError(f"weights must have {len(SCORE_COLUMNS)} columns, got shape {w.shape}")
+    if not np.isfinite(w).all():
+        raise ValueError("weights must be finite")
+    if (w < 0).any():
+        raise ValueError("weights must be non-negative")
+    if (w.sum(axis=-1) <= 0).any():
+        raise ValueError("weights must not all be zero")
+    return w
+
+
+def scenario_scores(df: pd.DataFrame, weights, normalizer: str = "min_max") -> np.ndarray:
+    """
+    Composite scores for many weight scenarios in one matrix product.
+
+    `weights` is (n_scenarios, 4) in SCORE_COLUMNS order (a single vector is
+    also accepted); each row is rescaled to sum to 1. Returns an
+    (n_neighborhoods, n_scenarios) array.
+    """
+    w = np.atleast_2d(check_weights(weights))
+    w = w / w.sum(axis=1, keepdims=True)
+    return component_scores(df, normalizer) @ w.T
+
+
+@disk_memo(version=5)
+def compute_scores(df: pd.DataFrame, weights=None, normalizer: str = "min_max") -> pd.DataFrame:
+    w = DEFAULT_WEIGHTS if weights is None else check_weights(weights)
+    if w.ndim != 1:
+        raise ValueError(f"weights must be one vector of {len(SCORE_COLUMNS)}, got shape {w.shape}")
+    df = df.copy()
+
+    scores = component_scores(df, normalizer)
+    for j, col in enumerate(SCORE_COLUMNS):
+        df[col] = scores[:, j]
+
+    df["composite_score"] = scores @ (w / w.sum())
+
+    if ACCESS_COLUMN in df.columns:
+        # Nearer is better, as with rent
+        distance = -df[ACCESS_COLUMN].to_numpy(dtype=np.float64)[:, None]
+        valid = ~np.isnan(distance[:, 0])
+        df["access_score"] = np.nan
+        if valid.any():
+            df.loc[valid, "access_score"] = NORMALIZERS[normalizer](distance[valid])[:, 0]
 
     return df
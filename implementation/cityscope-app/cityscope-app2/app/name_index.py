@@ -0,0 +1,261 @@
+# app/name_index.py
+
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from poi_store import CATEGORIES, UNASSIGNED
+from store import STORE_VERSION, processed_dir
+
+NAME_INDEX_FILENAME = f"name_index_v{STORE_VERSION}.npz"
+
+# OSM tags searched, when pois.geojson carries them
+NAME_FIELDS = ["name", "brand", "name:en", "short_name", "official_name", "operator"]
+
+# Tokens shorter than this only match exactly or by prefix, never fuzzily
+FUZZY_MIN_LEN = 4
+
+# Relative weight of each kind of token match in a hit's score
+MATCH_EXACT, MATCH_PREFIX, MATCH_FUZZY = 1.0, 0.8, 0.6
+
+# Rough metres per degree, as in poi_dataset.py
+M_PER_DEG_LAT = 111_320.0
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text) -> str:
+    """Lowercase, strip accents and punctuation ("Café Ümlaut's" -> "cafe umlauts")."""
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NON_WORD.sub(" ", text.lower().replace("'", "")).strip()
+
+
+def tokenize(text) -> list:
+    return normalize(text).split()
+
+
+def deletions(token: str) -> set:
+    """All strings one deletion away from `token` (symmetric-delete fuzzy matching)."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def build_name_index(pois, neighborhoods) -> dict:
+    """
+    Arrays of the name index, ready for np.savez.
+
+    - `vocab`: sorted unique tokens; postings for vocab[t] are
+      post_ids[post_ptr[t]:post_ptr[t + 1]] (row numbers into the POI arrays).
+    - `del_keys` / `del_tokens`: every one-deletion variant of every token
+      (plus the token itself), sorted, for edit-distance-1 lookups.
+    - POI rows carry display name, category, neighborhood and lon/lat.
+    - `nbhd_*` arrays follow `neighborhoods` row by row; pass them in store
+      order so nearest_to's `row` is a store row.
+    """
+    import geopandas as gpd
+
+    pois = pois.to_crs(epsg=3857)
+    pois = pois[pois["category"].isin(CATEGORIES)].copy()
+    pois["geometry"] = pois.geometry.centroid
+    if "name" not in pois.columns:
+        pois["name"] = None
+    fields = [f for f in NAME_FIELDS if f in pois.columns]
+
+    joined = gpd.sjoin(
+        pois[fields + ["category", "geometry"]],
+        neighborhoods.to_crs(epsg=3857)[["neighborhood_name", "geometry"]],
+        how="left",
+        predicate="within",
+    )
+    joined = joined[~joined.index.duplicated(keep="first")]
+
+    # One searchable text per POI: all name-like tags joined
+    texts = joined[fields].astype("string").fillna("").agg(" ".join, axis=1).str.strip()
+    token_lists = [sorted(set(tokenize(t))) for t in texts]
+    keep = np.array([bool(t) for t in token_lists], dtype=bool)
+    joined = joined[keep]
+    token_lists = [t for t, k in zip(token_lists, keep) if k]
+
+    pairs = pd.DataFrame(
+        {
+            "token": [tok for toks in token_lists for tok in toks],
+            "poi": np.repeat(np.arange(len(token_lists)), [len(t) for t in token_lists]),
+        }
+    ).sort_values(["token", "poi"], kind="stable")
+    vocab, starts = np.unique(pairs["token"].to_numpy(dtype=str), return_index=True)
+    post_ptr = np.append(starts, len(pairs))
+
+    del_pairs = pd.DataFrame(
+        [(v, t) for t, token in enumerate(vocab) if len(token) >= FUZZY_MIN_LEN
+         for v in deletions(token) | {token}],
+        columns=["key", "token"],
+    ).sort_values(["key", "token"], kind="stable")
+
+    points = joined.geometry.to_crs(epsg=4326)
+    display = joined["name"].where(joined["name"].notna(), texts[keep])
+    nbhd_points = neighborhoods.to_crs(epsg=3857).geometry.centroid.to_crs(epsg=4326)
+
+    return {
+        "vocab": vocab,
+        "post_ptr": post_ptr.astype(np.int64),
+        "post_ids": pairs["poi"].to_numpy(dtype=np.int32),
+        "del_keys": del_pairs["key"].to_numpy(dtype=str),
+        "del_tokens": del_pairs["token"].to_numpy(dtype=np.int32),
+        "name": display.to_numpy(dtype=str),
+        "category": joined["category"].to_numpy(dtype=str),
+        "neighborhood_name": joined["neighborhood_name"].fillna(UNASSIGNED).to_numpy(dtype=str),
+        "lon": points.x.to_numpy(dtype=np.float32),
+        "lat": points.y.to_numpy(dtype=np.float32),
+        "nbhd_names": neighborhoods["neighborhood_name"].to_numpy(dtype=str),
+        "nbhd_lon": nbhd_points.x.to_numpy(dtype=np.float64),
+        "nbhd_lat": nbhd_points.y.to_numpy(dtype=np.float64),
+    }
+
+
+def name_index_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), NAME_INDEX_FILENAME)
+
+
+def write_name_index(arrays: dict, path: str = None):
+    path = path or name_index_path()
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+class NameIndex:
+    """
+    Inverted index over POI names and brands.
+
+    Lookups are binary searches over sorted token arrays: exact and prefix
+    matches on `vocab`, edit-distance-1 matches on the deletion variants.
+    """
+
+    def __init__(self, path: str = None):
+        with np.load(path or name_index_path()) as f:
+            for key in f.files:
+                setattr(self, key, f[key])
+
+    def __len__(self):
+        return len(self.name)
+
+    def _range(self, keys: np.ndarray, lo: str, hi: str = None):
+        start = np.searchsorted(keys, lo, side="left")
+        stop = np.searchsorted(keys, lo if hi is None else hi, side="right" if hi is None else "left")
+        return start, stop
+
+    def token_matches(self, token: str, prefix: bool = False) -> dict:
+        """{vocab id: match weight} for one query token."""
+        matches = {}
+        if len(token) >= FUZZY_MIN_LEN:
+            for key in deletions(token) | {token}:
+                start, stop = self._range(self.del_keys, key)
+                for t in self.del_tokens[start:stop]:
+                    matches[int(t)] = MATCH_FUZZY
+        if prefix:
+            start, stop = self._range(self.vocab, token, token + "\uffff")
+            for t in range(start, stop):
+                matches[t] = MATCH_PREFIX
+        start, stop = self._range(self.vocab, token)
+        for t in range(start, stop):
+            matches[t] = MATCH_EXACT
+        return matches
+
+    def search(self, query: str, limit: int = None) -> pd.DataFrame:
+        """
+        POIs whose names match every query token (the last one may be a
+        prefix), best matches first.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return self._hits(np.array([], dtype=np.int64), np.array([]))
+
+        rows, score = None, None
+        for i, token in enumerate(tokens):
+            ids, weight = self._postings(self.token_matches(token, prefix=i == len(tokens) - 1))
+            if rows is None:
+                rows, score = ids, weight
+            else:
+                rows, a, b = np.intersect1d(rows, ids, assume_unique=True, return_indices=True)
+                score = score[a] + weight[b]
+            if len(rows) == 0:
+                break
+
+        score = score / len(tokens)
+        order = np.lexsort((rows, -score))
+        if limit is not None:
+            order = order[:limit]
+        return self._hits(rows[order], score[order])
+
+    def _postings(self, matches: dict):
+        """Unique POI rows for a set of matched tokens, each with its best weight."""
+        if not matches:
+            return np.array([], dtype=np.int64), np.array([])
+        tokens = np.fromiter(matches.keys(), dtype=np.int64, count=len(matches))
+        weights = np.fromiter(matches.values(), dtype=np.float64, count=len(matches))
+        lengths = self.post_ptr[tokens + 1] - self.post_ptr[tokens]
+        ids = np.concatenate(
+            [self.post_ids[self.post_ptr[t]:self.post_ptr[t + 1]] for t in tokens]
+        ).astype(np.int64)
+        w = np.repeat(weights, lengths)
+        order = np.lexsort((-w, ids))
+        ids, w = ids[order], w[order]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = ids[1:] != ids[:-1]
+        return ids[first], w[first]
+
+    def _hits(self, rows, score) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "name": self.name[rows],
+                "category": self.category[rows],
+                "neighborhood_name": self.neighborhood_name[rows],
+                "lon": self.lon[rows],
+                "lat": self.lat[rows],
+                "match": score,
+            }
+        )
+
+    def nearest_to(self, hits: pd.DataFrame, rows=None, min_match: float = None) -> pd.DataFrame:
+        """
+        Distance (centroid, metres) from each neighborhood to its nearest hit,
+        with that hit's name; closest first.
+
+        `rows` limits the search to those neighborhood rows (all by default);
+        `row` in the result is the neighborhood's row, a unique key where
+        names are not.
+        """
+        from shapely import STRtree, points
+
+        columns = ["row", "neighborhood_name", "nearest_m", "nearest_place"]
+        if min_match is not None:
+            hits = hits[hits["match"] >= min_match]
+        rows = np.arange(len(self.nbhd_names)) if rows is None else np.asarray(rows, dtype=np.int64)
+        rows = rows[np.isfinite(self.nbhd_lon[rows]) & np.isfinite(self.nbhd_lat[rows])]
+        if hits.empty or len(rows) == 0:
+            return pd.DataFrame(columns=columns)
+
+        lat0 = np.radians(np.nanmean(self.nbhd_lat))
+        hx = hits["lon"].to_numpy(dtype=np.float64) * np.cos(lat0) * M_PER_DEG_LAT
+        hy = hits["lat"].to_numpy(dtype=np.float64) * M_PER_DEG_LAT
+        nx = self.nbhd_lon[rows] * np.cos(lat0) * M_PER_DEG_LAT
+        ny = self.nbhd_lat[rows] * M_PER_DEG_LAT
+
+        # One nearest-neighbour query per centroid against an R-tree of the hits
+        tree = STRtree(points(hx, hy))
+        (query, hit), dist = tree.query_nearest(points(nx, ny), return_distance=True, all_matches=False)
+
+        out = pd.DataFrame(
+            {
+                "row": rows[query],
+                "neighborhood_name": self.nbhd_names[rows[query]],
+                "nearest_m": dist,
+                "nearest_place": hits["name"].to_numpy()[hit],
+            }
+        )
+        return out.sort_values(["nearest_m", "row"], kind="stable").reset_index(drop=True)
@@ -0,0 +1,59 @@
+# app/payloads.py
+
+import os
+
+import pandas as pd
+
+from disk_cache import disk_memo
+from store import geometry_frame, metrics_frame, open_store, processed_dir, store_path
+
+METRICS_FILENAME = "neighborhood_metrics.parquet"
+GEO_FILENAME = "neighborhoods_full.geojson"
+
+
+def read_metrics(base: str = None) -> pd.DataFrame:
+    """Raw (unscored) metrics, from the memory-mapped store when it exists."""
+    base = base or processed_dir()
+    if os.path.exists(store_path(base)):
+        return metrics_frame(open_store(store_path(base)))
+    return _read_metrics_parquet(base)
+
+
+@disk_memo(version=1, inputs=lambda base: [os.path.join(base, METRICS_FILENAME)])
+def _read_metrics_parquet(base: str) -> pd.DataFrame:
+    return pd.read_parquet(os.path.join(base, METRICS_FILENAME))
+
+
+@disk_memo(version=1, inputs=lambda base: [os.path.join(base, GEO_FILENAME)])
+def _read_geometry_geojson(base: str):
+    import geopandas as gpd
+
+    return gpd.read_file(os.path.join(base, GEO_FILENAME))[["neighborhood_name", "geometry"]]
+
+
+def filter_metrics(metrics: pd.DataFrame, max_rent, min_score) -> pd.DataFrame:
+    """The sidebar filters, shared by the app and the cache warm-up."""
+    return metrics[
+        (metrics["avg_rent"] <= max_rent)
+        & (metrics["composite_score"] >= min_score)
+    ].copy()
+
+
+@disk_memo(
+    version=1,
+    inputs=lambda scores, base: [store_path(base), os.path.join(base, GEO_FILENAME)],
+)
+def map_frame(scores: pd.DataFrame, base: str):
+    """
+    Choropleth payload for map_section: geometry in EPSG:4326 joined with
+    `scores` (neighborhood_name, composite_score).
+    """
+    if os.path.exists(store_path(base)):
+        full_gdf = geometry_frame(
+            open_store(store_path(base)), names=scores["neighborhood_name"].unique()
+        )
+    else:
+        full_gdf = _read_geometry_geojson(base)
+
+    gdf_scores = full_gdf.merge(scores, on="neighborhood_name", how="inner")
+    return gdf_scores.to_crs(epsg=4326)
@@ -0,0 +1,189 @@
+# app/poi_dataset.py
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import shapely
+
+from poi_store import UNASSIGNED
+from store import processed_dir
+
+POI_DATASET_DIRNAME = "pois_dataset"
+
+# Small row groups keep the per-group lon/lat min/max statistics tight, so a
+# bbox filter skips most of a partition.
+ROW_GROUP_ROWS = 4096
+HILBERT_ORDER = 16
+
+# Rough metres per degree, for turning a radius into a bbox
+M_PER_DEG_LAT = 111_320.0
+
+
+def poi_dataset_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), POI_DATASET_DIRNAME)
+
+
+def hilbert_index(lon, lat, order: int = HILBERT_ORDER) -> np.ndarray:
+    """
+    Position along a Hilbert curve over the lon/lat plane (vectorized).
+
+    Points close on the curve are close in space, so sorting by it makes each
+    row group cover a compact area.
+    """
+    n = 1 << order
+    x = np.clip(((np.asarray(lon) + 180.0) / 360.0 * n).astype(np.int64), 0, n - 1)
+    y = np.clip(((np.asarray(lat) + 90.0) / 180.0 * n).astype(np.int64), 0, n - 1)
+    d = np.zeros_like(x)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant
+        flip = ~ry
+        swap_x = np.where(flip & rx, n - 1 - x, x)
+        swap_y = np.where(flip & rx, n - 1 - y, y)
+        x = np.where(flip, swap_y, swap_x)
+        y = np.where(flip, swap_x, swap_y)
+        s >>= 1
+    return d.astype(np.uint64)
+
+
+def poi_table(pois, neighborhoods=None) -> pd.DataFrame:
+    """
+    Flatten pois.geojson to one lon/lat row per POI (polygons -> centroids).
+
+    With `neighborhoods`, each row also gets the `neighborhood_name` it lies
+    within (the same join as the POI store; UNASSIGNED outside all of them).
+    """
+    centroids = pois.to_crs(epsg=3857).geometry.centroid
+    points = centroids.to_crs(epsg=4326)
+    df = pd.DataFrame(
+        {col: pois[col].to_numpy() for col in ["element", "id", "name", "category", "city"]
+         if col in pois.columns}
+    )
+    df["lon"] = points.x.to_numpy()
+    df["lat"] = points.y.to_numpy()
+    if "city" not in df.columns:
+        df["city"] = "unknown"
+    if neighborhoods is not None:
+        import geopandas as gpd
+
+        joined = gpd.sjoin(
+            gpd.GeoDataFrame(geometry=centroids.reset_index(drop=True)),
+            neighborhoods.to_crs(epsg=3857)[["neighborhood_name", "geometry"]],
+            how="left",
+            predicate="within",
+        )
+        joined = joined[~joined.index.duplicated(keep="first")]
+        df["neighborhood_name"] = joined["neighborhood_name"].fillna(UNASSIGNED).to_numpy()
+    return df
+
+
+def write_poi_dataset(df: pd.DataFrame, path: str = None):
+    """
+    Write POIs (lon, lat, category, city, ...) partitioned by city/category,
+    Hilbert-sorted within each partition.
+    """
+    path = path or poi_dataset_path()
+    df = df.assign(
+        lon=df["lon"].astype(np.float64),
+        lat=df["lat"].astype(np.float64),
+        hilbert=hilbert_index(df["lon"], df["lat"]),
+    )
+    df = df.sort_values(["city", "category", "hilbert"], kind="stable")
+    for col in ["city", "category"]:
+        df[col] = df[col].astype(str)
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+
+    for (city, category), part in df.groupby(["city", "category"], sort=False):
+        part_dir = os.path.join(tmp_path, f"city={city}", f"category={category}")
+        os.makedirs(part_dir, exist_ok=True)
+        table = pa.Table.from_pandas(
+            part.drop(columns=["city", "category"]), preserve_index=False
+        )
+        pq.write_table(
+            table,
+            os.path.join(part_dir, "part-0.parquet"),
+            row_group_size=ROW_GROUP_ROWS,
+            write_statistics=True,
+        )
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _dataset(path: str = None):
+    return ds.dataset(poi_dataset_path() if path is None else path, format="parquet", partitioning="hive")
+
+
+def _filter(bbox=None, categories=None, city=None, neighborhood_names=None):
+    expr = None
+
+    def _and(e, term):
+        return term if e is None else e & term
+
+    if city is not None:
+        expr = _and(expr, ds.field("city") == city)
+    if categories is not None:
+        expr = _and(expr, ds.field("category").isin(list(categories)))
+    if neighborhood_names is not None:
+        expr = _and(expr, ds.field("neighborhood_name").isin(list(neighborhood_names)))
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        expr = _and(
+            expr,
+            (ds.field("lon") >= min_lon) & (ds.field("lon") <= max_lon)
+            & (ds.field("lat") >= min_lat) & (ds.field("lat") <= max_lat),
+        )
+    return expr
+
+
+def read_pois(bbox=None, categories=None, city=None, columns=None, path: str = None,
+              neighborhood_names=None) -> pd.DataFrame:
+    """
+    POIs inside `bbox` (min_lon, min_lat, max_lon, max_lat).
+
+    city/category prune whole partitions; the bbox is pushed down to the
+    Parquet row-group statistics, so only groups overlapping it are read.
+    `neighborhood_names` needs a dataset written from
+    poi_table(pois, neighborhoods).
+    """
+    expr = _filter(bbox, categories, city, neighborhood_names)
+    return _dataset(path).to_table(columns=columns, filter=expr).to_pandas()
+
+
+def iter_pois(bbox=None, categories=None, city=None, columns=None, path: str = None,
+              batch_rows: int = ROW_GROUP_ROWS):
+    """Same selection as read_pois, as a stream of Arrow record batches."""
+    expr = _filter(bbox, categories, city)
+    for batch in _dataset(path).to_batches(columns=columns, filter=expr, batch_size=batch_rows):
+        if batch.num_rows:
+            yield batch
+
+
+def read_pois_within_radius(lat: float, lon: float, radius_m: float, **kwargs) -> pd.DataFrame:
+    """POIs within `radius_m` metres of a point (bbox pushdown, then exact distance)."""
+    dlat = radius_m / M_PER_DEG_LAT
+    dlon = radius_m / (M_PER_DEG_LAT * np.cos(np.radians(lat)))
+    df = read_pois(bbox=(lon - dlon, lat - dlat, lon + dlon, lat + dlat), **kwargs)
+
+    dy = (df["lat"].to_numpy() - lat) * M_PER_DEG_LAT
+    dx = (df["lon"].to_numpy() - lon) * M_PER_DEG_LAT * np.cos(np.radians(lat))
+    return df[dx * dx + dy * dy <= radius_m * radius_m]
+
+
+def read_pois_in_polygon(polygon, **kwargs) -> pd.DataFrame:
+    """POIs inside a shapely polygon in EPSG:4326 (bbox pushdown, then exact test)."""
+    df = read_pois(bbox=polygon.bounds, **kwargs)
+    return df[shapely.contains_xy(polygon, df["lon"].to_numpy(), df["lat"].to_numpy())]
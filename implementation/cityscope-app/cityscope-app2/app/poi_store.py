@@ -0,0 +1,340 @@
+# app/poi_store.py
+
+import html
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from layer_data import scatter_layer
+from store import STORE_VERSION, processed_dir
+
+POI_STORE_FILENAME = f"poi_store_v{STORE_VERSION}.arrow"
+
+CATEGORIES = ["school", "transit", "mall", "park", "hospital"]
+
+CATEGORY_COLORS = {
+    "school": [31, 119, 180],
+    "transit": [214, 39, 40],
+    "mall": [255, 127, 14],
+    "park": [44, 160, 44],
+    "hospital": [148, 103, 189],
+}
+
+UNASSIGNED = "(outside neighborhoods)"
+
+# Below this zoom the map gets grid clusters instead of raw points.
+RAW_POINT_MIN_ZOOM = 14
+CLUSTER_CELL_PX = 64
+TILE_PX = 256
+
+MAP_WIDTH_PX = 900
+MAP_HEIGHT_PX = 500
+
+
+def _tooltip(name, category, neighborhood) -> str:
+    title = html.escape(name) if isinstance(name, str) and name else category.title()
+    return f"<b>{title}</b><br/>{html.escape(category)} · {html.escape(neighborhood)}"
+
+
+def build_poi_frame(pois, neighborhoods) -> pd.DataFrame:
+    """
+    Flatten pois.geojson into the compact column layout of the POI store.
+
+    - One point per POI (polygon POIs become centroids), in EPSG:4326.
+    - `neighborhood_name` comes from the same point-in-polygon join that
+      scripts/02_compute_amenity_metrics.py uses for its counts.
+    - Rows are sorted category-major, then by neighborhood, so every
+      (category, neighborhood) pair is one contiguous run of rows.
+    """
+    import geopandas as gpd
+
+    pois = pois.to_crs(epsg=3857)
+    pois = pois[pois["category"].isin(CATEGORIES)].copy()
+    pois["geometry"] = pois.geometry.centroid
+    if "name" not in pois.columns:
+        pois["name"] = None
+
+    joined = gpd.sjoin(
+        pois[["name", "category", "geometry"]],
+        neighborhoods.to_crs(epsg=3857)[["neighborhood_name", "geometry"]],
+        how="left",
+        predicate="within",
+    )
+    joined = joined[~joined.index.duplicated(keep="first")]
+    joined["neighborhood_name"] = joined["neighborhood_name"].fillna(UNASSIGNED)
+
+    points = joined.geometry.to_crs(epsg=4326)
+    names = sorted(neighborhoods["neighborhood_name"].dropna().unique()) + [UNASSIGNED]
+
+    df = pd.DataFrame(
+        {
+            "category": pd.Categorical(joined["category"], categories=CATEGORIES),
+            "neighborhood_name": pd.Categorical(joined["neighborhood_name"], categories=names),
+            "lon": points.x.to_numpy(dtype=np.float32),
+            "lat": points.y.to_numpy(dtype=np.float32),
+            "tooltip_html": [
+                _tooltip(n, c, h)
+                for n, c, h in zip(joined["name"], joined["category"], joined["neighborhood_name"])
+            ],
+        }
+    )
+    df = df.sort_values(["category", "neighborhood_name"], kind="stable")
+    return df.reset_index(drop=True)
+
+
+def poi_store_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), POI_STORE_FILENAME)
+
+
+def write_poi_store(df: pd.DataFrame, path: str = None):
+    path = path or poi_store_path()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {b"cityscope_store_version": str(STORE_VERSION).encode()}
+    )
+    tmp_path = path + ".tmp"
+    # A single record batch keeps each column one contiguous buffer.
+    feather.write_feather(
+        table, tmp_path, compression="uncompressed", chunksize=max(len(df), 1)
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+class PoiStore:
+    """
+    Read-only, memory-mapped POI table with an offsets index.
+
+    `offsets[c, n]:offsets[c, n + 1]` is the row range of category `c` in
+    neighborhood `n`; all of category `c` is `offsets[c, 0]:offsets[c, -1]`.
+    """
+
+    def __init__(self, path: str = None):
+        source = pa.memory_map(path or poi_store_path(), "r")
+        table = pa.ipc.open_file(source).read_all().combine_chunks()
+
+        category = table.column("category").chunk(0)
+        neighborhood = table.column("neighborhood_name").chunk(0)
+
+        self.categories = category.dictionary.to_pylist()
+        self.neighborhoods = neighborhood.dictionary.to_pylist()
+        self._neighborhood_code = {n: i for i, n in enumerate(self.neighborhoods)}
+
+        cat_codes = category.indices.to_numpy()
+        nbhd_codes = neighborhood.indices.to_numpy()
+
+        # Zero-copy views onto the mapped file
+        self.lon = table.column("lon").chunk(0).to_numpy()
+        self.lat = table.column("lat").chunk(0).to_numpy()
+        self.tooltip_html = table.column("tooltip_html").chunk(0)
+
+        n_nbhd = len(self.neighborhoods)
+        key = cat_codes.astype(np.int64) * n_nbhd + nbhd_codes
+        bounds = np.arange(len(self.categories) * n_nbhd + 1)
+        flat = np.searchsorted(key, bounds, side="left")
+        self.offsets = np.empty((len(self.categories), n_nbhd + 1), dtype=np.int64)
+        self.offsets[:, :-1] = flat[:-1].reshape(len(self.categories), n_nbhd)
+        self.offsets[:, -1] = flat[n_nbhd::n_nbhd]
+
+        self.nbhd_codes = nbhd_codes
+        self.pyramid = self._build_pyramid()
+
+    def _build_pyramid(self):
+        """
+        Precompute grid clusters for every category and zoom below
+        RAW_POINT_MIN_ZOOM, once at load time.
+
+        Cells stay split by neighborhood so the sidebar filters still apply;
+        the query merges cells across the selected neighborhoods.
+        """
+        x, y = _mercator_unit(self.lon.astype(np.float64), self.lat.astype(np.float64))
+        pyramid = {}
+        for c, category in enumerate(self.categories):
+            start, stop = self.offsets[c, 0], self.offsets[c, -1]
+            for zoom in range(RAW_POINT_MIN_ZOOM):
+                cells_per_axis = TILE_PX * 2 ** zoom / CLUSTER_CELL_PX
+                df = pd.DataFrame(
+                    {
+                        "nbhd": self.nbhd_codes[start:stop],
+                        "cx": np.floor(x[start:stop] * cells_per_axis).astype(np.int32),
+                        "cy": np.floor(y[start:stop] * cells_per_axis).astype(np.int32),
+                        "lon": self.lon[start:stop].astype(np.float64),
+                        "lat": self.lat[start:stop].astype(np.float64),
+                    }
+                )
+                pyramid[category, zoom] = (
+                    df.groupby(["nbhd", "cx", "cy"], sort=False)
+                    .agg(count=("lon", "size"), lon=("lon", "sum"), lat=("lat", "sum"))
+                    .reset_index()
+                )
+        return pyramid
+
+    def clusters(self, category: str, zoom: int, neighborhood_names=None, bbox=None):
+        """Grid clusters (lon, lat = member centroid, count) for one category."""
+        cells = self.pyramid[category, min(zoom, RAW_POINT_MIN_ZOOM - 1)]
+        if neighborhood_names is not None:
+            codes = [self._neighborhood_code[n] for n in neighborhood_names if n in self._neighborhood_code]
+            cells = cells[cells["nbhd"].isin(codes)]
+
+        merged = cells.groupby(["cx", "cy"], sort=False)[["count", "lon", "lat"]].sum()
+        merged["lon"] /= merged["count"]
+        merged["lat"] /= merged["count"]
+        if bbox is not None:
+            merged = merged[_in_bbox(merged["lon"].to_numpy(), merged["lat"].to_numpy(), bbox)]
+
+        merged = merged.reset_index(drop=True)
+        merged["radius"] = 6 + 3 * np.sqrt(merged["count"].to_numpy())
+        merged["tooltip_html"] = (
+            "<b>" + merged["count"].astype(str) + f" × {html.escape(category)}</b>"
+            "<br/>zoom in for details"
+        )
+        return merged
+
+    def __len__(self):
+        return len(self.lon)
+
+    def rows(self, category: str, neighborhood_names=None):
+        """Row indices (a slice when possible) for one category."""
+        c = self.categories.index(category)
+        if neighborhood_names is None:
+            return slice(self.offsets[c, 0], self.offsets[c, -1])
+
+        codes = sorted(
+            self._neighborhood_code[n] for n in neighborhood_names
+            if n in self._neighborhood_code
+        )
+        if not codes:
+            return slice(0, 0)
+        starts = self.offsets[c, codes]
+        stops = self.offsets[c, [code + 1 for code in codes]]
+
+        # Adjacent neighborhoods merge into one run; a single run needs no gather.
+        if np.all(starts[1:] == stops[:-1]):
+            return slice(starts[0], stops[-1])
+        return np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)])
+
+    def center(self, categories, neighborhood_names=None):
+        """Mean (lat, lon) of the selected rows, for the initial map view."""
+        lon_sum, lat_sum, count = 0.0, 0.0, 0
+        for category in categories:
+            rows = self.rows(category, neighborhood_names)
+            lon_sum += float(self.lon[rows].sum(dtype=np.float64))
+            lat_sum += float(self.lat[rows].sum(dtype=np.float64))
+            count += len(self.lon[rows])
+        if count == 0:
+            return None
+        return lat_sum / count, lon_sum / count
+
+    def columns(self, category: str, neighborhood_names=None, bbox=None):
+        """(lon, lat, tooltip_html) arrays for one category, culled to `bbox`."""
+        rows = self.rows(category, neighborhood_names)
+        if bbox is not None:
+            if isinstance(rows, slice):
+                rows = np.arange(rows.start, rows.stop)
+            rows = rows[_in_bbox(self.lon[rows], self.lat[rows], bbox)]
+
+        if isinstance(rows, slice):
+            tooltips = self.tooltip_html.slice(rows.start, rows.stop - rows.start)
+        else:
+            tooltips = self.tooltip_html.take(pa.array(rows))
+        return self.lon[rows], self.lat[rows], tooltips.to_numpy(zero_copy_only=False)
+
+
+def _mercator_unit(lon, lat):
+    """Web Mercator coordinates scaled to [0, 1] (x east, y south)."""
+    x = (lon + 180.0) / 360.0
+    lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0
+    return x, y
+
+
+def _in_bbox(lon, lat, bbox):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+
+
+def viewport_bbox(lat: float, lon: float, zoom: float,
+                  width_px: int = MAP_WIDTH_PX, height_px: int = MAP_HEIGHT_PX):
+    """(min_lon, min_lat, max_lon, max_lat) visible in a map of the given size."""
+    world_px = TILE_PX * 2 ** zoom
+    x, y = _mercator_unit(np.float64(lon), np.float64(lat))
+    half_w, half_h = width_px / 2 / world_px, height_px / 2 / world_px
+
+    min_lon = (x - half_w) * 360.0 - 180.0
+    max_lon = (x + half_w) * 360.0 - 180.0
+    max_lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y - half_h)))))
+    min_lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + half_h)))))
+    return float(min_lon), float(min_lat), float(max_lon), float(max_lat)
+
+
+def dataset_columns(category: str, neighborhood_names, bbox, path: str):
+    """
+    Same (lon, lat, tooltip_html) as PoiStore.columns, read from the
+    partitioned POI dataset: only the category's partition and the row groups
+    overlapping `bbox` are touched.
+    """
+    from poi_dataset import read_pois
+
+    df = read_pois(
+        bbox, [category], columns=["name", "neighborhood_name", "lon", "lat"], path=path,
+        neighborhood_names=neighborhood_names,
+    )
+    tooltips = [_tooltip(n, category, h) for n, h in zip(df["name"], df["neighborhood_name"])]
+    return df["lon"].to_numpy(), df["lat"].to_numpy(), np.array(tooltips, dtype=object)
+
+
+def poi_layers(store: PoiStore, neighborhood_names, categories, bbox=None, zoom=None,
+               dataset_path: str = None):
+    """
+    One ScatterplotLayer per category, built by slicing the store.
+
+    With a viewport (`bbox`, `zoom`) only what is inside it is sent; below
+    RAW_POINT_MIN_ZOOM each category is sent as precomputed grid clusters.
+    Raw points in a viewport come from the partitioned dataset at
+    `dataset_path` when there is one (see dataset_columns).
+    Layers are layer_data.scatter_layer specs (binary attributes) for
+    layer_data.deck_page.
+    """
+    layers = []
+    for category in categories:
+        color = CATEGORY_COLORS.get(category, [120, 120, 120])
+        if zoom is not None and zoom < RAW_POINT_MIN_ZOOM:
+            data = store.clusters(category, int(zoom), neighborhood_names, bbox)
+            if data.empty:
+                continue
+            layers.append(
+                scatter_layer(
+                    f"poi-{category}-clusters",
+                    data["lon"].to_numpy(),
+                    data["lat"].to_numpy(),
+                    color + [180],
+                    radius=data["radius"].to_numpy(),
+                    tooltip_html=data["tooltip_html"].to_numpy(),
+                    radius_units="pixels",
+                    pickable=True,
+                )
+            )
+            continue
+
+        if dataset_path is not None and bbox is not None:
+            lon, lat, tooltip_html = dataset_columns(category, neighborhood_names, bbox, dataset_path)
+        else:
+            lon, lat, tooltip_html = store.columns(category, neighborhood_names, bbox)
+        if len(lon) == 0:
+            continue
+        layers.append(
+            scatter_layer(
+                f"poi-{category}",
+                lon,
+                lat,
+                color,
+                tooltip_html=tooltip_html,
+                get_radius=40,
+                radius_min_pixels=2,
+                pickable=True,
+            )
+        )
+    return layers
@@ -0,0 +1,114 @@
+# app/radius_cube.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from poi_store import CATEGORIES
+from store import STORE_VERSION, processed_dir
+
+RADIUS_CUBE_FILENAME = f"radius_cube_v{STORE_VERSION}.npz"
+
+# Catchments offered in the sidebar, metres
+RADII_M = [250, 500, 1000, 1500, 2000, 3000]
+
+
+def radius_cube_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), RADIUS_CUBE_FILENAME)
+
+
+def radius_counts(neighborhoods, pois, radii=RADII_M) -> np.ndarray:
+    """
+    POI counts within each radius of each neighborhood centroid.
+
+    Returns a uint32 cube of shape (neighborhoods, CATEGORIES, radii). One
+    R-tree query at the largest radius finds every (centroid, POI) pair; the
+    pair distances are binned against the sorted radii and a cumulative sum
+    turns the bins into "within r" counts, so all radii cost one pass.
+    """
+    import shapely
+
+    crs = neighborhoods.estimate_utm_crs()
+    centroids = neighborhoods.to_crs(crs).geometry.centroid.to_numpy()
+    pois = pois[pois["category"].isin(CATEGORIES)]
+    points = pois.to_crs(crs).geometry.centroid
+    cat_codes = pd.Categorical(pois["category"], categories=CATEGORIES).codes
+
+    radii = np.sort(np.asarray(radii, dtype=np.float64))
+    nbhd_idx, poi_idx = points.sindex.query(centroids, predicate="dwithin", distance=radii[-1])
+    dist = shapely.distance(centroids[nbhd_idx], points.to_numpy()[poi_idx])
+    rbin = np.searchsorted(radii, dist, side="left")
+
+    shape = (len(centroids), len(CATEGORIES), len(radii))
+    flat = np.ravel_multi_index((nbhd_idx, cat_codes[poi_idx], rbin), shape)
+    counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+    return np.cumsum(counts, axis=2).astype(np.uint32)
+
+
+def write_radius_cube(names, cube: np.ndarray, radii=RADII_M, path: str = None):
+    path = path or radius_cube_path()
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        names=np.asarray(names, dtype=str),
+        categories=np.asarray(CATEGORIES, dtype=str),
+        radii=np.sort(np.asarray(radii, dtype=np.float64)),
+        counts=cube,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+class RadiusCube:
+    """The (neighborhood, category, radius) count cube written by 04_build_store.py."""
+
+    def __init__(self, path: str = None):
+        with np.load(path or radius_cube_path()) as f:
+            self.names = f["names"]
+            self.categories = list(f["categories"])
+            self.radii = f["radii"]
+            self.counts = f["counts"]
+
+    def counts_at(self, radius_m: float) -> pd.DataFrame:
+        """Per-category counts within `radius_m` (must be one of the cube's radii)."""
+        r = int(np.searchsorted(self.radii, radius_m))
+        if r == len(self.radii) or self.radii[r] != radius_m:
+            raise ValueError(f"No counts for {radius_m} m; available: {self.radii.tolist()}")
+        return pd.DataFrame(self.counts[:, :, r], columns=self.categories, index=self.names)
+
+    def densities_at(self, radius_m: float) -> pd.DataFrame:
+        """
+        The per-km² columns of neighborhood_metrics.parquet, recomputed over
+        the circle of `radius_m` around each centroid instead of the polygon.
+        """
+        counts = self.counts_at(radius_m)
+        area_km2 = np.pi * (radius_m / 1000) ** 2
+        return pd.DataFrame(
+            {
+                "schools_per_km2": counts["school"] / area_km2,
+                "transit_per_km2": counts["transit"] / area_km2,
+                "amenities_per_km2": (counts["mall"] + counts["park"] + counts["hospital"]) / area_km2,
+            }
+        )
+
+
+def with_radius_densities(metrics: pd.DataFrame, cube: RadiusCube, radius_m: float) -> pd.DataFrame:
+    """
+    `metrics` with its density columns replaced by the `radius_m` catchment
+    ones. GTFS service density is per polygon, so it is dropped too and the
+    transit score falls back to stops within the radius.
+    """
+    densities = cube.densities_at(radius_m)
+    df = metrics.drop(columns=["transit_service_per_km2"], errors="ignore").copy()
+    names = metrics["neighborhood_name"].to_numpy(dtype=str)
+    if len(cube.names) == len(metrics) and (cube.names == names).all():
+        # Built in store row order; names are not unique, so go by position
+        for col in densities.columns:
+            df[col] = densities[col].to_numpy()
+        return df
+
+    densities = densities[~densities.index.duplicated(keep="first")]
+    for col in densities.columns:
+        df[col] = df["neighborhood_name"].map(densities[col]).fillna(0.0).to_numpy()
+    return df
@@ -0,0 +1,124 @@
+# app/sensitivity.py
+
+import numpy as np
+import pandas as pd
+
+from metrics import DEFAULT_WEIGHTS, SCORE_COLUMNS
+
+# Upper bound for the per-chunk (samples x neighborhoods) score/order arrays
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Sorting dominates the cost, so large sets are ranked under fewer samples:
+# at most this many (sample, neighborhood) ranks per call, but never fewer
+# than MIN_SAMPLES samples. The standard error of P(top-k) is at most
+# 0.5 / sqrt(samples), so +-0.01 (95%) at MIN_SAMPLES.
+MAX_RANKED = 20_000_000
+MIN_SAMPLES = 10_000
+
+# Ranks counted per neighborhood; worse ranks share one overflow bucket, so
+# the histogram is (n, RANK_BINS + 1) however many neighborhoods there are
+RANK_BINS = 500
+
+
+def sample_weights(n_samples: int, alpha=None, seed: int = 0) -> np.ndarray:
+    """
+    Dirichlet weight vectors, (n_samples, 4) float32, rows summing to 1.
+
+    alpha=None samples uniformly over all weightings; a scalar concentrates
+    samples around DEFAULT_WEIGHTS (larger = tighter).
+    """
+    rng = np.random.default_rng(seed)
+    if alpha is None:
+        a = np.ones(len(SCORE_COLUMNS))
+    elif np.isscalar(alpha):
+        a = alpha * DEFAULT_WEIGHTS
+    else:
+        a = np.asarray(alpha, dtype=np.float64)
+    return rng.dirichlet(a, size=n_samples).astype(np.float32)
+
+
+def rank_stability(scored: pd.DataFrame, n_samples: int = 100_000, top_k: int = 10,
+                   alpha=None, seed: int = 0) -> pd.DataFrame:
+    """
+    Re-score every neighborhood under `n_samples` random weightings and
+    summarize how stable each one's rank is.
+
+    `scored` is the output of compute_scores (or a filtered slice of it), so
+    the component scores keep the normalization of the full dataset.
+
+    Samples are processed in float32 chunks sized to CHUNK_BYTES, and each
+    neighborhood keeps a histogram of its first RANK_BINS ranks plus one
+    overflow bucket, so memory is O(n * RANK_BINS) whatever `n_samples` and
+    the set size are. Mean and sd come from running sums and are exact; the
+    5th/95th percentile ranks are exact when they fall within RANK_BINS and
+    NaN beyond it. `n_samples` is lowered to fit MAX_RANKED for large sets,
+    never below MIN_SAMPLES (the count used is in `attrs["n_samples"]`).
+    Exact score ties (identical component scores) are broken arbitrarily
+    per sample.
+
+    Returns one row per neighborhood: P(top-k), mean/sd rank, 5th/95th
+    percentile rank (rank 1 = best) and the rank under the current
+    composite score.
+    """
+    x = scored[SCORE_COLUMNS].to_numpy(dtype=np.float32)
+    n = x.shape[0]
+    if n == 0:
+        raise ValueError("rank_stability needs at least one neighborhood")
+    if n_samples < MIN_SAMPLES:
+        raise ValueError(
+            f"rank_stability needs at least {MIN_SAMPLES:,} samples for P(top-k) "
+            f"within +-0.01, got {n_samples:,}"
+        )
+    top_k = min(top_k, n)
+    if top_k > RANK_BINS:
+        raise ValueError(f"top_k must be at most {RANK_BINS} (RANK_BINS), got {top_k}")
+    n_samples = min(n_samples, max(MIN_SAMPLES, MAX_RANKED // n))
+    weights = sample_weights(n_samples, alpha, seed)
+
+    bins = min(n, RANK_BINS)
+    # ~5 live (chunk, n) 8-byte arrays per iteration (orders, held ranks, squares)
+    chunk = max(1, CHUNK_BYTES // (n * 8 * 5))
+    ranks = np.arange(n, dtype=np.float64)
+
+    # counts[i, r]: samples in which neighborhood i ranked r (0 = best), r < bins
+    counts = np.zeros(n * bins, dtype=np.int64)
+    rank_sum = np.zeros(n)
+    rank_sq_sum = np.zeros(n)
+    for start in range(0, n_samples, chunk):
+        w = weights[start:start + chunk]
+        # Samples as rows, so every sort runs over contiguous memory; the
+        # sort order itself says who holds each rank, no inverse needed
+        order = np.argsort(-(w @ x.T), axis=1)                  # (c, n)
+        counts += np.bincount((order[:, :bins] * bins + np.arange(bins)).ravel(), minlength=counts.size)
+        held = np.broadcast_to(ranks, order.shape).ravel()
+        rank_sum += np.bincount(order.ravel(), weights=held, minlength=n)
+        rank_sq_sum += np.bincount(order.ravel(), weights=held ** 2, minlength=n)
+    counts = counts.reshape(n, bins)
+
+    mean = rank_sum / n_samples
+    sd = np.sqrt(np.maximum(rank_sq_sum / n_samples - mean ** 2, 0))
+    cum = counts.cumsum(axis=1)
+
+    def rank_percentile(q):
+        # Smallest rank reached by at least a fraction q of the samples;
+        # NaN when that rank is in the overflow bucket
+        reached = (cum < q * n_samples).sum(axis=1)
+        return np.where(reached < bins, reached + 1.0, np.nan)
+
+    base_rank = np.empty(n, dtype=np.int64)
+    base_rank[np.argsort(-scored["composite_score"].to_numpy(), kind="stable")] = np.arange(1, n + 1)
+
+    out = pd.DataFrame(
+        {
+            "neighborhood_name": scored["neighborhood_name"].to_numpy(),
+            "p_top_k": cum[:, top_k - 1] / n_samples,
+            "mean_rank": mean + 1,
+            "rank_sd": sd,
+            "rank_p05": rank_percentile(0.05),
+            "rank_p95": rank_percentile(0.95),
+            "default_rank": base_rank,
+        }
+    )
+    out = out.sort_values(["p_top_k", "mean_rank"], ascending=[False, True]).reset_index(drop=True)
+    out.attrs["n_samples"] = n_samples
+    return out
@@ -0,0 +1,102 @@
+# app/snapshot.py
+
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from store import STORE_VERSION, align_geometry, processed_dir
+
+SNAPSHOT_FILENAME = f"app_snapshot_v{STORE_VERSION}.arrow"
+
+# Settings the snapshot's scores were computed with; other sidebar choices
+# fall back to scoring at runtime.
+SNAPSHOT_NORMALIZER = "min_max"
+
+# Display geometry only: ~1 m simplification and precision at city zoom.
+DISPLAY_TOLERANCE_DEG = 1e-5
+DISPLAY_DECIMALS = 5
+
+
+def snapshot_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), SNAPSHOT_FILENAME)
+
+
+def write_snapshot(scored, gdf, path: str = None):
+    """
+    Scored metrics plus map-ready geometry in one uncompressed Feather file.
+
+    Geometry is stored as GeoJSON text in EPSG:4326, already simplified, with
+    a centroid per row, so the app can draw the choropleth without parsing
+    GeoJSON files or importing geopandas.
+    """
+    import shapely
+
+    path = path or snapshot_path()
+    # By row position, like the store: names are not unique
+    geoms = align_geometry(scored, gdf.to_crs(epsg=4326)).to_numpy()
+    geoms = shapely.set_precision(
+        shapely.simplify(geoms, DISPLAY_TOLERANCE_DEG), 10.0 ** -DISPLAY_DECIMALS
+    )
+    centroids = shapely.centroid(geoms)
+
+    df = scored.copy()
+    df["display_geojson"] = shapely.to_geojson(geoms)
+    df["display_lon"] = shapely.get_x(centroids)
+    df["display_lat"] = shapely.get_y(centroids)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            b"cityscope_store_version": str(STORE_VERSION).encode(),
+            b"cityscope_normalizer": SNAPSHOT_NORMALIZER.encode(),
+        }
+    )
+    tmp_path = path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_snapshot(path: str = None):
+    """The snapshot as a DataFrame (memory-mapped read)."""
+    table = feather.read_table(path or snapshot_path(), memory_map=True)
+    version = (table.schema.metadata or {}).get(b"cityscope_store_version")
+    if version != str(STORE_VERSION).encode():
+        raise ValueError(f"Snapshot version {version!r} does not match {STORE_VERSION}")
+    return table.to_pandas()
+
+
+def display_rows(display, scores):
+    """
+    `scores` joined with their display columns, or None if `scores` are not
+    rows of the snapshot. Rows are matched on the index rather than the
+    name: every frame the app scores keeps the store's row order, and names
+    are not unique.
+    """
+    if not scores.index.isin(display.index).all():
+        return None
+    rows = display.loc[scores.index]
+    if not (rows["neighborhood_name"].to_numpy() == scores["neighborhood_name"].to_numpy()).all():
+        return None
+    return scores.join(rows.drop(columns="neighborhood_name"))
+
+
+def display_geojson(snapshot, names=None) -> dict:
+    """FeatureCollection of the display geometry with name and composite score."""
+    rows = snapshot if names is None else snapshot[snapshot["neighborhood_name"].isin(names)]
+    rows = rows[rows["display_geojson"].notna()]
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": json.loads(geom),
+                "properties": {"neighborhood_name": name, "composite_score": round(float(score), 2)},
+            }
+            for name, score, geom in zip(
+                rows["neighborhood_name"], rows["composite_score"], rows["display_geojson"]
+            )
+        ],
+    }
@@ -0,0 +1,132 @@
+# app/spatial_weights.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from metrics import DEFAULT_WEIGHTS, SCORE_COLUMNS
+from store import processed_dir
+
+WEIGHTS_FILENAME = "spatial_weights.npz"
+
+# Projected CRS for distance bands (metres)
+METRIC_CRS = "EPSG:3857"
+
+
+def weights_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), WEIGHTS_FILENAME)
+
+
+def neighbor_pairs(gdf, band_m: float = None):
+    """
+    (i, j) index pairs of neighboring polygons, i != j, from the R-tree.
+
+    Without `band_m` polygons are neighbors when they share any boundary
+    point (queen contiguity); with it, when they are within `band_m` metres.
+    """
+    if band_m is None:
+        geoms = gdf.geometry
+        i, j = geoms.sindex.query(geoms, predicate="intersects")
+    else:
+        geoms = gdf.to_crs(METRIC_CRS).geometry
+        i, j = geoms.sindex.query(geoms, predicate="dwithin", distance=band_m)
+    keep = i != j
+    return i[keep], j[keep]
+
+
+class SpatialWeights:
+    """
+    Row-standardized sparse weights in CSR form (indptr, indices, data).
+
+    Memory is O(number of neighbor pairs); nothing n x n is ever built.
+    """
+
+    def __init__(self, names, indptr, indices, data):
+        self.names = np.asarray(names)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+        self._rows = np.repeat(np.arange(len(self.names)), np.diff(self.indptr))
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_pairs(cls, names, i, j):
+        n = len(names)
+        order = np.lexsort((j, i))
+        i, j = i[order], j[order]
+        counts = np.bincount(i, minlength=n)
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        data = 1.0 / counts[i]
+        return cls(names, indptr, j, data)
+
+    @classmethod
+    def from_polygons(cls, gdf, band_m: float = None):
+        i, j = neighbor_pairs(gdf, band_m)
+        return cls.from_pairs(gdf["neighborhood_name"].to_numpy(), i, j)
+
+    @property
+    def islands(self) -> np.ndarray:
+        """Rows with no neighbors."""
+        return np.diff(self.indptr) == 0
+
+    def lag(self, x: np.ndarray) -> np.ndarray:
+        """
+        W @ x for x of shape (n,) or (n, k): the mean of each row's neighbors.
+        Islands keep their own value.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        x2 = x.reshape(len(self), -1)
+        out = np.empty_like(x2)
+        for c in range(x2.shape[1]):
+            out[:, c] = np.bincount(
+                self._rows, weights=self.data * x2[self.indices, c], minlength=len(self)
+            )
+        out[self.islands] = x2[self.islands]
+        return out.reshape(x.shape)
+
+    def save(self, path: str = None):
+        path = path or weights_path()
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path, names=self.names.astype(str), indptr=self.indptr,
+            indices=self.indices.astype(np.int32), data=self.data.astype(np.float32),
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = None):
+        with np.load(path or weights_path()) as f:
+            return cls(f["names"], f["indptr"], f["indices"], f["data"])
+
+
+def smooth_scores(scored: pd.DataFrame, weights: SpatialWeights, strength: float = 0.5,
+                  weights_vector=None) -> pd.DataFrame:
+    """
+    Add `<component>_lag` columns (neighbor mean) and blend them into the
+    component scores: (1 - strength) * own + strength * lag. The composite
+    score is recomputed from the blended components.
+
+    `scored` must have the rows the weights were built from, in that order.
+    """
+    # Rows are matched by position (the weights are built in store row
+    # order); names only check that, since they are not unique.
+    names = scored["neighborhood_name"].to_numpy(dtype=str)
+    if len(weights) != len(scored) or (weights.names != names).any():
+        raise ValueError("Spatial weights do not match the neighborhoods being scored; rebuild them")
+
+    df = scored.copy()
+    own = df[SCORE_COLUMNS].to_numpy(dtype=np.float64)
+    lagged = weights.lag(own)
+
+    blended = (1 - strength) * own + strength * lagged
+    for k, col in enumerate(SCORE_COLUMNS):
+        df[f"{col}_lag"] = lagged[:, k]
+        df[col] = blended[:, k]
+
+    w = DEFAULT_WEIGHTS if weights_vector is None else np.asarray(weights_vector, dtype=np.float64)
+    df["composite_score"] = blended @ (w / w.sum())
+    return df
@@ -0,0 +1,146 @@
+# app/store.py
+
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+DATA_DIR = "data"
+DATA_PROCESSED = "data/processed"
+
+# scripts/refresh_service.py builds releases under data/releases/<version>
+# and points data/current at the live one.
+RELEASES_DIR = os.path.join(DATA_DIR, "releases")
+CURRENT_POINTER = os.path.join(DATA_DIR, "current")
+
+# Bump when the column layout of the store changes so stale artifacts are rebuilt.
+STORE_VERSION = 1
+STORE_FILENAME = f"cityscope_store_v{STORE_VERSION}.arrow"
+
+GEOMETRY_COLUMN = "geometry_wkb"
+
+
+def processed_dir() -> str:
+    """
+    Directory holding the live processed data.
+
+    CITYSCOPE_DATA_PROCESSED wins (the pipeline scripts use it to build into a
+    staging directory), then the data/current release pointer, then the
+    plain data/processed directory.
+    """
+    override = os.environ.get("CITYSCOPE_DATA_PROCESSED")
+    if override:
+        return override
+    try:
+        with open(CURRENT_POINTER) as f:
+            release = f.read().strip()
+    except FileNotFoundError:
+        return DATA_PROCESSED
+    return os.path.join(RELEASES_DIR, release) if release else DATA_PROCESSED
+
+
+def store_path(base: str = None) -> str:
+    return os.path.join(base or processed_dir(), STORE_FILENAME)
+
+
+def align_geometry(metrics, gdf):
+    """
+    `gdf`'s geometry as a GeoSeries in `metrics` row order.
+
+    Step 03 writes both files from one frame, so rows normally line up and are
+    taken by position: names are not unique (two "West Point Grey" polygons),
+    so they are only joined on when the rows do not line up, and then must be
+    unambiguous.
+    """
+    import geopandas as gpd
+    import numpy as np
+
+    names = metrics["neighborhood_name"].to_numpy()
+    if len(gdf) == len(metrics) and (gdf["neighborhood_name"].to_numpy() == names).all():
+        return gdf.geometry.reset_index(drop=True)
+
+    rows = gdf[["neighborhood_name"]].reset_index(drop=True)
+    rows["_row"] = np.arange(len(rows))
+    row = metrics[["neighborhood_name"]].merge(
+        rows, on="neighborhood_name", how="left", validate="many_to_one"
+    )["_row"].to_numpy()
+    has = ~np.isnan(row)
+    geoms = np.full(len(row), None, dtype=object)
+    geoms[has] = gdf.geometry.to_numpy()[row[has].astype(np.int64)]
+    return gpd.GeoSeries(geoms, crs=gdf.crs)
+
+
+def write_store(metrics, gdf, path: str = None, crs: str = "EPSG:3857"):
+    """
+    Pack neighbourhood metrics and geometry into one Arrow IPC (Feather v2) file.
+
+    - Geometry is stored as a WKB binary column, not as shapely objects.
+    - The file is written uncompressed so it can be memory-mapped and read
+      without copying (compressed buffers would have to be inflated per process).
+    """
+    path = path or store_path()
+    df = metrics.copy()
+    df[GEOMETRY_COLUMN] = align_geometry(metrics, gdf).to_wkb().to_numpy()
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            b"cityscope_store_version": str(STORE_VERSION).encode(),
+            b"crs": crs.encode(),
+        }
+    )
+
+    tmp_path = path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_store(path: str = None) -> pa.Table:
+    """
+    Open the store read-only through a memory map.
+
+    Every session and worker process mapping the same file shares the same
+    physical pages, so adding a user costs (almost) no extra memory.
+    """
+    path = path or store_path()
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+
+    version = (table.schema.metadata or {}).get(b"cityscope_store_version")
+    if version != str(STORE_VERSION).encode():
+        raise ValueError(
+            f"{path} was built with store version {version!r}, expected {STORE_VERSION}"
+        )
+    return table
+
+
+def store_crs(table: pa.Table) -> str:
+    return (table.schema.metadata or {}).get(b"crs", b"EPSG:3857").decode()
+
+
+def metrics_frame(table: pa.Table):
+    """Tabular metrics without the geometry column (no WKB decoding)."""
+    return table.drop_columns([GEOMETRY_COLUMN]).to_pandas()
+
+
+def geometry_frame(table: pa.Table, names=None):
+    """
+    Decode geometry lazily, only for the requested neighbourhoods.
+
+    Returns a GeoDataFrame with `neighborhood_name` and `geometry`.
+    """
+    import geopandas as gpd
+    import pyarrow.compute as pc
+
+    sub = table.select(["neighborhood_name", GEOMETRY_COLUMN])
+    if names is not None:
+        sub = sub.filter(pc.is_in(sub["neighborhood_name"], value_set=pa.array(list(names))))
+
+    wkb = sub[GEOMETRY_COLUMN].to_numpy(zero_copy_only=False)
+    return gpd.GeoDataFrame(
+        {"neighborhood_name": sub["neighborhood_name"].to_pylist()},
+        geometry=gpd.GeoSeries.from_wkb(wkb),
+        crs=store_crs(table),
+    )
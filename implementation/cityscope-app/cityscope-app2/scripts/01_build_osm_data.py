@@ -6,10 +6,34 @@ import geopandas as gpd
 import pandas as pd
 from shapely.geometry import Polygon, MultiPolygon, box
 
-DATA_PROCESSED = "data/processed"
+DATA_PROCESSED = os.environ.get("CITYSCOPE_DATA_PROCESSED", "data/processed")
+
+# Alternative endpoints, e.g. scripts/overpass_replay.py for offline
+# benchmarks. OVERPASS_URL is the full interpreter URL, as in update_osm.py.
+OVERPASS_URL = os.environ.get("OVERPASS_URL")
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL")
 CITY_NAME = "Vancouver, British Columbia, Canada"  # study area
 
 
+def configure_endpoints():
+    """
+    Send OSMnx to OVERPASS_URL / NOMINATIM_URL when set.
+
+    With a stand-in server the local response cache is bypassed, so every
+    run really fetches and the timings are comparable.
+    """
+    if not OVERPASS_URL and not NOMINATIM_URL:
+        return
+    # OSMnx 2.x renamed the *_endpoint settings to *_url
+    new_names = hasattr(ox.settings, "overpass_url")
+    if OVERPASS_URL:
+        base = OVERPASS_URL.rsplit("/interpreter", 1)[0]
+        setattr(ox.settings, "overpass_url" if new_names else "overpass_endpoint", base)
+    if NOMINATIM_URL:
+        setattr(ox.settings, "nominatim_url" if new_names else "nominatim_endpoint", NOMINATIM_URL)
+    ox.settings.use_cache = False
+
+
 def get_city_boundary():
     """
     Download city boundary polygon in WGS84 (lat/lon).
@@ -232,6 +256,7 @@ def get_pois(polygon):
 
 def main():
     os.makedirs(DATA_PROCESSED, exist_ok=True)
+    configure_endpoints()
 
     # Get boundary in WGS84, fixed if invalid
     polygon = get_city_boundary()
@@ -2,8 +2,9 @@
 
 import os
 import geopandas as gpd
+import pandas as pd
 
-DATA_PROCESSED = "data/processed"
+DATA_PROCESSED = os.environ.get("CITYSCOPE_DATA_PROCESSED", "data/processed")
 
 
 def compute_amenity_counts():
@@ -42,6 +43,24 @@ def compute_amenity_counts():
         neighborhoods["mall"] + neighborhoods["park"] + neighborhoods["hospital"]
     ) / neighborhoods["area_km2"]
 
+    # Scheduled service levels from scripts/ingest_gtfs.py, when available
+    transit_service_path = os.path.join(DATA_PROCESSED, "transit_service.parquet")
+    if os.path.exists(transit_service_path):
+        service = pd.read_parquet(transit_service_path)
+        neighborhoods = neighborhoods.merge(
+            service, on="neighborhood_name", how="left", validate="many_to_one"
+        )
+        service_cols = [c for c in service.columns if c != "neighborhood_name"]
+        neighborhoods[service_cols] = neighborhoods[service_cols].fillna(0)
+
+    # Population-weighted nearest-amenity distances from scripts/compute_access.py
+    access_path = os.path.join(DATA_PROCESSED, "access_by_neighborhood.parquet")
+    if os.path.exists(access_path):
+        access = pd.read_parquet(access_path)
+        neighborhoods = neighborhoods.merge(
+            access, on="neighborhood_name", how="left", validate="many_to_one"
+        )
+
     # Save with geometry
     neighborhoods.to_file(
         os.path.join(DATA_PROCESSED, "neighborhoods_with_amenities.geojson"),
@@ -19,8 +19,16 @@ except ImportError:
     print("Or: python -m pip install openpyxl")
     sys.exit(1)
 
+from cmhc_workbook import load_rms
+
 DATA_RAW = "data/raw"
-DATA_PROCESSED = "data/processed"
+DATA_PROCESSED = os.environ.get("CITYSCOPE_DATA_PROCESSED", "data/processed")
+
+# Fewer listings than this and a neighborhood keeps the zone/CMA rent
+MIN_LISTINGS = 20
+
+# Share of a neighborhood's area that must fall in zones with a reported rent
+MIN_ZONE_COVERAGE = 0.5
 
 
 def load_vancouver_avg_rent_2024():
@@ -28,17 +36,23 @@ def load_vancouver_avg_rent_2024():
     Read CMHC Rental Market Survey (rmr-canada-2024-en.xlsx)
     and extract the 2024 average rent for Vancouver CMA
     from Table 6.0.
+
+    The workbook is converted to tidy Parquet once per content hash
+    (see cmhc_workbook.py); this reads only the Vancouver CMA row groups.
     """
     path = os.path.join(DATA_RAW, "rmr-canada-2024-en.xlsx")
-    xls = pd.ExcelFile(path)
-    df = xls.parse("Table 6.0", header=None)
-
-    # Find the row for "Vancouver CMA" in first column
-    mask = df[0].astype(str).str.contains("Vancouver CMA", na=False)
-    row = df[mask].iloc[0]
-
-    # Column 4 in this table is the 2024 average rent for apartment structures
-    avg_rent_2024 = float(row[4])
+    rows = load_rms(path, geography="Vancouver CMA", table="Table 6.0")
+
+    # Turnover units, average rent for apartment structures, Oct-24 survey
+    match = rows[
+        rows["measure"].str.startswith("Turnover units")
+        & rows["measure"].str.contains("Average rent", regex=False)
+        & (rows["period"] == "Oct-24")
+    ]
+    if match.empty or pd.isna(match["value"].iloc[0]):
+        raise ValueError("Vancouver CMA Oct-24 average rent not found in Table 6.0")
+
+    avg_rent_2024 = float(match["value"].iloc[0])
     return avg_rent_2024
 
 
@@ -50,6 +64,28 @@ def merge_rent():
     avg_rent = load_vancouver_avg_rent_2024()
     neighborhoods["avg_rent"] = avg_rent  # same CMA average for all neighborhoods
 
+    # Survey-zone rents interpolated onto neighborhoods (scripts/interpolate_zone_rents.py)
+    zone_path = os.path.join(DATA_PROCESSED, "zone_rents_by_neighborhood.parquet")
+    if os.path.exists(zone_path):
+        zone_rents = pd.read_parquet(zone_path)
+        zone_rents = zone_rents[
+            (zone_rents["bedroom_type"] == "all") & (zone_rents["coverage"] >= MIN_ZONE_COVERAGE)
+        ].set_index("neighborhood_name")["avg_rent"]
+        interpolated = neighborhoods["neighborhood_name"].map(zone_rents)
+        neighborhoods["avg_rent"] = interpolated.fillna(neighborhoods["avg_rent"])
+        print(f"Using survey-zone rents for {interpolated.notna().sum()} neighborhoods")
+
+    # Neighborhood medians from scripts/ingest_listings.py, where there are enough listings
+    listings_path = os.path.join(DATA_PROCESSED, "rent_by_neighborhood.parquet")
+    if os.path.exists(listings_path):
+        rents = pd.read_parquet(listings_path)
+        rents = rents[
+            (rents["bedroom_type"] == "all") & (rents["listings"] >= MIN_LISTINGS)
+        ].set_index("neighborhood_name")["rent_median"]
+        listed = neighborhoods["neighborhood_name"].map(rents)
+        neighborhoods["avg_rent"] = listed.fillna(neighborhoods["avg_rent"])
+        print(f"Using listing medians for {listed.notna().sum()} neighborhoods")
+
     neighborhoods.to_file(
         os.path.join(DATA_PROCESSED, "neighborhoods_full.geojson"),
         driver="GeoJSON",
@@ -0,0 +1,122 @@
+# scripts/04_build_store.py
+
+import argparse
+import os
+import sys
+
+import geopandas as gpd
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from density import build_density_surfaces, density_path  # noqa: E402
+from metrics import compute_scores  # noqa: E402
+from name_index import build_name_index, name_index_path, write_name_index  # noqa: E402
+from poi_dataset import poi_dataset_path, poi_table, write_poi_dataset  # noqa: E402
+from poi_store import build_poi_frame, poi_store_path, write_poi_store  # noqa: E402
+from radius_cube import radius_counts, radius_cube_path, write_radius_cube  # noqa: E402
+from snapshot import SNAPSHOT_NORMALIZER, snapshot_path, write_snapshot  # noqa: E402
+from spatial_weights import SpatialWeights, weights_path  # noqa: E402
+from store import align_geometry, store_path, write_store  # noqa: E402
+
+DATA_PROCESSED = os.environ.get("CITYSCOPE_DATA_PROCESSED", "data/processed")
+
+
+# Everything build_store writes, in build order; --only picks a subset
+ARTIFACTS = [
+    "store", "snapshot", "poi_store", "poi_dataset", "density", "name_index", "radius_cube",
+    "spatial_weights",
+]
+
+
+def build_store(band_m: float = None, only=None):
+    """
+    Package the processed outputs of steps 01-03 into the single versioned,
+    memory-mappable artifact that the Streamlit app reads.
+
+    `only` limits the build to some of ARTIFACTS (scripts/update_osm.py
+    rebuilds just the ones its POI changes reach).
+    """
+    only = set(ARTIFACTS if only is None else only)
+    unknown = only - set(ARTIFACTS)
+    if unknown:
+        raise ValueError(f"Unknown artifacts {sorted(unknown)}; choose from {ARTIFACTS}")
+
+    metrics = pd.read_parquet(os.path.join(DATA_PROCESSED, "neighborhood_metrics.parquet"))
+    gdf = gpd.read_file(os.path.join(DATA_PROCESSED, "neighborhoods_full.geojson"))
+
+    if "store" in only:
+        path = write_store(metrics, gdf, store_path(DATA_PROCESSED), crs=gdf.crs.to_string())
+        print(f"Saved {path} ({len(metrics)} neighborhoods)")
+
+    if "snapshot" in only:
+        scored = compute_scores.uncached(metrics, normalizer=SNAPSHOT_NORMALIZER)
+        path = write_snapshot(scored, gdf, snapshot_path(DATA_PROCESSED))
+        print(f"Saved {path} (scored metrics and display geometry for fast startup)")
+
+    pois = None
+    if only & {"poi_store", "poi_dataset", "density", "name_index", "radius_cube"}:
+        pois = gpd.read_file(os.path.join(DATA_PROCESSED, "pois.geojson"))
+
+    if "poi_store" in only:
+        poi_df = build_poi_frame(pois, gdf)
+        path = write_poi_store(poi_df, poi_store_path(DATA_PROCESSED))
+        print(f"Saved {path} ({len(poi_df)} POIs)")
+
+    if only & {"poi_dataset", "density"}:
+        poi_rows = poi_table(pois, gdf)
+    if "poi_dataset" in only:
+        path = write_poi_dataset(poi_rows, poi_dataset_path(DATA_PROCESSED))
+        print(f"Saved {path} (partitioned by city/category, Hilbert-sorted)")
+
+    if "density" in only:
+        path = build_density_surfaces(
+            poi_rows["lon"].to_numpy(), poi_rows["lat"].to_numpy(), poi_rows["category"].to_numpy(),
+            gdf.to_crs(epsg=4326).total_bounds, density_path(DATA_PROCESSED),
+        )
+        print(f"Saved {path} (kernel density surfaces per category)")
+
+    # Same rows, in the same order, as the metrics (and so the store): the
+    # app applies the cube and weights by row position
+    ordered = gpd.GeoDataFrame(
+        {"neighborhood_name": metrics["neighborhood_name"].to_numpy()},
+        geometry=align_geometry(metrics, gdf),
+    )
+
+    if "name_index" in only:
+        arrays = build_name_index(pois, ordered)
+        path = write_name_index(arrays, name_index_path(DATA_PROCESSED))
+        print(f"Saved {path} ({len(arrays['vocab'])} tokens over {len(arrays['name'])} named POIs)")
+
+    if "radius_cube" in only:
+        cube = radius_counts(ordered, pois)
+        path = write_radius_cube(ordered["neighborhood_name"], cube, path=radius_cube_path(DATA_PROCESSED))
+        print(f"Saved {path} (POI counts for {cube.shape[2]} radii)")
+
+    if "spatial_weights" in only:
+        weights = SpatialWeights.from_polygons(ordered, band_m=band_m)
+        path = weights.save(weights_path(DATA_PROCESSED))
+        kind = "contiguity" if band_m is None else f"{band_m:g} m distance band"
+        print(f"Saved {path} ({kind}, {len(weights.indices)} neighbor pairs, "
+              f"{int(weights.islands.sum())} islands)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the app's store files.")
+    parser.add_argument(
+        "--band-m",
+        type=float,
+        default=None,
+        help="Spatial weights by distance band (metres) instead of shared boundaries.",
+    )
+    parser.add_argument(
+        "--only",
+        default=None,
+        help=f"Comma-separated subset of: {', '.join(ARTIFACTS)}.",
+    )
+    args = parser.parse_args()
+    build_store(band_m=args.band_m, only=args.only.split(",") if args.only else None)
+
+
+if __name__ == "__main__":
+    main()
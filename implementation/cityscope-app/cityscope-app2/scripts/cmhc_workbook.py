@@ -0,0 +1,236 @@
+# scripts/cmhc_workbook.py
+
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+DATA_RAW = "data/raw"
+DATA_INTERIM = "data/interim/cmhc"
+
+# Cells next to a value that carry CMHC's reliability grade or change marker
+FLAG_TOKENS = {"a", "b", "c", "d", "**", "++", "-", "↑", "↓", "--"}
+SUPPRESSED = {"**", "++", "--", "x", "..", "n/a"}
+
+# Survey periods read "Oct-24"; year-over-year headers "Oct-23 to Oct-24"
+PERIOD_RE = re.compile(r"([A-Z][a-z]{2})-(\d{2})")
+
+# Bumped when parsing changes, so stale conversions are not reused
+CONVERTER_VERSION = 2
+
+TIDY_COLUMNS = [
+    "survey", "table", "geography", "geography_level", "bedroom_type",
+    "measure", "period", "value", "quality",
+]
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _clean(text) -> str:
+    # openpyxl hands date headers back as datetime (pd.Timestamp is a subclass)
+    if isinstance(text, (datetime.date, datetime.datetime)):
+        return text.strftime("%b-%y")
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return ""
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def _period(value) -> str:
+    # Some period headers come through as raw Excel date serials
+    if isinstance(value, (int, float)) and 30000 < value < 60000:
+        return (pd.Timestamp("1899-12-30") + pd.Timedelta(days=int(value))).strftime("%b-%y")
+    return _clean(value)
+
+
+def period_date(period: str) -> pd.Timestamp:
+    """
+    Month a period label ends in, for chronological sorting ("Oct-23 to
+    Oct-24" -> 2024-10-01); NaT for headers that are not periods.
+    """
+    found = PERIOD_RE.findall(period or "")
+    if not found:
+        return pd.NaT
+    month, year = found[-1]
+    return pd.to_datetime(f"{month}-{year}", format="%b-%y", errors="coerce")
+
+
+def _geography_level(name: str) -> str:
+    if name == "Total":
+        return "total"
+    # Ottawa-Gatineau is reported as a whole and per province
+    if re.search(r" CMA \(.+ part\)$", name):
+        return "cma_part"
+    if name.endswith(" CMA"):
+        return "cma"
+    if name.endswith(" CA"):
+        return "ca"
+    if name.startswith("Canada"):
+        return "canada"
+    if name.endswith("10,000+"):
+        return "province"
+    return "zone"
+
+
+def _bedroom_type(text: str) -> str:
+    lowered = text.lower()
+    for label, key in [
+        ("bachelor", "bachelor"),
+        ("1 bedroom", "1br"), ("one bedroom", "1br"),
+        ("2 bedroom", "2br"), ("two bedroom", "2br"),
+        ("3 bedroom", "3br+"), ("three bedroom", "3br+"),
+    ]:
+        if label in lowered:
+            return key
+    return "all"
+
+
+def _to_number(values: pd.Series) -> pd.Series:
+    text = values.map(_clean).str.replace(",", "", regex=False).str.replace("$", "", regex=False)
+    return pd.to_numeric(text.where(~text.isin(SUPPRESSED)), errors="coerce")
+
+
+def tidy_sheet(raw: pd.DataFrame, table: str, survey: str) -> pd.DataFrame:
+    """
+    Turn one CMHC table (title rows, multi-row merged headers, value + grade
+    column pairs) into long rows: one per geography, measure and period.
+    """
+    first_col = raw[0].map(_clean)
+    header_rows = first_col.index[first_col.isin(["Centre", "Zone", "Geography"])]
+    if len(header_rows) == 0:
+        return pd.DataFrame(columns=TIDY_COLUMNS)
+    period_row = header_rows[0]
+
+    title = " ".join(t for t in first_col.iloc[:period_row] if t)
+
+    # Band headers: the contiguous block of rows above the "Centre" row that
+    # have labels outside column A. Merged cells only fill their first column.
+    band_rows = []
+    r = period_row - 1
+    while r >= 0 and raw.iloc[r, 1:].notna().any():
+        band_rows.insert(0, r)
+        r -= 1
+    bands = raw.iloc[band_rows, 1:].apply(lambda row: row.ffill(), axis=1)
+    periods = raw.iloc[period_row, 1:].map(_period)
+
+    body = raw.iloc[period_row + 1:]
+    body = body[body[0].map(_clean) != ""]
+
+    # Grade/marker columns: every non-empty cell is a flag token
+    cells = body.iloc[:, 1:].map(_clean)
+    non_empty = cells.where(cells != "")
+    is_flag = non_empty.apply(lambda col: col.dropna().isin(FLAG_TOKENS).all() and col.notna().any())
+    is_value = non_empty.notna().any() & ~is_flag
+
+    frames = []
+    columns = list(raw.columns[1:])
+    for pos, col in enumerate(columns):
+        if not is_value[col]:
+            continue
+        measure = " | ".join(
+            dict.fromkeys(_clean(v) for v in bands[col] if _clean(v))
+        )
+        flag_col = columns[pos + 1] if pos + 1 < len(columns) and is_flag[columns[pos + 1]] else None
+        values = _to_number(body[col])
+        frames.append(
+            pd.DataFrame(
+                {
+                    "geography": body[0].map(_clean).to_numpy(),
+                    "measure": measure,
+                    "period": periods[col],
+                    "value": values.to_numpy(),
+                    "quality": cells[flag_col].to_numpy() if flag_col is not None else "",
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=TIDY_COLUMNS)
+
+    tidy = pd.concat(frames, ignore_index=True)
+    tidy = tidy[tidy["value"].notna() | tidy["quality"].isin(SUPPRESSED)]
+    tidy["survey"] = survey
+    tidy["table"] = table
+    tidy["geography_level"] = tidy["geography"].map(_geography_level)
+    tidy["bedroom_type"] = [_bedroom_type(f"{title} {m}") for m in tidy["measure"]]
+    return tidy[TIDY_COLUMNS]
+
+
+def convert_workbook(path: str) -> str:
+    """
+    Parse every table sheet of a CMHC workbook once into tidy Parquet.
+
+    Output goes to data/interim/cmhc/<workbook>-<sha256[:12]>-v<version>/, so a
+    new survey release (different bytes) converts into a fresh directory
+    automatically and an unchanged workbook is never parsed twice.
+    """
+    digest = file_sha256(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    out_dir = os.path.join(DATA_INTERIM, f"{stem}-{digest[:12]}-v{CONVERTER_VERSION}")
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        return out_dir
+
+    os.makedirs(out_dir, exist_ok=True)
+    sheets = pd.read_excel(path, sheet_name=None, header=None)
+    tables = []
+    for name, raw in sheets.items():
+        if not name.lower().startswith("table "):
+            continue
+        raw.columns = range(raw.shape[1])
+        tidy = tidy_sheet(raw, name, survey=stem)
+        print(f"  {name}: {len(tidy)} rows")
+        if len(tidy):
+            tables.append(tidy)
+
+    tidy = pd.concat(tables, ignore_index=True)
+    # Sorted by geography with small row groups: a geography filter reads
+    # only the row groups whose min/max statistics cover it.
+    tidy = tidy.sort_values(["geography", "table", "measure", "period"]).reset_index(drop=True)
+    tidy.to_parquet(os.path.join(out_dir, "rms.parquet"), index=False, row_group_size=2048)
+
+    with open(manifest_path, "w") as f:
+        json.dump(
+            {"source": os.path.basename(path), "sha256": digest, "rows": len(tidy),
+             "tables": sorted(tidy["table"].unique().tolist())},
+            f,
+            indent=2,
+        )
+    print(f"Converted {path} -> {out_dir}")
+    return out_dir
+
+
+def converted_path(path: str) -> str:
+    return os.path.join(convert_workbook(path), "rms.parquet")
+
+
+def load_rms(path: str, geography=None, table=None, columns=None) -> pd.DataFrame:
+    """Tidy rows for one workbook, reading only the row groups that match."""
+    filters = []
+    if geography is not None:
+        filters.append(("geography", "==", geography))
+    if table is not None:
+        filters.append(("table", "==", table))
+    return pd.read_parquet(converted_path(path), columns=columns, filters=filters or None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert CMHC Rental Market Survey workbooks to Parquet.")
+    parser.add_argument("paths", nargs="*", help="Workbooks (default: data/raw/rmr-*.xlsx)")
+    args = parser.parse_args()
+    for path in args.paths or sorted(glob.glob(os.path.join(DATA_RAW, "rmr-*.xlsx"))):
+        convert_workbook(path)
+
+
+if __name__ == "__main__":
+    main()
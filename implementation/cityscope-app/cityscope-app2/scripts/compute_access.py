@@ -0,0 +1,205 @@
+# scripts/compute_access.py
+
+import argparse
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+DATA_PROCESSED = os.environ.get("CITYSCOPE_DATA_PROCESSED", "data/processed")
+
+# Optional population layer: polygons (e.g. census dissemination blocks)
+# with a population column. People are assumed evenly spread within each.
+POPULATION_PATH = os.path.join("data", "raw", "population_blocks.geojson")
+POPULATION_COL = "population"
+
+CATEGORIES = ["school", "transit", "mall", "park", "hospital"]
+
+SAMPLE_SPACING_M = 100
+PERCENTILES = [50, 90]
+
+# Besides the nearest facility, the mean distance to the k nearest: a
+# resident with three schools or stations nearby has real choice, one with
+# a single nearby facility does not.
+NEAREST_K = 3
+
+OUTPUT_PATH = os.path.join(DATA_PROCESSED, "access_by_neighborhood.parquet")
+
+
+def sample_points(neighborhoods: gpd.GeoDataFrame, spacing: float):
+    """
+    Regular grid points inside each polygon (metric CRS).
+
+    One grid over the whole extent, assigned to polygons with a single
+    R-tree `within` query. Polygons too small to catch a grid point get
+    their representative point, so every neighborhood has at least one.
+    Returns (x, y, neighborhood row).
+    """
+    minx, miny, maxx, maxy = neighborhoods.total_bounds
+    gx, gy = np.meshgrid(
+        np.arange(minx + spacing / 2, maxx, spacing),
+        np.arange(miny + spacing / 2, maxy, spacing),
+    )
+    gx, gy = gx.ravel(), gy.ravel()
+    points = shapely.points(gx, gy)
+    point_idx, nbhd_idx = neighborhoods.sindex.query(points, predicate="within")
+    # A point on a shared edge belongs to the first polygon only
+    point_idx, first = np.unique(point_idx, return_index=True)
+    nbhd_idx = nbhd_idx[first]
+
+    empty = np.setdiff1d(np.arange(len(neighborhoods)), nbhd_idx)
+    rep = shapely.point_on_surface(neighborhoods.geometry.to_numpy()[empty])
+    x = np.concatenate([gx[point_idx], shapely.get_x(rep)])
+    y = np.concatenate([gy[point_idx], shapely.get_y(rep)])
+    return x, y, np.concatenate([nbhd_idx, empty])
+
+
+def population_weights(x, y, crs, path: str = POPULATION_PATH) -> np.ndarray:
+    """
+    Persons per sample point: each block's population split evenly over the
+    sample points falling in it. Without a population layer, all ones.
+    """
+    if not os.path.exists(path):
+        return np.ones(len(x))
+
+    blocks = gpd.read_file(path).to_crs(crs)
+    point_idx, block_idx = blocks.sindex.query(shapely.points(x, y), predicate="within")
+    point_idx, first = np.unique(point_idx, return_index=True)
+    block_idx = block_idx[first]
+
+    per_block = np.bincount(block_idx, minlength=len(blocks))
+    population = blocks[POPULATION_COL].to_numpy(dtype=np.float64)
+    weights = np.zeros(len(x))
+    weights[point_idx] = population[block_idx] / per_block[block_idx]
+    return weights
+
+
+def nearest_distance(x, y, pois: gpd.GeoSeries) -> np.ndarray:
+    """Distance (m) from every sample point to its nearest POI, in one tree query."""
+    if len(pois) == 0:
+        return np.full(len(x), np.nan)
+    (sample_idx, _), dist = pois.sindex.nearest(
+        shapely.points(x, y), return_distance=True, return_all=False
+    )
+    out = np.full(len(x), np.nan)
+    out[sample_idx] = dist
+    return out
+
+
+def nearest_k_distances(x, y, pois: gpd.GeoSeries, k: int, chunk: int = 2048) -> np.ndarray:
+    """
+    (n_points, k) distances (m) from every sample point to its k nearest
+    POIs, nearest first; columns past the number of POIs stay NaN.
+
+    If q is a point's nearest POI, q and its own k - 1 nearest POIs are k
+    POIs within d(point, q) + d(q, its (k-1)-th nearest), so one batched
+    R-tree `dwithin` query over that radius holds the exact k nearest. The
+    POI-to-POI distances are brute force, `chunk` POIs at a time.
+    """
+    out = np.full((len(x), k), np.nan)
+    k = min(k, len(pois))
+    if k == 0:
+        return out
+    px, py = shapely.get_x(pois.to_numpy()), shapely.get_y(pois.to_numpy())
+    points = shapely.points(x, y)
+
+    reach = np.empty(len(pois))
+    for start in range(0, len(pois), chunk):
+        d = np.hypot(px[start:start + chunk, None] - px, py[start:start + chunk, None] - py)
+        # Column 0 of each sorted row is the POI itself
+        reach[start:start + chunk] = np.partition(d, k - 1, axis=1)[:, k - 1]
+
+    (sample_idx, poi_idx), dist = pois.sindex.nearest(points, return_distance=True, return_all=False)
+    radius = np.empty(len(x))
+    radius[sample_idx] = dist + reach[poi_idx]
+
+    sample_idx, poi_idx = pois.sindex.query(points, predicate="dwithin", distance=radius)
+    dist = np.hypot(px[poi_idx] - x[sample_idx], py[poi_idx] - y[sample_idx])
+
+    # Sorted by (point, distance), the j-th entry of a point is its j-th nearest
+    order = np.lexsort((dist, sample_idx))
+    sample_idx, dist = sample_idx[order], dist[order]
+    j = np.arange(len(sample_idx)) - np.searchsorted(sample_idx, sample_idx)
+    first_k = j < k
+    out[sample_idx[first_k], j[first_k]] = dist[first_k]
+    return out
+
+
+def weighted_percentiles(values, weights, groups, n_groups: int, percentiles) -> np.ndarray:
+    """
+    Weighted percentiles of `values` within each group, all groups at once.
+
+    Sorting by (group, value) and normalizing the cumulative weight within
+    each group to (0, 1] makes `group + fraction` one increasing key, so every
+    percentile of every group is a single searchsorted.
+    """
+    ok = ~np.isnan(values) & (weights > 0)
+    values, weights, groups = values[ok], weights[ok], groups[ok]
+
+    order = np.lexsort((values, groups))
+    values, weights, groups = values[order], weights[order], groups[order]
+    totals = np.bincount(groups, weights=weights, minlength=n_groups)
+    before = np.concatenate([[0.0], np.cumsum(totals)[:-1]])
+    frac = (np.cumsum(weights) - before[groups]) / totals[groups]
+    key = groups + frac
+
+    out = np.full((n_groups, len(percentiles)), np.nan)
+    has = totals > 0
+    for k, q in enumerate(percentiles):
+        pos = np.searchsorted(key, np.arange(n_groups) + q / 100, side="left")
+        out[has, k] = values[np.minimum(pos[has], len(values) - 1)]
+    return out
+
+
+def compute_access(spacing: float = SAMPLE_SPACING_M, k: int = NEAREST_K):
+    neighborhoods = gpd.read_file(os.path.join(DATA_PROCESSED, "neighborhoods.geojson"))
+    crs = neighborhoods.estimate_utm_crs()
+    neighborhoods = neighborhoods.to_crs(crs).reset_index(drop=True)
+    pois = gpd.read_file(os.path.join(DATA_PROCESSED, "pois.geojson")).to_crs(crs)
+    pois["geometry"] = pois.geometry.centroid
+
+    x, y, nbhd = sample_points(neighborhoods, spacing)
+    weights = population_weights(x, y, crs)
+    print(f"{len(x)} sample points across {len(neighborhoods)} neighborhoods")
+
+    # One row per name: polygons sharing a name (two "West Point Grey") pool
+    # their sample points, so the metrics merge on the name stays one-to-one
+    codes, names = pd.factorize(neighborhoods["neighborhood_name"])
+    groups, n_groups = codes[nbhd], len(names)
+
+    out = pd.DataFrame({"neighborhood_name": names})
+    distances = []
+    for category in CATEGORIES:
+        dist_k = nearest_k_distances(x, y, pois.geometry[pois["category"] == category], k)
+        distances.append(dist_k[:, 0])
+        profiles = {"": dist_k[:, 0]}
+        if k > 1:
+            # Over however many POIs exist when a category has fewer than k
+            has = ~np.isnan(dist_k[:, 0])
+            profiles[f"_k{k}"] = np.full(len(x), np.nan)
+            profiles[f"_k{k}"][has] = np.nanmean(dist_k[has], axis=1)
+        for suffix, dist in profiles.items():
+            pct = weighted_percentiles(dist, weights, groups, n_groups, PERCENTILES)
+            for i, q in enumerate(PERCENTILES):
+                out[f"{category}{suffix}_p{q}_m"] = pct[:, i]
+
+    # Summary access metric: typical resident's mean distance over categories
+    mean_dist = np.nanmean(np.column_stack(distances), axis=1)
+    out["access_p50_m"] = weighted_percentiles(mean_dist, weights, groups, n_groups, [50])[:, 0]
+
+    out.to_parquet(OUTPUT_PATH, index=False)
+    print(f"Saved {OUTPUT_PATH}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Population-weighted distance to the nearest amenities.")
+    parser.add_argument("--spacing", type=float, default=SAMPLE_SPACING_M, help="Sample grid spacing (m).")
+    parser.add_argument("--k", type=int, default=NEAREST_K, help="Also profile the mean distance to the k nearest.")
+    args = parser.parse_args()
+    compute_access(spacing=args.spacing, k=args.k)
+
+
+if __name__ == "__main__":
+    main()
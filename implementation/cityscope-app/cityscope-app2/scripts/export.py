@@ -0,0 +1,46 @@
+# scripts/export.py
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from export import FORMATS, export, neighborhood_batches, poi_batches  # noqa: E402
+from metrics import NORMALIZERS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export scored neighborhoods or filtered POIs, written in batches from the store."
+    )
+    parser.add_argument("what", choices=["neighborhoods", "pois"])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="Defaults to the --out extension (.parquet, .gpkg, .ndjson).")
+    parser.add_argument("--weights", type=float, nargs=4, default=None,
+                        metavar=("AFFORD", "TRANSIT", "SCHOOLS", "AMENITIES"))
+    parser.add_argument("--normalizer", choices=sorted(NORMALIZERS), default="min_max")
+    parser.add_argument("--bbox", type=float, nargs=4, default=None,
+                        metavar=("MIN_LON", "MIN_LAT", "MAX_LON", "MAX_LAT"))
+    parser.add_argument("--categories", nargs="+", default=None)
+    parser.add_argument("--city", default=None)
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.out)[1].lstrip(".")
+    if fmt not in FORMATS:
+        parser.error(f"Cannot infer a format from {args.out!r}; pass --format")
+
+    start = time.perf_counter()
+    if args.what == "neighborhoods":
+        batches, crs = neighborhood_batches(weights=args.weights, normalizer=args.normalizer)
+    else:
+        batches, crs = poi_batches(bbox=args.bbox, categories=args.categories, city=args.city)
+    n_batches = export(fmt, batches, crs, args.out, layer=args.what)
+    print(f"Wrote {args.what} to {args.out} ({fmt}, {n_batches} batches) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
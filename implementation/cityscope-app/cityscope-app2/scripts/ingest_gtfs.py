@@ -0,0 +1,202 @@
+# scripts/ingest_gtfs.py
+
+import argparse
+import os
+from datetime import date
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+DATA_PROCESSED = os.environ.get("CITYSCOPE_DATA_PROCESSED", "data/processed")
+
+# TransLink GTFS feed (the repo ships stops.txt only; drop the full feed here)
+GTFS_DIR = os.environ.get("CITYSCOPE_GTFS_DIR", "../apps/api/data/real")
+
+# stop_times.txt runs to hundreds of MB; it is never loaded whole.
+CHUNK_ROWS = 1_000_000
+
+# name -> [start hour, end hour)
+TIME_BANDS = {
+    "night": (0, 6),
+    "am_peak": (6, 9),
+    "midday": (9, 15),
+    "pm_peak": (15, 19),
+    "evening": (19, 24),
+}
+DAYTIME_BANDS = ["am_peak", "midday", "pm_peak"]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def load_stops(gtfs_dir: str) -> pd.DataFrame:
+    stops = pd.read_csv(
+        os.path.join(gtfs_dir, "stops.txt"),
+        usecols=lambda c: c in {"stop_id", "stop_lat", "stop_lon", "location_type"},
+        dtype={"stop_id": str},
+    )
+    # Only boarding points (0 / blank); stations and entrances would double count.
+    if "location_type" in stops.columns:
+        stops = stops[stops["location_type"].fillna(0).astype(int) == 0]
+    return stops.reset_index(drop=True)
+
+
+def active_service_ids(gtfs_dir: str, on: date):
+    """
+    service_ids running on `on` per calendar.txt / calendar_dates.txt.
+    None means "no calendar in the feed": keep every trip.
+    """
+    calendar_path = os.path.join(gtfs_dir, "calendar.txt")
+    dates_path = os.path.join(gtfs_dir, "calendar_dates.txt")
+    if not os.path.exists(calendar_path) and not os.path.exists(dates_path):
+        return None
+
+    day = int(on.strftime("%Y%m%d"))
+    services = set()
+    if os.path.exists(calendar_path):
+        cal = pd.read_csv(calendar_path, dtype={"service_id": str})
+        running = (
+            (cal[WEEKDAYS[on.weekday()]] == 1)
+            & (cal["start_date"] <= day)
+            & (cal["end_date"] >= day)
+        )
+        services = set(cal.loc[running, "service_id"])
+
+    if os.path.exists(dates_path):
+        exc = pd.read_csv(dates_path, dtype={"service_id": str})
+        exc = exc[exc["date"] == day]
+        services |= set(exc.loc[exc["exception_type"] == 1, "service_id"])
+        services -= set(exc.loc[exc["exception_type"] == 2, "service_id"])
+    return services
+
+
+def load_trip_ids(gtfs_dir: str, services) -> pd.Index:
+    trips = pd.read_csv(
+        os.path.join(gtfs_dir, "trips.txt"),
+        usecols=["trip_id", "service_id"],
+        dtype=str,
+    )
+    if services is not None:
+        trips = trips[trips["service_id"].isin(services)]
+    return pd.Index(trips["trip_id"].unique())
+
+
+def count_departures(gtfs_dir: str, stops: pd.DataFrame, trip_ids: pd.Index) -> np.ndarray:
+    """
+    Departures per stop and time band, streamed from stop_times.txt.
+
+    Memory is bounded by CHUNK_ROWS plus one (n_stops x n_bands) counter.
+    """
+    stop_index = pd.Index(stops["stop_id"])
+    n_bands = len(TIME_BANDS)
+
+    # hour (0-47, GTFS allows > 24:00) -> band column
+    hour_to_band = np.zeros(48, dtype=np.int64)
+    for b, (start, end) in enumerate(TIME_BANDS.values()):
+        hour_to_band[start:end] = b
+        hour_to_band[start + 24:end + 24] = b
+
+    counts = np.zeros(len(stop_index) * n_bands, dtype=np.int64)
+    reader = pd.read_csv(
+        os.path.join(gtfs_dir, "stop_times.txt"),
+        usecols=["trip_id", "departure_time", "stop_id"],
+        dtype=str,
+        chunksize=CHUNK_ROWS,
+    )
+    for i, chunk in enumerate(reader):
+        chunk = chunk[chunk["trip_id"].isin(trip_ids)]
+        stop_pos = stop_index.get_indexer(chunk["stop_id"])
+
+        hour = pd.to_numeric(
+            chunk["departure_time"].str.split(":", n=1).str[0], errors="coerce"
+        ).to_numpy()
+        ok = (stop_pos >= 0) & ~np.isnan(hour)
+        hour = np.clip(hour[ok].astype(np.int64), 0, 47)
+
+        counts += np.bincount(
+            stop_pos[ok] * n_bands + hour_to_band[hour],
+            minlength=counts.size,
+        )
+        print(f"  stop_times chunk {i + 1}: {ok.sum()} departures")
+
+    return counts.reshape(len(stop_index), n_bands)
+
+
+def aggregate_to_neighborhoods(stops: pd.DataFrame, per_stop: pd.DataFrame) -> pd.DataFrame:
+    """Sum per-stop service into neighborhoods (one row per name) with a point-in-polygon join."""
+    neighborhoods = gpd.read_file(
+        os.path.join(DATA_PROCESSED, "neighborhoods.geojson")
+    ).to_crs(epsg=3857)
+
+    points = gpd.GeoDataFrame(
+        per_stop,
+        geometry=gpd.points_from_xy(stops["stop_lon"], stops["stop_lat"]),
+        crs="EPSG:4326",
+    ).to_crs(epsg=3857)
+
+    joined = gpd.sjoin(
+        points,
+        neighborhoods[["neighborhood_name", "geometry"]],
+        how="inner",
+        predicate="within",
+    )
+    value_cols = [c for c in per_stop.columns if c != "stop_id"]
+    out = joined.groupby("neighborhood_name")[value_cols].sum()
+    # One row per name: polygons sharing a name (two "West Point Grey") are
+    # pooled, so step 02 can merge on the name
+    area = neighborhoods.groupby("neighborhood_name")[["area_km2"]].sum()
+    return area.join(out).fillna(0).reset_index()
+
+
+def ingest_gtfs(gtfs_dir: str, service_date: date):
+    stops = load_stops(gtfs_dir)
+    print(f"Loaded {len(stops)} stops from {gtfs_dir}")
+
+    per_stop = pd.DataFrame({"stop_id": stops["stop_id"], "gtfs_stops": 1})
+
+    has_schedule = all(
+        os.path.exists(os.path.join(gtfs_dir, f)) for f in ["trips.txt", "stop_times.txt"]
+    )
+    if has_schedule:
+        services = active_service_ids(gtfs_dir, service_date)
+        trip_ids = load_trip_ids(gtfs_dir, services)
+        print(f"Counting departures for {len(trip_ids)} trips on {service_date}")
+
+        counts = count_departures(gtfs_dir, stops, trip_ids)
+        for b, (band, (start, end)) in enumerate(TIME_BANDS.items()):
+            per_stop[f"dph_{band}"] = counts[:, b] / (end - start)
+    else:
+        print("No trips.txt/stop_times.txt in feed: falling back to stop counts")
+
+    out = aggregate_to_neighborhoods(stops, per_stop)
+
+    # One service level per neighborhood for scoring
+    if has_schedule:
+        daytime_hours = sum(TIME_BANDS[b][1] - TIME_BANDS[b][0] for b in DAYTIME_BANDS)
+        daytime = sum(
+            out[f"dph_{b}"] * (TIME_BANDS[b][1] - TIME_BANDS[b][0]) for b in DAYTIME_BANDS
+        ) / daytime_hours
+        out["transit_service_per_km2"] = daytime / out["area_km2"]
+    else:
+        out["transit_service_per_km2"] = out["gtfs_stops"] / out["area_km2"]
+
+    out = out.drop(columns="area_km2")
+    out.to_parquet(os.path.join(DATA_PROCESSED, "transit_service.parquet"), index=False)
+    print(f"Saved transit_service.parquet ({len(out)} neighborhoods)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate GTFS service levels per neighborhood.")
+    parser.add_argument("--gtfs-dir", default=GTFS_DIR)
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="Service day to count (YYYY-MM-DD), default today.",
+    )
+    args = parser.parse_args()
+    ingest_gtfs(args.gtfs_dir, args.date)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# scripts/ingest_listings.py
+
+import argparse
+import os
+import sys
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from cmhc_workbook import file_sha256  # noqa: E402
+from store import processed_dir  # noqa: E402
+
+# Per-release state: scripts/refresh_service.py carries these into each new
+# release, so they live next to the rest of the processed data.
+SKETCH_FILENAME = "rent_sketches.parquet"
+MANIFEST_FILENAME = "rent_sketches_manifest.txt"
+SUMMARY_FILENAME = "rent_by_neighborhood.parquet"
+
+CHUNK_ROWS = 500_000
+
+# Log-spaced rent bins: a histogram over fixed edges is a quantile sketch that
+# merges by adding counts (~1.5% relative error per bin).
+BIN_EDGES = np.geomspace(300, 20_000, 281)
+
+# Input column names (geocoded listings export)
+LAT_COL, LON_COL = "lat", "lon"
+PRICE_COL, BEDROOMS_COL, DATE_COL = "price", "bedrooms", "date_listed"
+
+BEDROOM_TYPES = ["bachelor", "1br", "2br", "3br+"]
+
+QUANTILES = {"rent_p25": 0.25, "rent_median": 0.5, "rent_p75": 0.75}
+
+
+def bedroom_type(bedrooms: pd.Series) -> pd.Series:
+    n = pd.to_numeric(bedrooms, errors="coerce").fillna(1).clip(0, 3).astype(int)
+    return pd.Series(np.array(BEDROOM_TYPES)[n], index=bedrooms.index)
+
+
+def sketch_chunk(chunk: pd.DataFrame, neighborhoods: gpd.GeoDataFrame) -> pd.DataFrame:
+    """Assign one chunk of listings to neighborhoods and bin their rents."""
+    chunk = chunk.dropna(subset=[LAT_COL, LON_COL, PRICE_COL])
+    points = gpd.GeoSeries(
+        gpd.points_from_xy(chunk[LON_COL], chunk[LAT_COL]), crs="EPSG:4326"
+    ).to_crs(neighborhoods.crs)
+
+    # Vectorized point-in-polygon against the neighborhoods' R-tree
+    point_idx, nbhd_idx = neighborhoods.sindex.query(points, predicate="within")
+    point_idx, first = np.unique(point_idx, return_index=True)
+    nbhd_idx = nbhd_idx[first]
+
+    price = chunk[PRICE_COL].to_numpy(dtype=np.float64)[point_idx]
+    rent_bin = np.clip(np.searchsorted(BIN_EDGES, price, side="right") - 1, 0, len(BIN_EDGES) - 2)
+
+    rows = chunk.iloc[point_idx]
+    return (
+        pd.DataFrame(
+            {
+                "neighborhood_name": neighborhoods["neighborhood_name"].to_numpy()[nbhd_idx],
+                "bedroom_type": bedroom_type(rows[BEDROOMS_COL]).to_numpy()
+                if BEDROOMS_COL in rows.columns else BEDROOM_TYPES[1],
+                "month": pd.to_datetime(rows[DATE_COL], errors="coerce")
+                .dt.strftime("%Y-%m").fillna("unknown").to_numpy(),
+                "bin": rent_bin.astype(np.int16),
+            }
+        )
+        .groupby(["neighborhood_name", "bedroom_type", "month", "bin"])
+        .size()
+        .rename("count")
+        .reset_index()
+    )
+
+
+def merge_sketches(*sketches: pd.DataFrame) -> pd.DataFrame:
+    """Sketches merge by summing counts per (neighborhood, bedroom, month, bin)."""
+    frames = [s for s in sketches if s is not None and not s.empty]
+    if not frames:
+        return pd.DataFrame(columns=["neighborhood_name", "bedroom_type", "month", "bin", "count"])
+    return (
+        pd.concat(frames, ignore_index=True)
+        .groupby(["neighborhood_name", "bedroom_type", "month", "bin"], as_index=False)["count"]
+        .sum()
+    )
+
+
+def sketch_quantiles(sketch: pd.DataFrame, by) -> pd.DataFrame:
+    """Quantiles per group, interpolated geometrically inside the hit bin."""
+    n_bins = len(BIN_EDGES) - 1
+    counts = sketch.pivot_table(
+        index=by, columns="bin", values="count", aggfunc="sum", fill_value=0
+    ).reindex(columns=range(n_bins), fill_value=0)
+
+    hist = counts.to_numpy(dtype=np.float64)
+    cum = hist.cumsum(axis=1)
+    total = cum[:, -1]
+    rows = np.arange(len(hist))
+
+    out = pd.DataFrame(index=counts.index)
+    out["listings"] = total.astype(np.int64)
+    for name, q in QUANTILES.items():
+        target = q * total
+        # first bin whose cumulative count reaches the target
+        b = np.minimum((cum < target[:, None]).sum(axis=1), n_bins - 1)
+        below = cum[rows, b] - hist[rows, b]
+        frac = np.clip((target - below) / np.maximum(hist[rows, b], 1), 0, 1)
+        lo, hi = BIN_EDGES[b], BIN_EDGES[b + 1]
+        out[name] = lo * (hi / lo) ** frac
+    return out.reset_index()
+
+
+def manifest_key(path: str) -> str:
+    """
+    Manifest line for a listings file: its path relative to the working
+    directory and its content hash. Files are matched on the hash, so moving
+    the data directory does not re-ingest them and a re-exported file with
+    the same name but new rows is not skipped.
+    """
+    return f"{os.path.relpath(path)}\t{file_sha256(path)}"
+
+
+def read_manifest(path: str) -> set:
+    """Content hashes of the files already in the sketches."""
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.rstrip("\n").split("\t")[-1] for line in f if line.strip()}
+
+
+def summarize(sketch: pd.DataFrame, since: str = None) -> pd.DataFrame:
+    """Quantiles per neighborhood and bedroom type, plus "all" bedrooms."""
+    # Monthly sketches merge into any window without touching raw listings.
+    # Listings without a usable date cannot be placed in a window.
+    window = sketch
+    if since is not None:
+        window = sketch[(sketch["month"] != "unknown") & (sketch["month"] >= since)]
+    summary = sketch_quantiles(window, ["neighborhood_name", "bedroom_type"])
+    overall = sketch_quantiles(window, ["neighborhood_name"]).assign(bedroom_type="all")
+    return pd.concat([summary, overall], ignore_index=True)
+
+
+def ingest(paths, rebuild: bool = False, since: str = None, base: str = None):
+    """
+    Add listing files to the stored sketches; files already in the manifest
+    are skipped, so a day's new export costs only its own rows.
+    """
+    base = base or processed_dir()
+    sketch_path = os.path.join(base, SKETCH_FILENAME)
+    manifest_path = os.path.join(base, MANIFEST_FILENAME)
+    summary_path = os.path.join(base, SUMMARY_FILENAME)
+
+    neighborhoods = gpd.read_file(os.path.join(base, "neighborhoods.geojson"))
+    neighborhoods = neighborhoods[["neighborhood_name", "geometry"]].reset_index(drop=True)
+
+    done = set()
+    sketch = None
+    if not rebuild and os.path.exists(sketch_path):
+        sketch = pd.read_parquet(sketch_path)
+        done = read_manifest(manifest_path)
+
+    new_files = []
+    for path in paths:
+        key = manifest_key(path)
+        digest = key.split("\t")[-1]
+        if digest in done:
+            print(f"Skipping already ingested {path}")
+            continue
+        for i, chunk in enumerate(pd.read_csv(path, chunksize=CHUNK_ROWS)):
+            sketch = merge_sketches(sketch, sketch_chunk(chunk, neighborhoods))
+            print(f"  {path} chunk {i + 1}: {len(chunk)} listings")
+        new_files.append(key)
+        done.add(digest)
+
+    if sketch is None:
+        print("No listings ingested")
+        return
+
+    sketch.to_parquet(sketch_path + ".tmp", index=False)
+    os.replace(sketch_path + ".tmp", sketch_path)
+    with open(manifest_path, "w" if rebuild else "a") as f:
+        for key in new_files:
+            f.write(key + "\n")
+
+    summary = summarize(sketch, since)
+    summary.to_parquet(summary_path + ".tmp", index=False)
+    os.replace(summary_path + ".tmp", summary_path)
+    print(f"Saved {summary_path} ({summary['neighborhood_name'].nunique()} neighborhoods)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream geocoded listings into rent sketches.")
+    parser.add_argument("paths", nargs="+", help="Listing CSV files (lat, lon, price, bedrooms, date_listed)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore stored sketches and start over.")
+    parser.add_argument("--since", help="Summarize months from YYYY-MM onwards (default: all).")
+    args = parser.parse_args()
+    ingest(args.paths, rebuild=args.rebuild, since=args.since)
+
+
+if __name__ == "__main__":
+    main()
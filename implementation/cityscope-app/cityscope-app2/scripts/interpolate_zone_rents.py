@@ -0,0 +1,131 @@
+# scripts/interpolate_zone_rents.py
+
+import argparse
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from cmhc_workbook import load_rms, period_date
+
+DATA_RAW = "data/raw"
+DATA_PROCESSED = os.environ.get("CITYSCOPE_DATA_PROCESSED", "data/processed")
+
+# CMHC survey zone boundaries (not shipped; one polygon per zone)
+ZONES_PATH = os.path.join(DATA_RAW, "cmhc_zones.geojson")
+ZONE_NAME_COL = "zone_name"
+ZONE_POPULATION_COL = "population"
+
+# Zone rents: either a CSV (zone_name, bedroom_type, avg_rent) or the zone
+# rows of a converted CMHC workbook (see cmhc_workbook.py)
+ZONE_RENTS_CSV = os.path.join(DATA_RAW, "cmhc_zone_rents.csv")
+WORKBOOK_PATH = os.path.join(DATA_RAW, "rmr-canada-2024-en.xlsx")
+
+OUTPUT_PATH = os.path.join(DATA_PROCESSED, "zone_rents_by_neighborhood.parquet")
+
+
+def load_zone_rents() -> pd.DataFrame:
+    if os.path.exists(ZONE_RENTS_CSV):
+        return pd.read_csv(ZONE_RENTS_CSV)
+
+    rows = load_rms(WORKBOOK_PATH)
+    rows = rows[
+        (rows["geography_level"] == "zone")
+        & rows["measure"].str.contains("Average rent", case=False, regex=False)
+    ]
+    # Latest survey period per zone and bedroom type ("Oct-24" labels do not
+    # sort as text)
+    rows = rows.assign(period_date=rows["period"].map(period_date)).dropna(subset=["period_date"])
+    rows = rows.sort_values("period_date").groupby(["geography", "bedroom_type"]).tail(1)
+    return rows.rename(columns={"geography": ZONE_NAME_COL, "value": "avg_rent"})[
+        [ZONE_NAME_COL, "bedroom_type", "avg_rent"]
+    ]
+
+
+def overlay_weights(neighborhoods: gpd.GeoDataFrame, zones: gpd.GeoDataFrame,
+                    population_weighted: bool = False) -> pd.DataFrame:
+    """
+    Area (or population) weight of every intersecting (neighborhood, zone) pair.
+
+    The R-tree query restricts the overlay to pairs whose boxes intersect and
+    the intersection areas are computed for all pairs in one vectorized call.
+    """
+    nbhd_idx, zone_idx = zones.sindex.query(neighborhoods.geometry, predicate="intersects")
+
+    nbhd_geoms = neighborhoods.geometry.to_numpy()[nbhd_idx]
+    zone_geoms = zones.geometry.to_numpy()[zone_idx]
+    area = shapely.area(shapely.intersection(nbhd_geoms, zone_geoms))
+
+    weight = area
+    if population_weighted:
+        # Assume people are spread evenly within each zone
+        density = (
+            zones[ZONE_POPULATION_COL].to_numpy(dtype=np.float64)
+            / shapely.area(zones.geometry.to_numpy())
+        )
+        weight = area * density[zone_idx]
+
+    pairs = pd.DataFrame(
+        {
+            "neighborhood_name": neighborhoods["neighborhood_name"].to_numpy()[nbhd_idx],
+            ZONE_NAME_COL: zones[ZONE_NAME_COL].to_numpy()[zone_idx],
+            "overlap_area": area,
+            "weight": weight,
+        }
+    )
+    return pairs[pairs["overlap_area"] > 0]
+
+
+def interpolate(population_weighted: bool = False):
+    neighborhoods = gpd.read_file(os.path.join(DATA_PROCESSED, "neighborhoods.geojson"))
+    neighborhoods = neighborhoods.to_crs(epsg=3857).reset_index(drop=True)
+    zones = gpd.read_file(ZONES_PATH).to_crs(epsg=3857)
+    zones["geometry"] = zones.geometry.make_valid()
+    zones = zones.reset_index(drop=True)
+
+    pairs = overlay_weights(neighborhoods, zones, population_weighted)
+    rents = load_zone_rents().dropna(subset=["avg_rent"])
+
+    # Weighted mean per (neighborhood, bedroom type) over zones that report a rent
+    merged = pairs.merge(rents, on=ZONE_NAME_COL, how="inner")
+    merged["weighted_rent"] = merged["weight"] * merged["avg_rent"]
+    out = merged.groupby(["neighborhood_name", "bedroom_type"]).agg(
+        weighted_rent=("weighted_rent", "sum"),
+        weight=("weight", "sum"),
+        covered_area=("overlap_area", "sum"),
+        zones=(ZONE_NAME_COL, "nunique"),
+    )
+    out["avg_rent"] = out["weighted_rent"] / out["weight"]
+
+    nbhd_area = pd.Series(
+        shapely.area(neighborhoods.geometry.to_numpy()),
+        index=neighborhoods["neighborhood_name"],
+    )
+    nbhd_area = nbhd_area.groupby(level=0).sum()
+    out["coverage"] = (
+        out["covered_area"] / nbhd_area.reindex(out.index.get_level_values(0)).to_numpy()
+    ).clip(upper=1.0)
+
+    out = out.drop(columns=["weighted_rent", "weight", "covered_area"]).reset_index()
+    out.to_parquet(OUTPUT_PATH, index=False)
+    print(
+        f"Saved {OUTPUT_PATH}: {out['neighborhood_name'].nunique()} neighborhoods "
+        f"from {len(pairs)} neighborhood/zone overlaps"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Areal interpolation of CMHC zone rents onto neighborhoods.")
+    parser.add_argument(
+        "--population-weighted",
+        action="store_true",
+        help=f"Weight overlaps by zone population (needs a '{ZONE_POPULATION_COL}' column).",
+    )
+    args = parser.parse_args()
+    interpolate(population_weighted=args.population_weighted)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# scripts/overpass_replay.py
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+CACHE_DIR = "cache"
+
+# Endpoints the cached responses were recorded against. OSMnx names each
+# cache file sha1(<endpoint>?data=<query>), so a query is found again by
+# hashing it against these.
+ORIGIN_ENDPOINTS = [
+    "https://overpass-api.de/api/interpreter",
+]
+
+# Geocoding (ox.geocode_to_gdf) is replayed too, under /nominatim/
+NOMINATIM_ORIGIN = "https://nominatim.openstreetmap.org/"
+NOMINATIM_PREFIX = "/nominatim/"
+
+
+def cache_key(endpoint: str, query: str) -> str:
+    """OSMnx's cache file name for an Overpass query (the prepared GET URL, hashed)."""
+    url = f"{endpoint}?{urlencode({'data': query})}"
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class Replay:
+    """
+    Recorded responses plus the simulated server state.
+
+    `slots` caps concurrent queries like Overpass's per-IP rate limit: a
+    query arriving when every slot is busy gets 429, as does a random
+    `reject_rate` share of the rest. Each answered query holds its slot for
+    `latency_s` (+- `jitter_s`).
+    """
+
+    def __init__(self, cache_dir: str, latency_s: float, jitter_s: float, slots: int,
+                 reject_rate: float, origins=ORIGIN_ENDPOINTS, seed: int = None):
+        self.responses = {
+            os.path.splitext(os.path.basename(p))[0]: p
+            for p in glob.glob(os.path.join(cache_dir, "*.json"))
+        }
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.slots = slots
+        self.reject_rate = reject_rate
+        self.origins = list(origins)
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.busy = 0
+        self.busy_until = []
+        self.stats = {"served": 0, "rejected_busy": 0, "rejected_random": 0, "missing": 0}
+
+    def find_url(self, url: str):
+        return self.responses.get(hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def find(self, query: str):
+        for endpoint in self.origins:
+            path = self.responses.get(cache_key(endpoint, query))
+            if path:
+                return path
+        return None
+
+    def acquire(self):
+        """
+        A slot's release deadline (monotonic seconds), or None when the
+        query should be answered with 429.
+        """
+        with self.lock:
+            if self.busy >= self.slots:
+                self.stats["rejected_busy"] += 1
+                return None
+            if self.rng.random() < self.reject_rate:
+                self.stats["rejected_random"] += 1
+                return None
+            self.busy += 1
+            delay = max(0.0, self.latency_s + self.rng.uniform(-self.jitter_s, self.jitter_s))
+            until = time.monotonic() + delay
+            self.busy_until.append(until)
+            return until
+
+    def release(self, until: float):
+        with self.lock:
+            self.busy -= 1
+            self.busy_until.remove(until)
+
+    def status_text(self) -> str:
+        """Overpass /api/status, in the layout OSMnx parses (line 5 = slot state)."""
+        now = datetime.now(timezone.utc)
+        with self.lock:
+            free = self.slots - self.busy
+            soonest = min(self.busy_until) - time.monotonic() if self.busy_until else 0.0
+        lines = [
+            "Connected as: 0",
+            f"Current time: {now:%Y-%m-%dT%H:%M:%SZ}",
+            "Announced endpoint: none",
+            f"Rate limit: {self.slots}",
+        ]
+        if free > 0:
+            lines.append(f"{free} slots available now.")
+        else:
+            wait = max(1, int(soonest + 0.999))
+            at = now + timedelta(seconds=wait)
+            lines.append(f"Slot available after: {at:%Y-%m-%dT%H:%M:%SZ}, in {wait} seconds.")
+        lines.append("Currently running queries (pid, space limit, time limit, start time):")
+        return "\n".join(lines) + "\n"
+
+
+def make_handler(replay: Replay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, code: int, body: bytes, content_type: str, headers=None):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path.startswith(NOMINATIM_PREFIX):
+                return self._geocode(parts)
+            if parts.path.endswith("/status"):
+                return self._send(200, replay.status_text().encode(), "text/plain")
+            if parts.path.endswith("/stats"):
+                with replay.lock:
+                    body = json.dumps(dict(replay.stats, busy=replay.busy)).encode()
+                return self._send(200, body, "application/json")
+            self._interpret(parse_qs(parts.query).get("data", [""])[0])
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            form = parse_qs(self.rfile.read(length).decode("utf-8"))
+            self._interpret(form.get("data", [""])[0])
+
+        def _geocode(self, parts):
+            # OSMnx keys Nominatim responses by the full request URL, as sent
+            url = NOMINATIM_ORIGIN + parts.path[len(NOMINATIM_PREFIX):] + "?" + parts.query
+            path = replay.find_url(url)
+            if path is None:
+                with replay.lock:
+                    replay.stats["missing"] += 1
+                return self._send(404, b"[]", "application/json")
+            with open(path, "rb") as f:
+                self._send(200, f.read(), "application/json")
+
+        def _interpret(self, query: str):
+            path = replay.find(query)
+            if path is None:
+                with replay.lock:
+                    replay.stats["missing"] += 1
+                body = json.dumps({"remark": "runtime error: query not in the replay cache"})
+                return self._send(404, body.encode(), "application/json")
+
+            until = replay.acquire()
+            if until is None:
+                return self._send(
+                    429, b"rate_limited: Too Many Requests\n", "text/plain", {"Retry-After": "1"}
+                )
+
+            try:
+                time.sleep(max(0.0, until - time.monotonic()))
+                with open(path, "rb") as f:
+                    body = f.read()
+                self._send(200, body, "application/json")
+                with replay.lock:
+                    replay.stats["served"] += 1
+            finally:
+                replay.release(until)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve recorded Overpass responses locally, with simulated latency and rate limits."
+    )
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=500, help="Mean time to answer a query.")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--slots", type=int, default=2, help="Concurrent queries before 429.")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Extra random 429 share (0-1).")
+    parser.add_argument("--origin", action="append", help="Endpoint the cache was recorded against.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    replay = Replay(
+        args.cache_dir,
+        latency_s=args.latency_ms / 1000,
+        jitter_s=args.jitter_ms / 1000,
+        slots=args.slots,
+        reject_rate=args.reject_rate,
+        origins=args.origin or ORIGIN_ENDPOINTS,
+        seed=args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(replay))
+    print(f"Replaying {len(replay.responses)} responses from {args.cache_dir} "
+          f"on http://{args.host}:{args.port}/api/interpreter")
+    print(f"Point the fetch scripts at it: OVERPASS_URL=http://{args.host}:{args.port}/api/interpreter "
+          f"NOMINATIM_URL=http://{args.host}:{args.port}{NOMINATIM_PREFIX}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(replay.stats))
+
+
+if __name__ == "__main__":
+    main()
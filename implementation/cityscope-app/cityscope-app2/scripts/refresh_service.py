@@ -0,0 +1,231 @@
+# scripts/refresh_service.py
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import geopandas as gpd
+import pandas as pd
+from apscheduler.schedulers.blocking import BlockingScheduler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from ingest_gtfs import GTFS_DIR  # noqa: E402
+from ingest_listings import MANIFEST_FILENAME, SKETCH_FILENAME, SUMMARY_FILENAME  # noqa: E402
+from poi_store import PoiStore, poi_store_path  # noqa: E402
+from spatial_weights import SpatialWeights, weights_path  # noqa: E402
+from store import (  # noqa: E402
+    CURRENT_POINTER,
+    RELEASES_DIR,
+    open_store,
+    processed_dir,
+    store_path,
+)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DOWNLOAD_STEP = "01_build_osm_data.py"
+BUILD_STEPS = [
+    "ingest_gtfs.py",
+    "compute_access.py",
+    "02_compute_amenity_metrics.py",
+    "interpolate_zone_rents.py",
+    "03_merge_rent_data.py",
+    "04_build_store.py",
+]
+WARM_STEP = "05_warm_cache.py"
+
+# Files step 01 produces; reused from the live release with --skip-download.
+DOWNLOAD_OUTPUTS = ["neighborhoods.geojson", "pois.geojson"]
+
+# Which OSM diffs the reused pois.geojson already includes (update_osm.py);
+# a fresh download starts from the new Overpass timestamp instead.
+DOWNLOAD_STATE = ["osm_state.json"]
+
+# Per-release state no build step recreates from the repo alone, carried over
+# from the live release when present: listing rent sketches
+# (ingest_listings.py) and the outputs of optional steps, which stay in use
+# when their raw inputs are missing on this run.
+CARRIED_STATE = [
+    SKETCH_FILENAME,
+    MANIFEST_FILENAME,
+    SUMMARY_FILENAME,
+    "transit_service.parquet",
+    "zone_rents_by_neighborhood.parquet",
+]
+
+REQUIRED_COLUMNS = [
+    "neighborhood_name",
+    "area_km2",
+    "avg_rent",
+    "transit_per_km2",
+    "schools_per_km2",
+    "amenities_per_km2",
+]
+
+KEEP_RELEASES = 3
+
+
+# Optional stages that need raw inputs the repo does not (always) ship
+OPTIONAL_INPUTS = {
+    "ingest_gtfs.py": os.path.join(GTFS_DIR, "stops.txt"),
+    "interpolate_zone_rents.py": os.path.join("data", "raw", "cmhc_zones.geojson"),
+}
+
+
+def run_step(script: str, data_dir: str, *args: str):
+    """Run one pipeline script, with `args`, with its outputs redirected to `data_dir`."""
+    required = OPTIONAL_INPUTS.get(script)
+    if required and not os.path.exists(required):
+        print(f"[refresh] skipping {script}: {required} not found")
+        return
+    print(f"[refresh] {script} -> {data_dir}")
+    env = dict(os.environ, CITYSCOPE_DATA_PROCESSED=data_dir)
+    subprocess.run(
+        [sys.executable, os.path.join(SCRIPTS_DIR, script), *args],
+        env=env,
+        check=True,
+    )
+
+
+def validate_release(data_dir: str):
+    """Raise if a freshly built release is not fit to serve."""
+    metrics = pd.read_parquet(os.path.join(data_dir, "neighborhood_metrics.parquet"))
+    missing = [c for c in REQUIRED_COLUMNS if c not in metrics.columns]
+    if missing:
+        raise ValueError(f"neighborhood_metrics.parquet is missing columns: {missing}")
+    if metrics.empty:
+        raise ValueError("neighborhood_metrics.parquet has no rows")
+    if metrics[REQUIRED_COLUMNS[1:]].isna().any().any():
+        raise ValueError("neighborhood_metrics.parquet has missing metric values")
+
+    gdf = gpd.read_file(os.path.join(data_dir, "neighborhoods_full.geojson"))
+    if len(gdf) != len(metrics):
+        raise ValueError(
+            f"geometry has {len(gdf)} rows but metrics have {len(metrics)}"
+        )
+
+    if open_store(store_path(data_dir)).num_rows != len(metrics):
+        raise ValueError("store row count does not match metrics")
+    # Smoothing applies the weights by row position
+    if len(SpatialWeights.load(weights_path(data_dir))) != len(metrics):
+        raise ValueError("spatial weights row count does not match metrics")
+    PoiStore(poi_store_path(data_dir))
+
+
+def swap_current(release: str):
+    """Atomically point data/current at `release` (rename is atomic on POSIX and Windows)."""
+    tmp_path = f"{CURRENT_POINTER}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(release + "\n")
+    os.replace(tmp_path, CURRENT_POINTER)
+
+
+def prune_releases(keep: int = KEEP_RELEASES):
+    """
+    Remove old releases, keeping the newest `keep` (live one included).
+
+    Older releases are kept for a while because running sessions may still
+    hold memory maps or cached results that point into them.
+    """
+    live = os.path.basename(processed_dir())
+    releases = sorted(
+        name for name in os.listdir(RELEASES_DIR)
+        if not name.startswith(".") and os.path.isdir(os.path.join(RELEASES_DIR, name))
+    )
+    for name in releases[:-keep]:
+        if name != live:
+            shutil.rmtree(os.path.join(RELEASES_DIR, name), ignore_errors=True)
+
+
+def stage_release():
+    """A new release name and its (created, empty) staging directory."""
+    release = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    os.makedirs(RELEASES_DIR, exist_ok=True)
+    staging = os.path.join(RELEASES_DIR, f".staging-{release}")
+    os.makedirs(staging)
+    return release, staging
+
+
+def publish(release: str, staging: str):
+    """
+    Validate a staged release, warm its caches and then swap it in. A
+    release that fails validation is removed and never goes live.
+    """
+    try:
+        validate_release(staging)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    final = os.path.join(RELEASES_DIR, release)
+    os.rename(staging, final)
+
+    # Warm the new release's caches before any request can reach it
+    run_step(WARM_STEP, final)
+
+    previous = processed_dir()
+    swap_current(release)
+    print(f"[refresh] live release is now {release} (was {previous})")
+    prune_releases()
+
+
+def refresh(skip_download: bool = False):
+    """
+    Build a new release in a staging directory, validate it, warm its caches
+    and then swap it in. The live release is never written to.
+    """
+    live = processed_dir()
+    release, staging = stage_release()
+    try:
+        if skip_download:
+            for name in DOWNLOAD_OUTPUTS:
+                shutil.copy2(os.path.join(live, name), os.path.join(staging, name))
+        else:
+            run_step(DOWNLOAD_STEP, staging)
+        carry = CARRIED_STATE + (DOWNLOAD_STATE if skip_download else [])
+        for name in carry:
+            if os.path.exists(os.path.join(live, name)):
+                shutil.copy2(os.path.join(live, name), os.path.join(staging, name))
+        for script in BUILD_STEPS:
+            run_step(script, staging)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    publish(release, staging)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild CityScope data in the background.")
+    parser.add_argument("--once", action="store_true", help="Refresh once and exit.")
+    parser.add_argument("--hour", type=int, default=3, help="Daily refresh hour (local time).")
+    parser.add_argument(
+        "--skip-download",
+        action="store_true",
+        help="Reuse the live OSM downloads instead of running step 01.",
+    )
+    args = parser.parse_args()
+
+    if args.once:
+        refresh(skip_download=args.skip_download)
+        return
+
+    scheduler = BlockingScheduler()
+    scheduler.add_job(
+        refresh,
+        "cron",
+        hour=args.hour,
+        kwargs={"skip_download": args.skip_download},
+        max_instances=1,
+        coalesce=True,
+    )
+    print(f"[refresh] scheduled daily at {args.hour:02d}:00")
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    main()
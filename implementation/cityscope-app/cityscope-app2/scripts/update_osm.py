@@ -0,0 +1,357 @@
+# scripts/update_osm.py
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import xml.etree.ElementTree as ET
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import requests
+from shapely.geometry import Point
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from poi_dataset import poi_table  # noqa: E402
+from refresh_service import publish, run_step, stage_release  # noqa: E402
+from store import processed_dir  # noqa: E402
+
+CACHE_DIR = "cache"
+
+# Which OSM diffs a release's pois.geojson includes; refresh_service.py
+# carries it along with the reused downloads.
+STATE_FILENAME = "osm_state.json"
+OVERPASS_URL = os.environ.get("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+
+# Same tag filter and categories as get_pois() in 01_build_osm_data.py
+POI_TAGS = {
+    "amenity": ["school", "college", "university", "bus_station", "hospital"],
+    "shop": ["mall", "supermarket"],
+    "leisure": ["park"],
+}
+CATEGORIES = ["school", "transit", "mall", "park", "hospital"]
+
+# 04_build_store.py artifacts rebuilt after a POI change. The spatial weights
+# depend on the polygons only and are kept; the density surfaces are patched.
+POI_ARTIFACTS = ["store", "snapshot", "poi_store", "poi_dataset", "name_index", "radius_cube"]
+
+
+def classify(tags: dict):
+    amenity, shop, leisure = tags.get("amenity"), tags.get("shop"), tags.get("leisure")
+    if amenity in ["school", "college", "university"]:
+        return "school"
+    if amenity == "bus_station":
+        return "transit"
+    if amenity == "hospital":
+        return "hospital"
+    if shop in ["mall", "supermarket"]:
+        return "mall"
+    if leisure == "park":
+        return "park"
+    return None
+
+
+def read_state(base: str) -> str:
+    """
+    OSM timestamp the POIs of release `base` reflect.
+
+    First run: the newest `osm3s.timestamp_osm_base` among the cached Overpass
+    responses that step 01 downloaded.
+    """
+    state_path = os.path.join(base, STATE_FILENAME)
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            return json.load(f)["timestamp_osm_base"]
+
+    stamps = []
+    for path in glob.glob(os.path.join(CACHE_DIR, "*.json")):
+        with open(path) as f:
+            stamp = json.load(f).get("osm3s", {}).get("timestamp_osm_base")
+        if stamp:
+            stamps.append(stamp)
+    if not stamps:
+        raise FileNotFoundError(f"No {state_path} and no cached Overpass responses in {CACHE_DIR}")
+    return max(stamps)
+
+
+def poi_keys(base: str) -> set:
+    """(element, id) of every POI in release `base`."""
+    pois = gpd.read_file(os.path.join(base, "pois.geojson"), columns=["element", "id"], ignore_geometry=True)
+    return set(zip(pois["element"], pois["id"].astype(int)))
+
+
+def write_state(timestamp: str, base: str):
+    state_path = os.path.join(base, STATE_FILENAME)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"timestamp_osm_base": timestamp}, f)
+    os.replace(tmp_path, state_path)
+
+
+def changes_from_osc(paths, existing: set):
+    """
+    Changed POIs from osmChange files (.osc / .osc.gz), streamed with iterparse.
+
+    Returns (upserts, deleted keys, refetch keys, newest timestamp). Only nodes
+    carry a point in an .osc; created/modified ways and relations come back as
+    refetch keys so their centre can be looked up (refetch_elements). Deleted
+    keys are limited to the `existing` POI keys: most elements in a diff were
+    never POIs.
+    """
+    # Keyed, so a later change to the same element (in this or a later
+    # file) replaces or cancels an earlier one
+    upserts, deleted, refetch, newest = {}, set(), set(), ""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            action = None
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if event == "start" and elem.tag in ("create", "modify", "delete"):
+                    action = elem.tag
+                    continue
+                if event != "end" or elem.tag not in ("node", "way", "relation"):
+                    continue
+
+                key = (elem.tag, int(elem.get("id")))
+                newest = max(newest, elem.get("timestamp", ""))
+                tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+                category = classify(tags)
+
+                if action == "delete" or category is None:
+                    upserts.pop(key, None)
+                    refetch.discard(key)
+                    if key in existing:
+                        deleted.add(key)
+                elif elem.tag == "node":
+                    upserts[key] = {
+                        "element": key[0], "id": key[1], "name": tags.get("name"),
+                        **{k: tags.get(k) for k in POI_TAGS}, "category": category,
+                        "geometry": Point(float(elem.get("lon")), float(elem.get("lat"))),
+                    }
+                else:
+                    refetch.add(key)
+                elem.clear()
+    return list(upserts.values()), deleted, refetch, newest
+
+
+def changes_from_overpass(since: str, bbox, existing: set, url: str = OVERPASS_URL):
+    """
+    POIs edited after `since`, via an Overpass `newer:` query.
+
+    `out center` gives ways/relations a representative point. Deletions are
+    not visible to `newer:`; use osmChange files to pick those up.
+    """
+    south, west, north, east = bbox
+    selectors = []
+    for key, values in POI_TAGS.items():
+        regex = "|".join(values)
+        selectors.append(f'nwr["{key}"~"^({regex})$"](newer:"{since}")({south},{west},{north},{east});')
+    query = f"[out:json][timeout:180];({''.join(selectors)});out center tags;"
+
+    response = requests.post(url, data={"data": query}, timeout=300)
+    response.raise_for_status()
+    payload = response.json()
+
+    upserts, deleted = [], set()
+    for el in payload.get("elements", []):
+        tags = el.get("tags", {})
+        key = (el["type"], int(el["id"]))
+        category = classify(tags)
+        lat = el.get("lat", el.get("center", {}).get("lat"))
+        lon = el.get("lon", el.get("center", {}).get("lon"))
+        if category is None or lat is None:
+            if key in existing:
+                deleted.add(key)
+            continue
+        upserts.append(
+            {"element": key[0], "id": key[1], "name": tags.get("name"),
+             **{k: tags.get(k) for k in POI_TAGS}, "category": category,
+             "geometry": Point(lon, lat)}
+        )
+    return upserts, deleted, payload.get("osm3s", {}).get("timestamp_osm_base", since)
+
+
+def refetch_elements(keys, existing: set, url: str = OVERPASS_URL):
+    """
+    Current centre point and tags for ways/relations named in an .osc; the
+    existing POIs among them that no longer qualify come back as deleted.
+    """
+    if not keys:
+        return [], set()
+    ids = "".join(f"{kind}({osm_id});" for kind, osm_id in sorted(keys))
+    response = requests.post(url, data={"data": f"[out:json];({ids});out center tags;"}, timeout=300)
+    response.raise_for_status()
+    upserts, deleted = [], set(keys) & existing
+    for el in response.json().get("elements", []):
+        tags = el.get("tags", {})
+        category = classify(tags)
+        center = el.get("center")
+        if category is None or center is None:
+            continue
+        upserts.append(
+            {"element": el["type"], "id": int(el["id"]), "name": tags.get("name"),
+             **{k: tags.get(k) for k in POI_TAGS}, "category": category,
+             "geometry": Point(center["lon"], center["lat"])}
+        )
+    return upserts, deleted
+
+
+def containing_city(points, neighborhoods) -> np.ndarray:
+    """City of the neighborhood containing each point (the nearest one for points outside all)."""
+    centers = gpd.GeoDataFrame(
+        geometry=points.geometry.centroid, crs=points.crs
+    ).to_crs(neighborhoods.crs)
+    hit = gpd.sjoin_nearest(centers, neighborhoods[["city", "geometry"]], how="left")
+    hit = hit[~hit.index.duplicated(keep="first")]
+    return hit["city"].reindex(centers.index).to_numpy()
+
+
+def apply_changes(upserts, deleted, base: str) -> pd.DataFrame:
+    """
+    Patch pois.geojson in release directory `base` and recount only the
+    neighborhoods the changes touch.
+
+    Returns the changed points (lon, lat, category, and sign: -1 removed,
+    +1 added) for patching the derived artifacts.
+    """
+    pois_path = os.path.join(base, "pois.geojson")
+    pois = gpd.read_file(pois_path)
+    neighborhoods = gpd.read_file(os.path.join(base, "neighborhoods_full.geojson"))
+
+    keys = pd.MultiIndex.from_arrays([pois["element"], pois["id"].astype(int)])
+    new = None
+    if upserts:
+        new = gpd.GeoDataFrame(upserts, geometry="geometry", crs="EPSG:4326").to_crs(pois.crs)
+    replaced = set(deleted)
+    if new is not None:
+        replaced |= set(zip(new["element"], new["id"]))
+
+    touched = keys.isin(list(replaced))
+    old_points = pois[touched]
+    pois = pois[~touched]
+    if new is not None:
+        new["city"] = containing_city(new, neighborhoods)
+        pois = pd.concat([pois, new], ignore_index=True)
+
+    # Neighborhoods that lost or gained a POI
+    moved = pd.concat([old_points.geometry, new.geometry if new is not None else None])
+    moved = gpd.GeoDataFrame(geometry=moved.centroid, crs=pois.crs).to_crs(neighborhoods.crs)
+    hit = gpd.sjoin(moved, neighborhoods[["geometry"]], predicate="within")
+    # Rows, not names: two polygons share the name "West Point Grey"
+    affected = sorted(set(hit["index_right"].tolist()))
+
+    pois.to_file(pois_path, driver="GeoJSON")
+    print(f"Applied {len(upserts)} upserts and {len(deleted)} deletions; "
+          f"recounting {len(affected)} neighborhoods")
+    if affected:
+        recount(neighborhoods, pois, affected, base)
+
+    changed = [poi_table(old_points).assign(sign=-1)]
+    if new is not None:
+        changed.append(poi_table(new).assign(sign=1))
+    return pd.concat(changed, ignore_index=True)[["lon", "lat", "category", "sign"]]
+
+
+def rebuild_derived(base: str, changed: pd.DataFrame):
+    """
+    Bring the store files of release `base` in line with its patched POIs
+    and counts: the density surfaces are patched around `changed`, and only
+    POI_ARTIFACTS are rebuilt (plus anything the release is missing).
+    """
+    from density import density_path, patch_density_surfaces
+    from spatial_weights import weights_path
+
+    only = list(POI_ARTIFACTS)
+    if os.path.exists(os.path.join(density_path(base), "meta.json")):
+        patch_density_surfaces(
+            changed["lon"].to_numpy(), changed["lat"].to_numpy(),
+            changed["category"].to_numpy(), changed["sign"].to_numpy(),
+            density_path(base),
+        )
+    else:
+        only.append("density")
+    if not os.path.exists(weights_path(base)):
+        only.append("spatial_weights")
+    run_step("04_build_store.py", base, "--only", ",".join(only))
+
+
+def recount(neighborhoods, pois, affected, base: str):
+    """Same counts and densities as 02_compute_amenity_metrics.py, for the `affected` rows only."""
+    rows = list(affected)
+    points = gpd.GeoDataFrame(
+        pois[["category"]], geometry=pois.geometry.centroid, crs=pois.crs
+    ).to_crs(neighborhoods.crs)
+    joined = gpd.sjoin(points, neighborhoods.loc[rows, ["geometry"]], predicate="within")
+    counts = (
+        joined.groupby(["index_right", "category"]).size().unstack(fill_value=0)
+        .reindex(index=rows, columns=CATEGORIES, fill_value=0)
+    )
+
+    for col in CATEGORIES:
+        neighborhoods.loc[rows, col] = counts[col].to_numpy()
+    area = neighborhoods.loc[rows, "area_km2"]
+    neighborhoods.loc[rows, "schools_per_km2"] = neighborhoods.loc[rows, "school"] / area
+    neighborhoods.loc[rows, "transit_per_km2"] = neighborhoods.loc[rows, "transit"] / area
+    neighborhoods.loc[rows, "amenities_per_km2"] = (
+        neighborhoods.loc[rows, "mall"] + neighborhoods.loc[rows, "park"]
+        + neighborhoods.loc[rows, "hospital"]
+    ) / area
+
+    neighborhoods.to_file(os.path.join(base, "neighborhoods_full.geojson"), driver="GeoJSON")
+    neighborhoods.drop(columns="geometry").to_parquet(
+        os.path.join(base, "neighborhood_metrics.parquet"), index=False
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply OSM changes to the local POI store.")
+    parser.add_argument("osc", nargs="*", help="osmChange files; without them, query Overpass newer:")
+    parser.add_argument("--overpass-url", default=OVERPASS_URL)
+    args = parser.parse_args()
+
+    live = processed_dir()
+    since = read_state(live)
+    print(f"Local POIs reflect OSM as of {since}")
+    existing = poi_keys(live)
+
+    if args.osc:
+        upserts, deleted, refetch, newest = changes_from_osc(args.osc, existing)
+        more, gone = refetch_elements(refetch, existing, args.overpass_url)
+        upserts += more
+        deleted |= gone
+        timestamp = max(since, newest)
+    else:
+        neighborhoods = gpd.read_file(os.path.join(live, "neighborhoods.geojson"))
+        west, south, east, north = neighborhoods.to_crs(epsg=4326).total_bounds
+        upserts, deleted, timestamp = changes_from_overpass(
+            since, (south, west, north, east), existing, args.overpass_url
+        )
+
+    if not (upserts or deleted):
+        # Same data, known to be current up to `timestamp`: only the state
+        # file moves, and it is replaced atomically
+        print("No changes")
+        write_state(timestamp, live)
+        return
+
+    # Patch a copy of the live release and publish it like a refresh: the
+    # app never sees POIs and metrics from different points in the update.
+    release, staging = stage_release()
+    try:
+        shutil.copytree(live, staging, dirs_exist_ok=True)
+        changed = apply_changes(upserts, deleted, staging)
+        write_state(timestamp, staging)
+        rebuild_derived(staging, changed)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    publish(release, staging)
+
+
+if __name__ == "__main__":
+    main()
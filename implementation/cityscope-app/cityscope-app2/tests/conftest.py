@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+
+@pytest.fixture
+def releases(tmp_path, monkeypatch):
+    """An empty data/releases + data/current pair; the live data is the shipped data/processed."""
+    import refresh_service
+    import store
+
+    # The pipeline scripts use paths relative to the app root
+    monkeypatch.chdir(ROOT)
+    monkeypatch.delenv("CITYSCOPE_DATA_PROCESSED", raising=False)
+    monkeypatch.setenv("CITYSCOPE_CACHE_DIR", str(tmp_path / "memo"))
+    releases_dir, pointer = str(tmp_path / "releases"), str(tmp_path / "current")
+    for module in (store, refresh_service):
+        monkeypatch.setattr(module, "RELEASES_DIR", releases_dir)
+        monkeypatch.setattr(module, "CURRENT_POINTER", pointer)
+    return releases_dir
@@ -0,0 +1,38 @@
+import importlib
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import ingest_gtfs
+from conftest import ROOT
+
+PROCESSED = os.path.join(ROOT, "data", "processed")
+GTFS_DIR = os.path.join(ROOT, "..", "apps", "api", "data", "real")
+
+
+@pytest.fixture
+def release(tmp_path, monkeypatch):
+    for name in ["neighborhoods.geojson", "pois.geojson"]:
+        shutil.copy(os.path.join(PROCESSED, name), tmp_path / name)
+    step02 = importlib.import_module("02_compute_amenity_metrics")
+    monkeypatch.setattr(step02, "DATA_PROCESSED", str(tmp_path))
+    monkeypatch.setattr(ingest_gtfs, "DATA_PROCESSED", str(tmp_path))
+    return tmp_path, step02
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(GTFS_DIR, "stops.txt")), reason="no GTFS stops")
+def test_transit_service_keeps_one_row_per_neighborhood(release):
+    tmp_path, step02 = release
+    stops = ingest_gtfs.load_stops(GTFS_DIR)
+    per_stop = pd.DataFrame({"stop_id": stops["stop_id"], "gtfs_stops": 1})
+    service = ingest_gtfs.aggregate_to_neighborhoods(stops, per_stop)
+    assert not service["neighborhood_name"].duplicated().any()
+    service.drop(columns="area_km2").to_parquet(tmp_path / "transit_service.parquet", index=False)
+
+    step02.compute_amenity_counts()
+    metrics = pd.read_parquet(tmp_path / "neighborhood_metrics.parquet")
+    expected = pd.read_parquet(os.path.join(PROCESSED, "neighborhood_metrics.parquet"))
+    assert metrics["neighborhood_name"].tolist() == expected["neighborhood_name"].tolist()
+    assert metrics["gtfs_stops"].notna().all()
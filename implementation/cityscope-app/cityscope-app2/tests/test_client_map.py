@@ -0,0 +1,43 @@
+import json
+import os
+
+import geopandas as gpd
+import shapely
+
+from client_map import feature_collection, map_data_url, write_map_data
+
+
+def frame(name):
+    return gpd.GeoDataFrame(
+        {"neighborhood_name": [name, "Kitsilano"], "composite_score": [50.0, 70.123], "avg_rent": [2000.0, 2500.0]},
+        geometry=[shapely.box(-123.1, 49.2, -123.0, 49.3), shapely.box(-123.2, 49.2, -123.1, 49.3)],
+        crs="EPSG:4326",
+    )
+
+
+def test_map_data_is_written_once_by_content(tmp_path):
+    directory = str(tmp_path / "data")
+    collection = feature_collection(frame("West End"), ["neighborhood_name", "composite_score"])
+
+    url = write_map_data(collection, directory)
+    assert url == write_map_data(collection, directory)
+    assert url.startswith("data/map_") and os.listdir(directory) == [os.path.basename(url)]
+    with open(os.path.join(tmp_path, url)) as f:
+        assert json.load(f) == collection
+
+    collection["features"][0]["properties"]["composite_score"] = 51.0
+    assert write_map_data(collection, directory) != url
+
+
+def test_features_carry_their_row_and_raw_names(tmp_path, monkeypatch):
+    import client_map
+
+    monkeypatch.setattr(client_map, "MAP_DATA_DIR", str(tmp_path / "data"))
+    # Names are fetched as JSON and rendered as text, never inlined as HTML
+    name = "</script><script>alert(1)</script>"
+    url = map_data_url(frame(name))
+    with open(os.path.join(tmp_path, url)) as f:
+        props = [feat["properties"] for feat in json.load(f)["features"]]
+    assert [p["row"] for p in props] == [0, 1]
+    assert props[0]["neighborhood_name"] == name
+    assert props[1]["composite_score"] == 70.12
@@ -0,0 +1,49 @@
+import datetime
+import importlib
+import os
+
+import pandas as pd
+import pytest
+
+import cmhc_workbook
+from conftest import ROOT
+
+WORKBOOK = os.path.join(ROOT, "data", "raw", "rmr-canada-2024-en.xlsx")
+
+
+@pytest.fixture
+def interim(tmp_path, monkeypatch):
+    monkeypatch.setattr(cmhc_workbook, "DATA_INTERIM", str(tmp_path))
+    return tmp_path
+
+
+def test_period_headers_read_as_survey_months():
+    assert cmhc_workbook._clean(datetime.datetime(2024, 10, 1)) == "Oct-24"
+    assert cmhc_workbook._period(datetime.date(2023, 10, 1)) == "Oct-23"
+    assert cmhc_workbook._period(45566) == "Oct-24"
+
+
+def test_period_date_orders_chronologically():
+    labels = ["Oct-24", "Apr-24", "Oct-23"]
+    assert sorted(labels, key=cmhc_workbook.period_date) == ["Oct-23", "Apr-24", "Oct-24"]
+    assert cmhc_workbook.period_date("Oct-23 to Oct-24") == cmhc_workbook.period_date("Oct-24")
+    assert cmhc_workbook.period_date("Rental Condo Apts") is pd.NaT
+
+
+def test_geography_levels():
+    assert cmhc_workbook._geography_level("Vancouver CMA") == "cma"
+    assert cmhc_workbook._geography_level("Total") == "total"
+    assert cmhc_workbook._geography_level("Ottawa-Gatineau CMA (Qué. part)") == "cma_part"
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_workbook_has_no_zone_rows(interim):
+    rows = cmhc_workbook.load_rms(WORKBOOK)
+    assert not (rows["geography_level"] == "zone").any()
+    assert {"Oct-23", "Oct-24"} <= set(rows["period"])
+
+
+def test_vancouver_avg_rent_2024(interim, monkeypatch):
+    merge = importlib.import_module("03_merge_rent_data")
+    monkeypatch.setattr(merge, "DATA_RAW", os.path.join(ROOT, "data", "raw"))
+    assert merge.load_vancouver_avg_rent_2024() == 2883
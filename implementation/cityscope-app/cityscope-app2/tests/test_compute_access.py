@@ -0,0 +1,21 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from compute_access import nearest_k_distances
+
+
+def test_nearest_k_matches_brute_force():
+    rng = np.random.default_rng(0)
+    px, py = rng.uniform(0, 5_000, (2, 200))
+    x, y = rng.uniform(-1_000, 6_000, (2, 1_000))
+    pois = gpd.GeoSeries(shapely.points(px, py), crs="EPSG:32610")
+
+    dist = nearest_k_distances(x, y, pois, 4)
+    brute = np.sort(np.hypot(x[:, None] - px, y[:, None] - py), axis=1)[:, :4]
+    assert np.allclose(dist, brute)
+
+    # Fewer POIs than k: the missing neighbors stay NaN
+    few = nearest_k_distances(x, y, pois.iloc[:2], 4)
+    assert np.allclose(few[:, :2], np.sort(np.hypot(x[:, None] - px[:2], y[:, None] - py[:2]), axis=1))
+    assert np.isnan(few[:, 2:]).all()
@@ -0,0 +1,40 @@
+import numpy as np
+
+from density import DensitySurfaces, build_density_surfaces, patch_density_surfaces
+
+BOUNDS = (-123.2, 49.2, -123.0, 49.3)
+
+
+def points(n, seed):
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(BOUNDS[0], BOUNDS[2], n)
+    lat = rng.uniform(BOUNDS[1], BOUNDS[3], n)
+    category = rng.choice(["school", "park"], n)
+    return lon, lat, category
+
+
+def test_patch_matches_a_rebuild(tmp_path):
+    lon, lat, category = points(200, seed=1)
+    patched = build_density_surfaces(lon, lat, category, BOUNDS, str(tmp_path / "patched"))
+
+    # Drop the first 5 points and add 3 schools
+    add_lon, add_lat, _ = points(3, seed=2)
+    add_cat = np.array(["school"] * 3)
+    patch_density_surfaces(
+        np.r_[lon[:5], add_lon], np.r_[lat[:5], add_lat], np.r_[category[:5], add_cat],
+        np.r_[-np.ones(5), np.ones(3)], patched,
+    )
+    rebuilt = build_density_surfaces(
+        np.r_[lon[5:], add_lon], np.r_[lat[5:], add_lat], np.r_[category[5:], add_cat],
+        BOUNDS, str(tmp_path / "rebuilt"),
+    )
+
+    a, b = DensitySurfaces(patched), DensitySurfaces(rebuilt)
+    assert a.meta["categories"]["school"]["points"] == b.meta["categories"]["school"]["points"]
+    probe_lon, probe_lat, _ = points(2_000, seed=3)
+    for name in ["school", "park"]:
+        # float16 tiles: equal to storage precision
+        np.testing.assert_allclose(
+            a.sample(name, probe_lon, probe_lat), b.sample(name, probe_lon, probe_lat),
+            rtol=2e-3, atol=1e-2,
+        )
@@ -0,0 +1,51 @@
+import os
+import shutil
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+
+import ingest_listings
+from conftest import ROOT
+
+
+@pytest.fixture
+def release(tmp_path):
+    base = tmp_path / "release"
+    base.mkdir()
+    shutil.copy(os.path.join(ROOT, "data", "processed", "neighborhoods.geojson"), base)
+    return str(base)
+
+
+def write_listings(path, dates):
+    nbhd = gpd.read_file(os.path.join(ROOT, "data", "processed", "neighborhoods.geojson"))
+    point = nbhd.geometry.iloc[0].representative_point()
+    point = gpd.GeoSeries([point], crs=nbhd.crs).to_crs(epsg=4326).iloc[0]
+    pd.DataFrame(
+        {"lat": point.y, "lon": point.x, "price": [2000.0 + 100 * i for i in range(len(dates))],
+         "bedrooms": 1, "date_listed": dates}
+    ).to_csv(path, index=False)
+
+
+def test_moved_file_is_not_ingested_twice(release, tmp_path):
+    first = tmp_path / "a" / "listings.csv"
+    first.parent.mkdir()
+    write_listings(first, ["2024-05-01", "2024-06-01"])
+    ingest_listings.ingest([str(first)], base=release)
+
+    moved = tmp_path / "b" / "listings.csv"
+    moved.parent.mkdir()
+    shutil.move(first, moved)
+    ingest_listings.ingest([str(moved)], base=release)
+
+    sketch = pd.read_parquet(os.path.join(release, ingest_listings.SKETCH_FILENAME))
+    assert sketch["count"].sum() == 2
+
+
+def test_since_excludes_undated_listings(release, tmp_path):
+    path = tmp_path / "listings.csv"
+    write_listings(path, ["2024-05-01", "not a date", "2023-01-01"])
+    ingest_listings.ingest([str(path)], since="2024-01", base=release)
+
+    summary = pd.read_parquet(os.path.join(release, ingest_listings.SUMMARY_FILENAME))
+    assert summary.loc[summary["bedroom_type"] == "all", "listings"].tolist() == [1]
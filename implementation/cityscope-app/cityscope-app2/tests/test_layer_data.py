@@ -0,0 +1,52 @@
+import base64
+import json
+import re
+
+import numpy as np
+
+from layer_data import deck_page, scatter_layer
+
+
+def decode(attribute):
+    dtype = {"float32": "<f4", "uint8": "u1"}[attribute["type"]]
+    values = np.frombuffer(base64.b64decode(attribute["value"]), dtype=dtype)
+    return values.reshape(-1, attribute["size"])
+
+
+def test_scatter_layer_ships_binary_attributes():
+    rng = np.random.default_rng(0)
+    lon, lat = -123.1 + rng.random(1000) * 0.2, 49.2 + rng.random(1000) * 0.1
+    radius = rng.random(1000) * 20
+    colors = rng.integers(0, 256, size=(1000, 3), dtype=np.uint8)
+
+    layer = scatter_layer("pois", lon, lat, colors, radius=radius, radius_units="pixels", pickable=True)
+    attributes = layer["attributes"]
+
+    assert layer["length"] == 1000
+    np.testing.assert_array_equal(
+        decode(attributes["getPosition"]), np.column_stack([lon, lat]).astype(np.float32)
+    )
+    np.testing.assert_array_equal(decode(attributes["getRadius"])[:, 0], radius.astype(np.float32))
+    np.testing.assert_array_equal(decode(attributes["getFillColor"]), colors)
+    assert attributes["getFillColor"]["normalized"]
+    assert layer["props"] == {"radiusUnits": "pixels", "pickable": True}
+    # Bytes per point, not JSON per point: 2 float32 + 1 float32 + 3 uint8
+    assert sum(len(base64.b64decode(a["value"])) for a in attributes.values()) == 1000 * 15
+
+
+def test_constant_color_and_tooltips():
+    layer = scatter_layer("parks", [-123.1, -123.2], [49.2, 49.3], [44, 160, 44],
+                          tooltip_html=np.array(["<b>A</b>", "<b>B</b>"], dtype=object))
+    assert layer["props"]["getFillColor"] == [44, 160, 44]
+    assert "getFillColor" not in layer["attributes"]
+    assert layer["tooltips"] == ["<b>A</b>", "<b>B</b>"]
+
+
+def test_deck_page_embeds_the_spec():
+    layers = [scatter_layer("x", [-123.1], [49.2], [1, 2, 3], tooltip_html=["</script><b>x</b>"])]
+    page = deck_page(layers, 49.2, -123.1, 14)
+
+    embedded = re.search(r'<script type="application/json" id="spec">(.*?)</script>', page, re.S).group(1)
+    spec = json.loads(embedded)
+    assert spec["view"] == {"latitude": 49.2, "longitude": -123.1, "zoom": 14}
+    assert spec["layers"] == layers
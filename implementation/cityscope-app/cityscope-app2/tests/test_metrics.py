@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics import NORMALIZERS, compute_scores, scenario_scores
+
+
+@pytest.mark.parametrize("normalizer", sorted(NORMALIZERS))
+def test_nan_stays_in_its_own_row(normalizer):
+    x = np.array([[1.0, 2.0], [2.0, np.nan], [3.0, 4.0], [np.nan, 6.0]])
+    out = NORMALIZERS[normalizer](x)
+
+    assert np.array_equal(np.isnan(out), np.isnan(x))
+    # The known values still spread out instead of collapsing to 50
+    for j in range(x.shape[1]):
+        known = out[~np.isnan(x[:, j]), j]
+        assert known[0] < known[-1]
+
+
+@pytest.mark.parametrize(
+    "weights, message",
+    [
+        ([0.5, -0.1, 0.3, 0.3], "non-negative"),
+        ([0, 0, 0, 0], "all be zero"),
+        ([0.5, np.nan, 0.3, 0.2], "finite"),
+        ([0.5, 0.5], "columns"),
+    ],
+)
+def test_invalid_weights_are_rejected(weights, message):
+    df = pd.DataFrame({"neighborhood_name": ["a", "b"]})
+    with pytest.raises(ValueError, match=message):
+        compute_scores.uncached(df, weights=weights)
+    with pytest.raises(ValueError, match=message):
+        scenario_scores(df, weights)
@@ -0,0 +1,54 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from name_index import M_PER_DEG_LAT, NameIndex, build_name_index, write_name_index
+from store import align_geometry
+
+PROCESSED = os.path.join(ROOT, "data", "processed")
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    metrics = pd.read_parquet(os.path.join(PROCESSED, "neighborhood_metrics.parquet"))
+    gdf = gpd.read_file(os.path.join(PROCESSED, "neighborhoods_full.geojson"))
+    pois = gpd.read_file(os.path.join(PROCESSED, "pois.geojson"))
+    ordered = gpd.GeoDataFrame(
+        {"neighborhood_name": metrics["neighborhood_name"].to_numpy()},
+        geometry=align_geometry(metrics, gdf),
+    )
+    path = str(tmp_path_factory.mktemp("name_index") / "name_index.npz")
+    return NameIndex(write_name_index(build_name_index(pois, ordered), path))
+
+
+def test_nearest_to_keys_rows_not_names(index):
+    hits = index.search("park")
+    nearest = index.nearest_to(hits)
+
+    # One result per neighborhood row, duplicated names included
+    assert len(nearest) == len(index.nbhd_names)
+    assert sorted(nearest["row"]) == list(range(len(index.nbhd_names)))
+    dupes = nearest[nearest["neighborhood_name"].duplicated(keep=False)]
+    assert len(dupes) > 1 and dupes["row"].is_unique
+
+    # Same answer as a brute-force scan over every hit
+    lat0 = np.radians(np.mean(index.nbhd_lat))
+    dx = (index.nbhd_lon[:, None] - hits["lon"].to_numpy()[None, :]) * np.cos(lat0)
+    dy = index.nbhd_lat[:, None] - hits["lat"].to_numpy()[None, :]
+    brute = np.hypot(dx, dy).min(axis=1) * M_PER_DEG_LAT
+    np.testing.assert_allclose(nearest.sort_values("row")["nearest_m"], brute, rtol=1e-6)
+    assert nearest["nearest_m"].is_monotonic_increasing
+
+
+def test_nearest_to_limits_rows(index):
+    rows = np.array([15, 2, 7])
+    nearest = index.nearest_to(index.search("safeway"), rows=rows)
+    assert sorted(nearest["row"]) == sorted(rows)
+    assert nearest.set_index("row")["neighborhood_name"].to_dict() == {
+        r: index.nbhd_names[r] for r in rows
+    }
+    assert index.nearest_to(index.search("no such place zzz")).empty
@@ -0,0 +1,39 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from poi_dataset import poi_table, write_poi_dataset
+from poi_store import PoiStore, build_poi_frame, dataset_columns, viewport_bbox, write_poi_store
+
+PROCESSED = os.path.join(ROOT, "data", "processed")
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    pois = gpd.read_file(os.path.join(PROCESSED, "pois.geojson"))
+    gdf = gpd.read_file(os.path.join(PROCESSED, "neighborhoods_full.geojson"))
+    base = tmp_path_factory.mktemp("pois")
+    store = PoiStore(write_poi_store(build_poi_frame(pois, gdf), str(base / "poi_store.arrow")))
+    dataset = write_poi_dataset(poi_table(pois, gdf), str(base / "pois_dataset"))
+    return store, dataset
+
+
+def points(lon, lat, tooltips):
+    # The store keeps float32 coordinates, the dataset float64
+    lon, lat = np.asarray(lon, dtype=np.float32).tolist(), np.asarray(lat, dtype=np.float32).tolist()
+    return sorted(zip(lon, lat, tooltips))
+
+
+@pytest.mark.parametrize("names", [None, ["Vancouver", "Chinatown", "West Point Grey"]])
+def test_dataset_viewport_matches_store(built, names):
+    store, dataset = built
+    lat, lon = store.center(["park", "school"], names)
+    bbox = viewport_bbox(lat, lon, 14)
+    for category in ["park", "school"]:
+        from_store = store.columns(category, names, bbox)
+        from_dataset = dataset_columns(category, names, bbox, dataset)
+        assert len(from_dataset[0]) > 0
+        assert points(*from_dataset) == points(*from_store)
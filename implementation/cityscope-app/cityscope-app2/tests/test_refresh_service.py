@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import ingest_listings
+import refresh_service
+import store
+
+
+@pytest.mark.slow
+def test_staged_refresh_goes_live(releases):
+    refresh_service.refresh(skip_download=True)
+
+    live = store.processed_dir()
+    assert os.path.dirname(live) == releases
+    metrics = pd.read_parquet(os.path.join(live, "neighborhood_metrics.parquet"))
+    shipped = pd.read_parquet(os.path.join(store.DATA_PROCESSED, "neighborhood_metrics.parquet"))
+    assert len(metrics) == len(shipped)
+    assert (metrics["avg_rent"] == 2883).all()
+    assert store.open_store(store.store_path(live)).num_rows == len(shipped)
+    assert not [name for name in os.listdir(releases) if name.startswith(".staging")]
+
+
+@pytest.mark.slow
+def test_carried_state_survives_a_refresh(releases, tmp_path):
+    old = os.path.join(releases, "20000101T000000Z")
+    shutil.copytree(store.DATA_PROCESSED, old)
+    listings = tmp_path / "2024-01.csv"
+    listings.write_text("lat,lon,price,bedrooms,date_listed\n49.26,-123.16,2400.0,1,2024-01-15\n")
+    state = {"osm_state.json": '{"timestamp_osm_base": "2024-01-01T00:00:00Z"}',
+             "rent_sketches_manifest.txt": ingest_listings.manifest_key(str(listings)) + "\n"}
+    for name, text in state.items():
+        with open(os.path.join(old, name), "w") as f:
+            f.write(text)
+    refresh_service.swap_current(os.path.basename(old))
+
+    refresh_service.refresh(skip_download=True)
+
+    live = store.processed_dir()
+    assert live != old
+    for name, text in state.items():
+        with open(os.path.join(live, name)) as f:
+            assert f.read() == text
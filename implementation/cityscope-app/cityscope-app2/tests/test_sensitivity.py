@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics import SCORE_COLUMNS
+from sensitivity import MIN_SAMPLES, RANK_BINS, rank_stability, sample_weights
+
+
+def scored_frame(n, seed=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.uniform(0, 100, (n, len(SCORE_COLUMNS))), columns=SCORE_COLUMNS)
+    df["neighborhood_name"] = [f"n{i}" for i in range(n)]
+    df["composite_score"] = df[SCORE_COLUMNS].mean(axis=1)
+    return df
+
+
+def test_rank_percentiles_are_exact():
+    df = scored_frame(12)
+    n_samples = MIN_SAMPLES
+    out = rank_stability(df, n_samples=n_samples, top_k=3).set_index("neighborhood_name")
+
+    # Reference: full rank array, one argsort per sample
+    scores = df[SCORE_COLUMNS].to_numpy(dtype=np.float32) @ sample_weights(n_samples).T
+    ranks = np.argsort(np.argsort(-scores, axis=0), axis=0) + 1
+    out = out.loc[df["neighborhood_name"]]
+    assert np.array_equal(out["rank_p05"], np.percentile(ranks, 5, axis=1, method="inverted_cdf"))
+    assert np.array_equal(out["rank_p95"], np.percentile(ranks, 95, axis=1, method="inverted_cdf"))
+    assert np.allclose(out["mean_rank"], ranks.mean(axis=1))
+    assert np.allclose(out["p_top_k"], (ranks <= 3).mean(axis=1))
+
+
+def test_large_sets_use_fewer_samples():
+    assert rank_stability(scored_frame(37)).attrs["n_samples"] == 100_000
+    assert rank_stability(scored_frame(3_000)).attrs["n_samples"] == 10_000
+
+
+def test_percentiles_past_the_rank_bins_are_nan():
+    df = scored_frame(RANK_BINS + 100)
+    out = rank_stability(df, n_samples=MIN_SAMPLES, top_k=5).set_index("neighborhood_name")
+    out = out.loc[df["neighborhood_name"]]
+
+    scores = df[SCORE_COLUMNS].to_numpy(dtype=np.float32) @ sample_weights(MIN_SAMPLES).T
+    ranks = np.argsort(np.argsort(-scores, axis=0), axis=0) + 1
+    p95 = np.percentile(ranks, 95, axis=1, method="inverted_cdf")
+
+    # Mean rank comes from running sums and stays exact; percentiles are
+    # exact within RANK_BINS and NaN past it
+    assert np.allclose(out["mean_rank"], ranks.mean(axis=1))
+    inside = p95 <= RANK_BINS
+    assert 0 < inside.sum() < len(df)
+    assert np.array_equal(out["rank_p95"].to_numpy()[inside], p95[inside])
+    assert np.isnan(out["rank_p95"].to_numpy()[~inside]).all()
+
+
+def test_too_few_samples_is_an_error():
+    with pytest.raises(ValueError, match="at least"):
+        rank_stability(scored_frame(5), n_samples=MIN_SAMPLES - 1)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from metrics import SCORE_COLUMNS
+from similarity import SimilarityIndex, display_labels
+
+
+def scored_frame():
+    df = pd.DataFrame(
+        {
+            "neighborhood_name": ["West Point Grey", "Kitsilano", "West Point Grey", "Fairview"],
+            "city": ["Vancouver"] * 4,
+            "avg_rent": [3000.0, 2800.0, 3100.0, np.nan],
+        }
+    )
+    for i, col in enumerate(SCORE_COLUMNS):
+        df[col] = [10.0 + i, 50.0, 12.0 + i, 90.0]
+    return df
+
+
+def test_duplicate_names_get_their_own_rows():
+    index = SimilarityIndex(scored_frame())
+    assert list(index.labels) == ["West Point Grey (1)", "Kitsilano", "West Point Grey (2)", "Fairview"]
+
+    # Each West Point Grey polygon is the other's nearest match
+    assert index.query(index.row_of("West Point Grey (1)"), k=1)["row"].tolist() == [2]
+    assert index.query(index.row_of("West Point Grey (2)"), k=1)["neighborhood"].tolist() == [
+        "West Point Grey (1)"
+    ]
+
+
+def test_cities_tell_duplicates_apart_when_they_can():
+    labels = display_labels(["Central", "Central", "Central"], ["Burnaby", "Surrey", "Surrey"])
+    assert list(labels) == ["Central (Burnaby)", "Central (1)", "Central (2)"]
+
+
+def test_missing_values_are_imputed_with_the_mean():
+    index = SimilarityIndex(scored_frame())
+    rent = index.columns.index("avg_rent")
+    # Fairview's missing rent sits at the mean (0 after z-scoring), not at $0
+    assert index.features[3, rent] == 0.0
+    assert np.isclose(index.features[:3, rent].mean(), 0.0, atol=1e-6)
+    assert np.isfinite(index.features).all()
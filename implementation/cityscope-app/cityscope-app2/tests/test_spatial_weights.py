@@ -0,0 +1,47 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from metrics import SCORE_COLUMNS
+from spatial_weights import SpatialWeights, smooth_scores
+from store import align_geometry
+
+
+@pytest.fixture
+def row_of_squares():
+    # a | b | a: the two "a" polygons are different places
+    names = ["a", "b", "a"]
+    gdf = gpd.GeoDataFrame(
+        {"neighborhood_name": names}, geometry=[box(i, 0, i + 1, 1) for i in range(3)], crs="EPSG:3857"
+    )
+    scored = pd.DataFrame({"neighborhood_name": names})
+    for k, col in enumerate(SCORE_COLUMNS):
+        scored[col] = [0.0, 30.0, 90.0]
+    scored["composite_score"] = 0.0
+    return gdf, scored
+
+
+def test_smoothing_with_duplicated_names(row_of_squares):
+    gdf, scored = row_of_squares
+    ordered = gpd.GeoDataFrame(scored[["neighborhood_name"]], geometry=align_geometry(scored, gdf))
+    weights = SpatialWeights.from_polygons(ordered)
+
+    out = smooth_scores(scored, weights, strength=1.0)
+    assert len(out) == 3
+    # Each "a" sees only "b"; "b" sees both ends
+    np.testing.assert_allclose(out[f"{SCORE_COLUMNS[0]}_lag"], [30.0, 45.0, 30.0])
+
+
+def test_smoothing_rejects_reordered_rows(row_of_squares):
+    gdf, scored = row_of_squares
+    weights = SpatialWeights.from_polygons(gdf)
+    with pytest.raises(ValueError):
+        smooth_scores(scored.iloc[[1, 0, 2]], weights)
+
+
+def test_align_geometry_refuses_ambiguous_names(row_of_squares):
+    gdf, scored = row_of_squares
+    with pytest.raises(pd.errors.MergeError):
+        align_geometry(scored.iloc[[1, 0, 2]], gdf)
@@ -0,0 +1,42 @@
+import os
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from conftest import ROOT
+from metrics import compute_scores
+from snapshot import display_rows, read_snapshot, write_snapshot
+from store import geometry_frame, metrics_frame, open_store, write_store
+
+PROCESSED = os.path.join(ROOT, "data", "processed")
+
+
+def test_store_rows_match_metrics(tmp_path):
+    metrics = pd.read_parquet(os.path.join(PROCESSED, "neighborhood_metrics.parquet"))
+    gdf = gpd.read_file(os.path.join(PROCESSED, "neighborhoods_full.geojson"))
+    assert metrics["neighborhood_name"].duplicated().any()
+
+    table = open_store(write_store(metrics, gdf, str(tmp_path / "store.arrow")))
+    assert table.num_rows == len(metrics)
+    assert metrics_frame(table)["neighborhood_name"].tolist() == metrics["neighborhood_name"].tolist()
+
+    # Each row keeps its own polygon, duplicated name or not
+    geoms = geometry_frame(table).geometry.to_numpy()
+    assert shapely.equals(geoms, gdf.geometry.to_numpy()).all()
+
+
+def test_snapshot_rows_keep_their_own_geometry(tmp_path):
+    metrics = pd.read_parquet(os.path.join(PROCESSED, "neighborhood_metrics.parquet"))
+    gdf = gpd.read_file(os.path.join(PROCESSED, "neighborhoods_full.geojson"))
+    scored = compute_scores.uncached(metrics, normalizer="min_max")
+
+    snapshot = read_snapshot(write_snapshot(scored, gdf, str(tmp_path / "snapshot.arrow")))
+    dupes = snapshot[snapshot["neighborhood_name"].duplicated(keep=False)]
+    assert dupes["display_geojson"].nunique() == len(dupes) > 1
+
+    # A filtered frame gets one display row per scored row, not per name match
+    scores = scored.loc[dupes.index, ["neighborhood_name", "composite_score"]]
+    rows = display_rows(snapshot.drop(columns=scored.columns.drop("neighborhood_name")), scores)
+    assert len(rows) == len(scores)
+    assert rows["display_geojson"].tolist() == dupes["display_geojson"].tolist()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import sys
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+
+import refresh_service
+import store
+import update_osm
+from density import DensitySurfaces, density_path
+from spatial_weights import weights_path
+
+OSC = """<?xml version="1.0" encoding="UTF-8"?>
+<osmChange version="0.6">
+  <create>
+    <node id="9999999999" lat="{lat}" lon="{lon}" timestamp="2025-01-02T00:00:00Z">
+      <tag k="amenity" v="school"/>
+      <tag k="name" v="Test School"/>
+    </node>
+  </create>
+</osmChange>
+"""
+
+
+DIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<osmChange version="0.6">
+  <create>
+    <node id="1" lat="49.25" lon="-123.1" timestamp="2025-01-02T00:00:00Z"><tag k="amenity" v="school"/></node>
+  </create>
+  <modify>
+    <node id="2" lat="49.25" lon="-123.1" timestamp="2025-01-02T00:00:00Z"><tag k="amenity" v="bench"/></node>
+    <node id="3" lat="49.25" lon="-123.1" timestamp="2025-01-02T00:00:00Z"><tag k="amenity" v="bench"/></node>
+  </modify>
+  <delete>
+    <node id="1" lat="49.25" lon="-123.1" timestamp="2025-01-03T00:00:00Z"/>
+    <node id="4" lat="49.25" lon="-123.1" timestamp="2025-01-03T00:00:00Z"/>
+  </delete>
+</osmChange>
+"""
+
+
+def test_only_existing_pois_are_deleted(tmp_path):
+    osc = tmp_path / "change.osc"
+    osc.write_text(DIFF)
+    existing = {("node", 3), ("node", 4)}
+
+    upserts, deleted, refetch, newest = update_osm.changes_from_osc([str(osc)], existing)
+    # node 1 was created and deleted within the diff; node 2 was never a POI
+    assert upserts == [] and refetch == set()
+    assert deleted == {("node", 3), ("node", 4)}
+    assert newest == "2025-01-03T00:00:00Z"
+
+
+def test_new_pois_take_their_neighborhood_city():
+    neighborhoods = gpd.GeoDataFrame(
+        {"city": ["Vancouver", "Burnaby"]},
+        geometry=[shapely.box(0, 0, 1, 1), shapely.box(1, 0, 2, 1)],
+        crs="EPSG:3857",
+    )
+    points = gpd.GeoDataFrame(
+        geometry=[shapely.Point(1.5, 0.5), shapely.Point(0.5, 0.5), shapely.Point(2.5, 0.5)],
+        crs="EPSG:3857",
+    )
+    # The last point lies outside both and takes the nearest one's city
+    assert update_osm.containing_city(points, neighborhoods).tolist() == ["Burnaby", "Vancouver", "Burnaby"]
+
+
+@pytest.mark.slow
+def test_changes_are_published_as_a_new_release(releases, tmp_path, monkeypatch):
+    old = os.path.join(releases, "20000101T000000Z")
+    shutil.copytree(store.DATA_PROCESSED, old)
+    update_osm.write_state("2025-01-01T00:00:00Z", old)
+    refresh_service.run_step("04_build_store.py", old)
+    refresh_service.swap_current(os.path.basename(old))
+
+    nbhd = gpd.read_file(os.path.join(old, "neighborhoods_full.geojson"))
+    point = gpd.GeoSeries([nbhd.geometry.iloc[0].representative_point()], crs=nbhd.crs).to_crs(epsg=4326)
+    osc = tmp_path / "change.osc"
+    osc.write_text(OSC.format(lat=point.y.iloc[0], lon=point.x.iloc[0]))
+    old_schools = pd.read_parquet(os.path.join(old, "neighborhood_metrics.parquet"))["school"]
+
+    monkeypatch.setattr(sys, "argv", ["update_osm.py", str(osc)])
+    update_osm.main()
+
+    live = store.processed_dir()
+    assert live != old
+    assert update_osm.read_state(live) == "2025-01-02T00:00:00Z"
+    assert update_osm.read_state(old) == "2025-01-01T00:00:00Z"
+    # The old release is untouched; the new one has the school, store included
+    assert len(gpd.read_file(os.path.join(live, "pois.geojson"))) == len(
+        gpd.read_file(os.path.join(old, "pois.geojson"))
+    ) + 1
+    metrics = store.metrics_frame(store.open_store(store.store_path(live)))
+    assert metrics["school"].iloc[0] == old_schools.iloc[0] + 1
+    assert (pd.read_parquet(os.path.join(old, "neighborhood_metrics.parquet"))["school"] == old_schools).all()
+
+    # Density surfaces are patched in place of a rebuild; weights are reused
+    old_density, new_density = DensitySurfaces(density_path(old)), DensitySurfaces(density_path(live))
+    assert new_density.meta["categories"]["school"]["points"] == (
+        old_density.meta["categories"]["school"]["points"] + 1
+    )
+    assert new_density.meta["categories"]["park"] == old_density.meta["categories"]["park"]
+    with open(weights_path(old), "rb") as a, open(weights_path(live), "rb") as b:
+        assert a.read() == b.read()
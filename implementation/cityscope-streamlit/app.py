@@ -1,8 +1,12 @@
+import re
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import pydeck as pdk
 
+from poi_data import NameIndex, PoiStore, load_poi_points, nearest_places
+
 # --------- PAGE CONFIG & BASIC STYLING ----------
 st.set_page_config(
     page_title="CityScope – Neighbourhood Explorer",
@@ -34,37 +38,75 @@ st.markdown(
 )
 
 # --------- LOAD DATA ----------
-@st.cache_data
+# Amenity radius (m) around each centroid used when poi_counts.csv has only one
+DEFAULT_RADIUS_M = 1000
+
+
+# cache_resource, not cache_data: one copy per process shared by every
+# session instead of a deserialized copy each. Callers must not mutate these.
+@st.cache_resource
 def load_data():
     neigh_df = pd.read_csv("data/neighbourhoods.csv")
     rent_df = pd.read_csv("data/rents.csv")
 
-    # Aggregated amenity counts per neighbourhood
+    # Aggregated amenity counts per neighbourhood (and radius)
     try:
         poi_counts_df = pd.read_csv("data/poi_counts.csv")
     except FileNotFoundError:
         poi_counts_df = pd.DataFrame({
             "neighbourhood_id": neigh_df["neighbourhood_id"],
+            "radius_m": DEFAULT_RADIUS_M,
             "schools": 0,
             "restaurants": 0,
             "transit_stops": 0,
             "parks": 0,
             "grocery": 0,
         })
+    if "radius_m" not in poi_counts_df.columns:
+        # Written before build_osm_pois.py counted several radii
+        poi_counts_df["radius_m"] = DEFAULT_RADIUS_M
 
     # Individual OSM POI points
-    try:
-        poi_points_df = pd.read_csv("data/osm_pois.csv")
-    except FileNotFoundError:
-        poi_points_df = pd.DataFrame(
-            columns=["neighbourhood_id", "category", "name", "lat", "lon"]
-        )
+    poi_points_df = load_poi_points()
 
     return neigh_df, rent_df, poi_counts_df, poi_points_df
 
 
 neigh_df, rent_df, poi_counts_df, poi_points_df = load_data()
-neigh_df = neigh_df.merge(poi_counts_df, on="neighbourhood_id", how="left")
+
+
+@st.cache_resource
+def load_poi_store() -> PoiStore:
+    return PoiStore(load_data()[3])
+
+
+@st.cache_resource
+def load_name_index() -> NameIndex:
+    return NameIndex(load_data()[3])
+
+
+# Built once per (category, visible set): reruns that keep the same
+# neighbourhoods visible reuse the layer instead of filtering POIs again
+@st.cache_resource(max_entries=64)
+def poi_layer(category: str, neighbourhood_ids: tuple, within_m, color: tuple, radius: int):
+    df_cat = load_poi_store().rows(category, neighbourhood_ids, within_m)
+    if df_cat.empty:
+        return None
+    # float32 in memory; ~1 m precision on the wire (float32 repr is long JSON)
+    data = df_cat.assign(
+        lat=df_cat["lat"].to_numpy(dtype=np.float64).round(5),
+        lon=df_cat["lon"].to_numpy(dtype=np.float64).round(5),
+    )
+    return pdk.Layer(
+        "ScatterplotLayer",
+        data=data,
+        get_position="[lon, lat]",
+        get_radius=radius,
+        get_fill_color=list(color),
+        pickable=True,
+        opacity=0.7,
+    )
+
 
 # Safety checks
 required_neigh_cols = {"neighbourhood_id", "name", "lat", "lon", "population"}
@@ -80,6 +122,18 @@ if missing_r:
     st.stop()
 
 # --------- SCORE CALCULATION ----------
+def min_max_columns(values: pd.DataFrame) -> pd.DataFrame:
+    """0-1 min-max of every column at once; constant columns score 0.5."""
+    x = values.to_numpy(dtype=np.float64)
+    lo = x.min(axis=0)
+    span = x.max(axis=0) - lo
+    scaled = np.where(span < 1e-9, 0.5, (x - lo) / (span + 1e-9))
+    return pd.DataFrame(scaled, index=values.index, columns=values.columns)
+
+
+# persist="disk": scores survive restarts and deploys (warm_cache.py fills
+# them for the default sidebar state before traffic arrives)
+@st.cache_data(persist="disk", max_entries=64)
 def compute_scores(neigh_df: pd.DataFrame, rent_df: pd.DataFrame, bed_type: str, year: int) -> pd.DataFrame:
     """
     Score is based ONLY on:
@@ -103,37 +157,20 @@ def compute_scores(neigh_df: pd.DataFrame, rent_df: pd.DataFrame, bed_type: str,
     r_min, r_max = df["avg_rent"].min(), df["avg_rent"].max()
     df["rent_score"] = 1 - (df["avg_rent"] - r_min) / (r_max - r_min + 1e-9)
 
-    # 2) Size score from population (bigger = more options)
-    p_min, p_max = df["population"].min(), df["population"].max()
-    if p_max - p_min < 1e-9:
-        df["size_score"] = 0.5
-    else:
-        df["size_score"] = (df["population"] - p_min) / (p_max - p_min + 1e-9)
-
-    # 3) Transit score from transit_stops count
-    if "transit_stops" in df.columns:
-        t_min, t_max = df["transit_stops"].min(), df["transit_stops"].max()
-        if t_max - t_min < 1e-9:
-            df["transit_score"] = 0.5
-        else:
-            df["transit_score"] = (df["transit_stops"] - t_min) / (t_max - t_min + 1e-9)
-    else:
-        df["transit_score"] = 0.5
+    # 2) Size score from population (bigger = more options) and
+    # 3) transit score from transit_stops count, in one pass
+    size_transit = ["population"] + (["transit_stops"] if "transit_stops" in df.columns else [])
+    scaled = min_max_columns(df[size_transit])
+    df["size_score"] = scaled["population"]
+    df["transit_score"] = scaled["transit_stops"] if "transit_stops" in scaled.columns else 0.5
 
     # 4) Amenities score from schools + restaurants + parks + grocery
     amenity_cols = [c for c in ["schools", "restaurants", "parks", "grocery"] if c in df.columns]
     if amenity_cols:
-        norm_cols = []
-        for col in amenity_cols:
-            c_min, c_max = df[col].min(), df[col].max()
-            norm_col = f"{col}_norm"
-            if c_max - c_min < 1e-9:
-                df[norm_col] = 0.5
-            else:
-                df[norm_col] = (df[col] - c_min) / (c_max - c_min + 1e-9)
-            norm_cols.append(norm_col)
-
-        df["amenities_score"] = df[norm_cols].mean(axis=1)
+        norm = min_max_columns(df[amenity_cols])
+        norm.columns = [f"{col}_norm" for col in amenity_cols]
+        df[norm.columns] = norm
+        df["amenities_score"] = norm.to_numpy().mean(axis=1)
     else:
         df["amenities_score"] = 0.5
 
@@ -176,13 +213,37 @@ def interpret_requirements(text: str) -> dict:
     return intents
 
 
-def recommend_neighbourhoods(df: pd.DataFrame, user_text: str, top_n: int = 5):
+# "near Whole Foods", "near the UBC campus, ..." -> the place phrase
+NEAR_PATTERN = re.compile(r"\bnear (?:an? |the )?([\w' &.-]+?)(?:[,;!?]|\.(?:\s|$)|\band\b|$)", re.IGNORECASE)
+
+
+def place_phrase(text: str) -> str:
+    """The place named after "near" in free text, or ""."""
+    match = NEAR_PATTERN.search(text)
+    return match.group(1).strip() if match else ""
+
+
+@st.cache_data(max_entries=32)
+def recommend_neighbourhoods(df: pd.DataFrame, user_text: str, top_n: int = 5,
+                             near_km=None, near_place=None, near_label: str = ""):
+    """
+    `near_km` / `near_place` (aligned with `df` rows) come from
+    nearest_places() for a searched place; closer neighbourhoods get a boost.
+    """
     intents = interpret_requirements(user_text)
     rec_df = df.copy()
 
     # Start from total_score and gently push based on intents
     score = rec_df["total_score"].copy()
 
+    if near_km is not None:
+        rec_df["near_km"] = np.round(near_km, 2)
+        rec_df["nearest_place"] = near_place
+        # 1 for the closest neighbourhood, 0 for the farthest
+        span = np.nanmax(near_km) - np.nanmin(near_km)
+        closeness = 1 - (near_km - np.nanmin(near_km)) / (span + 1e-9)
+        score += 0.5 * np.nan_to_num(closeness)
+
     if intents["budget"]:
         # prioritize affordability
         score += rec_df["rent_score"] * 0.4
@@ -234,6 +295,9 @@ def recommend_neighbourhoods(df: pd.DataFrame, user_text: str, top_n: int = 5):
     if intents["quiet"]:
         reasons.append("• I slightly down-ranked the **most dense / busy** neighbourhoods to keep things quieter.")
 
+    if near_km is not None:
+        reasons.append(f"• I favoured neighbourhoods **close to {near_label}**.")
+
     if not reasons:
         reasons.append("• I used your current weights and overall score to find the best matches.")
 
@@ -279,6 +343,18 @@ if city_col:
 else:
     selected_city = "All"
 
+radii = sorted(poi_counts_df["radius_m"].unique().tolist())
+if len(radii) > 1:
+    st.sidebar.markdown("---")
+    radius_m = st.sidebar.select_slider(
+        "Amenity radius (m)",
+        options=radii,
+        value=DEFAULT_RADIUS_M if DEFAULT_RADIUS_M in radii else radii[-1],
+        help="Count (and show) amenities within this distance of each neighbourhood centre.",
+    )
+else:
+    radius_m = radii[0]
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("**Show on map**")
 show_schools     = st.sidebar.checkbox("Schools", True)
@@ -288,6 +364,11 @@ show_parks       = st.sidebar.checkbox("Parks", False)
 show_grocery     = st.sidebar.checkbox("Grocery / Markets", False)
 
 # --------- COMPUTE SCORES & FILTER ----------
+neigh_df = neigh_df.merge(
+    poi_counts_df[poi_counts_df["radius_m"] == radius_m].drop(columns="radius_m"),
+    on="neighbourhood_id",
+    how="left",
+)
 score_df = compute_scores(neigh_df, rent_df, bed_type, year)
 score_df = apply_weights(score_df, w_rent, w_transit, w_amenities, w_size)
 
@@ -309,9 +390,10 @@ if filtered_df.empty:
     st.warning("No neighbourhoods match your filters. Try relaxing them.")
     st.stop()
 
-# Filter OSM POIs to only the visible neighbourhoods
-visible_neighbourhood_ids = set(filtered_df["neighbourhood_id"])
-poi_points_visible = poi_points_df[poi_points_df["neighbourhood_id"].isin(visible_neighbourhood_ids)].copy()
+# OSM POIs of the visible neighbourhoods are sliced from the store per layer
+visible_neighbourhood_ids = tuple(sorted(filtered_df["neighbourhood_id"]))
+# Single-radius data: every stored POI belongs to that radius
+poi_within_m = radius_m if len(radii) > 1 else None
 
 # --------- PAGE HEADER ----------
 st.markdown('<div class="big-title">CityScope – Neighbourhood Explorer</div>', unsafe_allow_html=True)
@@ -320,6 +402,125 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# --------- FRAGMENTS ----------
+# Widgets inside a fragment rerun only that fragment: picking neighbourhoods
+# to compare or asking the assistant does not rebuild the map and tables.
+@st.fragment
+def compare_section(df: pd.DataFrame):
+    st.subheader("Compare neighbourhoods")
+
+    selected_names = st.multiselect(
+        "Select neighbourhoods to compare:",
+        options=list(df["name"].unique()),
+    )
+
+    if selected_names:
+        compare_df = df[df["name"].isin(selected_names)].copy()
+
+        metrics_for_compare = [
+            "avg_rent",
+            "population",
+            "transit_stops",
+            "total_amenities",
+            "rent_score",
+            "transit_score",
+            "amenities_score",
+            "size_score",
+            "total_score",
+        ]
+        metrics_for_compare = [m for m in compare_df.columns if m in metrics_for_compare]
+
+        st.write("Raw metrics:")
+        st.dataframe(compare_df[["name"] + metrics_for_compare].reset_index(drop=True))
+
+        metric_to_plot = st.selectbox(
+            "Pick a metric to visualize:",
+            metrics_for_compare,
+            index=metrics_for_compare.index("total_score") if "total_score" in metrics_for_compare else 0,
+        )
+
+        st.write(f"Comparison for **{metric_to_plot}**")
+        plot_df = compare_df[["name", metric_to_plot]].set_index("name")
+        st.bar_chart(plot_df)
+    else:
+        st.info("Select 2–5 neighbourhoods above to see a side-by-side comparison.")
+
+
+@st.fragment
+def ai_assistant_section(df: pd.DataFrame):
+    st.subheader("Neighbourhood AI Assistant")
+    st.write(
+        "Describe what you're looking for and I'll suggest neighbourhoods based on "
+        "rent, transit, amenities, and size."
+    )
+
+    example_prompt = (
+        "Example: I'm a student with a low budget, I don't have a car, "
+        "and I want good transit and lots of restaurants."
+    )
+    st.caption(example_prompt)
+
+    user_query = st.text_area(
+        "Your requirements",
+        value="",
+        placeholder="Tell me about your budget, lifestyle, commute, and what matters to you...",
+        height=120,
+    )
+
+    place_query = st.text_input(
+        "Near a place (optional)",
+        placeholder="e.g. Whole Foods, Safeway, Starbucks (or write \"near ...\" above)",
+    )
+
+    if st.button("Get AI recommendations", type="primary"):
+        if not user_query.strip() and not place_query.strip():
+            st.warning("Please type a short description of what you're looking for.")
+        else:
+            near = {}
+            place = place_query.strip() or place_phrase(user_query)
+            if place:
+                hits = load_name_index().search(place)
+                if hits.empty:
+                    st.info(f"No places named {place!r} in the OpenStreetMap data; ignoring it.")
+                else:
+                    near_km, near_place = nearest_places(df["lat"], df["lon"], hits)
+                    near = {"near_km": near_km, "near_place": near_place, "near_label": place}
+                    st.caption(f"{len(hits)} places match {place!r}.")
+
+            # Use the currently FILTERED dataset so it respects sidebar filters
+            rec_df, explanation = recommend_neighbourhoods(df, user_query, top_n=5, **near)
+
+            st.markdown("### How I interpreted your needs")
+            st.markdown(explanation)
+
+            st.markdown("### Recommended neighbourhoods for you")
+            rec_cols = [
+                "name",
+                "city" if "city" in rec_df.columns else None,
+                "avg_rent",
+                "population",
+                "transit_stops",
+                "total_amenities",
+                "total_score",
+                "ai_score",
+                "near_km",
+                "nearest_place",
+            ]
+            rec_cols = [c for c in rec_cols if c is not None and c in rec_df.columns]
+
+            st.dataframe(
+                rec_df[rec_cols].reset_index(drop=True),
+                use_container_width=True
+            )
+
+            st.markdown(
+                "_These suggestions are based purely on the data in the app and simple AI logic. "
+                "You can refine them using the filters in the left sidebar._"
+            )
+    else:
+        st.info("Describe your situation above and click **Get AI recommendations**.")
+
+
 # --------- TABS ----------
 tab_explore, tab_ai = st.tabs(["🗺 Explore map", "🤖 AI assistant"])
 
@@ -330,20 +531,16 @@ with tab_explore:
     center_lat = filtered_df["lat"].mean()
     center_lon = filtered_df["lon"].mean()
 
-    def score_to_rgb(score: float):
-        if score <= 0.5:
-            ratio = score / 0.5
-            r = 255
-            g = int(255 * ratio)
-            b = 0
-        else:
-            ratio = (score - 0.5) / 0.5
-            r = int(255 * (1 - ratio))
-            g = 255
-            b = 0
-        return [r, g, b]
+    def score_to_rgb(score) -> np.ndarray:
+        """Red (0) through yellow (0.5) to green (1), as (n, 3) uint8 for a whole column."""
+        score = np.asarray(score, dtype=np.float64)
+        low = score <= 0.5
+        r = np.where(low, 255, 255 * (1 - (score - 0.5) / 0.5))
+        g = np.where(low, 255 * score / 0.5, 255)
+        return np.column_stack([r, g, np.zeros_like(r)]).astype(np.uint8)
 
-    filtered_df["color"] = filtered_df["total_score"].apply(score_to_rgb)
+    rgb = score_to_rgb(filtered_df["total_score"].to_numpy())
+    filtered_df["color_r"], filtered_df["color_g"], filtered_df["color_b"] = rgb.T
 
     size_metric = filtered_df["population"]
     size_min, size_max = float(size_metric.min()), float(size_metric.max())
@@ -352,19 +549,15 @@ with tab_explore:
     else:
         filtered_df["radius"] = 200 + 800 * (size_metric - size_min) / (size_max - size_min + 1e-9)
 
-    map_df = filtered_df[["name", "lat", "lon", "avg_rent", "total_score", "radius", "color"]].copy()
-    map_df["tooltip_html"] = map_df.apply(
-        lambda r: f"<b>{r['name']}</b><br/>Score: {r['total_score']:.2f}<br/>Avg rent: ${r['avg_rent']:.0f}",
-        axis=1,
+    map_df = filtered_df[
+        ["name", "lat", "lon", "avg_rent", "total_score", "radius", "color_r", "color_g", "color_b"]
+    ].copy()
+    map_df["tooltip_html"] = (
+        "<b>" + map_df["name"].astype(str)
+        + "</b><br/>Score: " + np.char.mod("%.2f", map_df["total_score"].to_numpy(dtype=np.float64))
+        + "<br/>Avg rent: $" + np.char.mod("%.0f", map_df["avg_rent"].to_numpy(dtype=np.float64))
     )
 
-    if not poi_points_visible.empty:
-        poi_points_visible["name"] = poi_points_visible["name"].fillna("")
-        poi_points_visible["tooltip_html"] = poi_points_visible.apply(
-            lambda r: f"<b>{str(r['category']).replace('_', ' ').title()}</b><br/>{r['name'] or 'Amenity'}",
-            axis=1,
-        )
-
     map_col, info_col = st.columns([3, 2])
 
     with map_col:
@@ -377,50 +570,34 @@ with tab_explore:
             data=map_df,
             get_position="[lon, lat]",
             get_radius="radius",
-            get_fill_color="color",
+            get_fill_color="[color_r, color_g, color_b]",
             pickable=True,
             opacity=0.8,
         )
         layers.append(neighbourhood_layer)
 
-        def poi_layer(category: str, color: list, radius: int):
-            if poi_points_visible.empty:
-                return None
-            df_cat = poi_points_visible[poi_points_visible["category"] == category]
-            if df_cat.empty:
-                return None
-            return pdk.Layer(
-                "ScatterplotLayer",
-                data=df_cat,
-                get_position="[lon, lat]",
-                get_radius=radius,
-                get_fill_color=color,
-                pickable=True,
-                opacity=0.7,
-            )
-
         if show_schools:
-            layer = poi_layer("schools", [0, 100, 255], 60)
+            layer = poi_layer("schools", visible_neighbourhood_ids, poi_within_m, (0, 100, 255), 60)
             if layer:
                 layers.append(layer)
 
         if show_restaurants:
-            layer = poi_layer("restaurants", [255, 99, 71], 50)
+            layer = poi_layer("restaurants", visible_neighbourhood_ids, poi_within_m, (255, 99, 71), 50)
             if layer:
                 layers.append(layer)
 
         if show_transit:
-            layer = poi_layer("transit_stops", [0, 200, 150], 50)
+            layer = poi_layer("transit_stops", visible_neighbourhood_ids, poi_within_m, (0, 200, 150), 50)
             if layer:
                 layers.append(layer)
 
         if show_parks:
-            layer = poi_layer("parks", [50, 205, 50], 70)
+            layer = poi_layer("parks", visible_neighbourhood_ids, poi_within_m, (50, 205, 50), 70)
             if layer:
                 layers.append(layer)
 
         if show_grocery:
-            layer = poi_layer("grocery", [255, 215, 0], 60)
+            layer = poi_layer("grocery", visible_neighbourhood_ids, poi_within_m, (255, 215, 0), 60)
             if layer:
                 layers.append(layer)
 
@@ -473,98 +650,10 @@ with tab_explore:
     st.bar_chart(chart_df, x="name", y="avg_rent")
 
     st.markdown("---")
-    st.subheader("Compare neighbourhoods")
-
-    selected_names = st.multiselect(
-        "Select neighbourhoods to compare:",
-        options=list(filtered_df["name"].unique()),
-    )
-
-    if selected_names:
-        compare_df = filtered_df[filtered_df["name"].isin(selected_names)].copy()
-
-        metrics_for_compare = [
-            "avg_rent",
-            "population",
-            "transit_stops",
-            "total_amenities",
-            "rent_score",
-            "transit_score",
-            "amenities_score",
-            "size_score",
-            "total_score",
-        ]
-        metrics_for_compare = [m for m in compare_df.columns if m in metrics_for_compare]
-
-        st.write("Raw metrics:")
-        st.dataframe(compare_df[["name"] + metrics_for_compare].reset_index(drop=True))
-
-        metric_to_plot = st.selectbox(
-            "Pick a metric to visualize:",
-            metrics_for_compare,
-            index=metrics_for_compare.index("total_score") if "total_score" in metrics_for_compare else 0,
-        )
-
-        st.write(f"Comparison for **{metric_to_plot}**")
-        plot_df = compare_df[["name", metric_to_plot]].set_index("name")
-        st.bar_chart(plot_df)
-    else:
-        st.info("Select 2–5 neighbourhoods above to see a side-by-side comparison.")
+    compare_section(filtered_df)
 
 # ============================================================
 # TAB 2: AI ASSISTANT
 # ============================================================
 with tab_ai:
-    st.subheader("Neighbourhood AI Assistant")
-    st.write(
-        "Describe what you're looking for and I'll suggest neighbourhoods based on "
-        "rent, transit, amenities, and size."
-    )
-
-    example_prompt = (
-        "Example: I'm a student with a low budget, I don't have a car, "
-        "and I want good transit and lots of restaurants."
-    )
-    st.caption(example_prompt)
-
-    user_query = st.text_area(
-        "Your requirements",
-        value="",
-        placeholder="Tell me about your budget, lifestyle, commute, and what matters to you...",
-        height=120,
-    )
-
-    if st.button("Get AI recommendations", type="primary"):
-        if not user_query.strip():
-            st.warning("Please type a short description of what you're looking for.")
-        else:
-            # Use the currently FILTERED dataset so it respects sidebar filters
-            rec_df, explanation = recommend_neighbourhoods(filtered_df, user_query, top_n=5)
-
-            st.markdown("### How I interpreted your needs")
-            st.markdown(explanation)
-
-            st.markdown("### Recommended neighbourhoods for you")
-            rec_cols = [
-                "name",
-                "city" if "city" in rec_df.columns else None,
-                "avg_rent",
-                "population",
-                "transit_stops",
-                "total_amenities",
-                "total_score",
-                "ai_score",
-            ]
-            rec_cols = [c for c in rec_cols if c is not None and c in rec_df.columns]
-
-            st.dataframe(
-                rec_df[rec_cols].reset_index(drop=True),
-                use_container_width=True
-            )
-
-            st.markdown(
-                "_These suggestions are based purely on the data in the app and simple AI logic. "
-                "You can refine them using the filters in the left sidebar._"
-            )
-    else:
-        st.info("Describe your situation above and click **Get AI recommendations**.")
+    ai_assistant_section(filtered_df)
@@ -1,11 +1,22 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 import osmnx as ox
 
+from poi_data import POI_SNAPSHOT, write_poi_snapshot
+
 # Load neighbourhood centroids
 neigh_df = pd.read_csv("data/neighbourhoods.csv")
 
-# Radius around each neighbourhood centroid in meters
-RADIUS_M = 1000  # 1 km radius – you can change this
+# Radii around each neighbourhood centroid in meters. POIs are fetched once
+# at the largest radius; counts for the smaller ones come from distances.
+RADII_M = [500, 1000, 2000]
+
+# Neighbourhoods fetched at once; Overpass throttles heavy parallel use, so
+# keep this small (OSM_WORKERS=1 fetches one neighbourhood at a time)
+WORKERS = int(os.environ.get("OSM_WORKERS", "4"))
 
 # OSM tag groups for our categories
 TAGS = {
@@ -27,38 +38,72 @@ TAGS = {
     },
 }
 
-poi_rows = []    # one row per actual POI point
-count_rows = []  # aggregated counts per neighbourhood
+# Union of every category's tags, so each centroid needs a single query
+ALL_TAGS = {}
+for _tags in TAGS.values():
+    for key, values in _tags.items():
+        ALL_TAGS[key] = sorted(set(ALL_TAGS.get(key, [])) | set(values))
 
-for _, nrow in neigh_df.iterrows():
-    nid = nrow["neighbourhood_id"]
-    lat = nrow["lat"]
-    lon = nrow["lon"]
 
-    print(f"=== Fetching POIs around {nid} ({lat}, {lon}) ===")
+def distance_m(lat, lon, lats, lons) -> np.ndarray:
+    """Great-circle distance (haversine) from one point to many, in meters."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6_371_000 * np.arcsin(np.sqrt(a))
 
-    counts = {"neighbourhood_id": nid}
 
+def category_masks(gdf) -> dict:
+    """Which fetched features belong to each category (by their OSM tags)."""
+    masks = {}
     for category, tags in TAGS.items():
-        try:
-            # Get all features around the centroid within RADIUS_M
-            gdf = ox.features_from_point(
-                (lat, lon),
-                tags=tags,
-                dist=RADIUS_M,
-            )
-        except Exception as e:
-            print(f"  [WARN] Error fetching {category} for {nid}: {e}")
-            gdf = None
+        mask = np.zeros(len(gdf), dtype=bool)
+        for key, values in tags.items():
+            if key in gdf.columns:
+                mask |= gdf[key].isin(values).to_numpy()
+        masks[category] = mask
+    return masks
+
 
-        if gdf is None or gdf.empty:
-            counts[category] = 0
-            continue
+def fetch_neighbourhood(nrow):
+    """POI rows and per-radius count rows for one neighbourhood centroid."""
+    nid = nrow["neighbourhood_id"]
+    lat = nrow["lat"]
+    lon = nrow["lon"]
+
+    print(f"=== Fetching POIs around {nid} ({lat}, {lon}) ===")
 
-        counts[category] = len(gdf)
+    counts = {r: {"neighbourhood_id": nid, "radius_m": r} for r in RADII_M}
+    poi_rows = []
+
+    try:
+        # All categories within the largest radius, in one Overpass query
+        gdf = ox.features_from_point(
+            (lat, lon),
+            tags=ALL_TAGS,
+            dist=max(RADII_M),
+        )
+    except Exception as e:
+        print(f"  [WARN] Error fetching POIs for {nid}: {e}")
+        gdf = None
+
+    if gdf is None or gdf.empty:
+        for r in RADII_M:
+            counts[r].update({category: 0 for category in TAGS})
+        return poi_rows, list(counts.values())
+
+    # features_from_point fetches a bounding box; count by true distance
+    centroids = gdf.geometry.centroid
+    dist = distance_m(lat, lon, centroids.y.to_numpy(), centroids.x.to_numpy())
+
+    for category, mask in category_masks(gdf).items():
+        for r in RADII_M:
+            counts[r][category] = int((mask & (dist <= r)).sum())
 
         # Convert each feature to a single point (geometry centroid if polygon)
-        for _, row in gdf.iterrows():
+        for (_, row), d in zip(gdf[mask].iterrows(), dist[mask]):
+            if d > max(RADII_M):
+                continue
             geom = row.get("geometry", None)
             if geom is None:
                 continue
@@ -80,10 +125,21 @@ for _, nrow in neigh_df.iterrows():
                     "name": name,
                     "lat": poi_lat,
                     "lon": poi_lon,
+                    "dist_m": round(float(d), 1),
                 }
             )
 
-    count_rows.append(counts)
+    return poi_rows, list(counts.values())
+
+
+poi_rows = []    # one row per actual POI point
+count_rows = []  # aggregated counts per (neighbourhood, radius)
+
+# map() keeps neighbourhood order, so the CSVs come out in the same order
+with ThreadPoolExecutor(max_workers=max(1, WORKERS)) as pool:
+    for rows, counts in pool.map(fetch_neighbourhood, (nrow for _, nrow in neigh_df.iterrows())):
+        poi_rows.extend(rows)
+        count_rows.extend(counts)
 
 # Save aggregated counts
 poi_counts_df = pd.DataFrame(count_rows)
@@ -95,3 +151,6 @@ poi_points_df = pd.DataFrame(poi_rows)
 poi_points_df.to_csv("data/osm_pois.csv", index=False)
 print("✅ Saved data/osm_pois.csv")
 
+# Memory-mapped copy the app loads at startup
+write_poi_snapshot(poi_points_df)
+print(f"✅ Saved {POI_SNAPSHOT}")
@@ -0,0 +1,196 @@
+"""Columnar, memory-mappable copy of data/osm_pois.csv shared by app.py and build_osm_pois.py."""
+
+import difflib
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import shapely
+
+POI_CSV = "data/osm_pois.csv"
+# Columnar copy of osm_pois.csv (uncompressed Feather, so it can be memory-mapped)
+POI_SNAPSHOT = "data/osm_pois.arrow"
+
+
+def write_poi_snapshot(poi_points_df: pd.DataFrame, path: str = POI_SNAPSHOT):
+    """Store POI points as dictionary-encoded strings and float32 coordinates (and distances)."""
+    columns = {
+        "neighbourhood_id": pa.array(poi_points_df["neighbourhood_id"].astype(str)).dictionary_encode(),
+        "category": pa.array(poi_points_df["category"].astype(str)).dictionary_encode(),
+        "name": pa.array(poi_points_df["name"].fillna("").astype(str)),
+        "lat": pa.array(poi_points_df["lat"].to_numpy(dtype=np.float32)),
+        "lon": pa.array(poi_points_df["lon"].to_numpy(dtype=np.float32)),
+    }
+    # Distance to the neighbourhood centroid; older CSVs (one radius) lack it
+    if "dist_m" in poi_points_df.columns:
+        columns["dist_m"] = pa.array(poi_points_df["dist_m"].to_numpy(dtype=np.float32))
+    table = pa.table(columns)
+    feather.write_feather(table, path + ".tmp", compression="uncompressed")
+    os.replace(path + ".tmp", path)
+
+
+def load_poi_points() -> pd.DataFrame:
+    """
+    POI points from the memory-mapped snapshot, rebuilt from osm_pois.csv
+    when the CSV is newer (e.g. after build_osm_pois.py ran).
+    """
+    if not os.path.exists(POI_CSV) and not os.path.exists(POI_SNAPSHOT):
+        return pd.DataFrame(columns=["neighbourhood_id", "category", "name", "lat", "lon"])
+    if not os.path.exists(POI_SNAPSHOT) or (
+        os.path.exists(POI_CSV) and os.path.getmtime(POI_CSV) > os.path.getmtime(POI_SNAPSHOT)
+    ):
+        write_poi_snapshot(pd.read_csv(POI_CSV))
+    # Names stay Arrow strings over the mapped file instead of one Python
+    # object each
+    table = feather.read_table(POI_SNAPSHOT, memory_map=True)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+class PoiStore:
+    """
+    POI points sorted by (category, neighbourhood_id), so each pair is one
+    contiguous run found through `offsets`. Coordinates are float32 and the
+    map tooltip is built once, column-wise, when the store is created.
+
+    With a `dist_m` column each run is also sorted by distance, so the POIs
+    within a radius are a prefix of the run.
+    """
+
+    def __init__(self, poi_points_df: pd.DataFrame):
+        category = poi_points_df["category"].astype("category")
+        neighbourhood = poi_points_df["neighbourhood_id"].astype("category")
+        cat_codes = category.cat.codes.to_numpy()
+        nid_codes = neighbourhood.cat.codes.to_numpy()
+        self.dist_m = None
+        if "dist_m" in poi_points_df.columns:
+            dist_m = poi_points_df["dist_m"].to_numpy(dtype=np.float32)
+            order = np.lexsort((dist_m, nid_codes, cat_codes))
+            self.dist_m = dist_m[order]
+        else:
+            order = np.lexsort((nid_codes, cat_codes))
+
+        # Category labels are formatted once per category, not once per row
+        labels = pd.Series(category.cat.categories).astype(str).str.replace("_", " ").str.title()
+        names = poi_points_df["name"].fillna("").astype(str)
+        tooltip = (
+            "<b>" + labels.to_numpy()[cat_codes] + "</b><br/>" + names.where(names != "", "Amenity").to_numpy()
+        )
+
+        self.frame = pd.DataFrame({
+            "lat": poi_points_df["lat"].to_numpy(dtype=np.float32)[order],
+            "lon": poi_points_df["lon"].to_numpy(dtype=np.float32)[order],
+            # One Arrow buffer, not a Python string per POI
+            "tooltip_html": pd.array(tooltip[order], dtype="string[pyarrow]"),
+        })
+
+        cat_codes, nid_codes = cat_codes[order], nid_codes[order]
+        key = cat_codes.astype(np.int64) * (len(neighbourhood.cat.categories) + 1) + nid_codes
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], dtype=int)
+        stops = np.r_[starts[1:], len(key)]
+        self.offsets = {
+            (category.cat.categories[cat_codes[a]], neighbourhood.cat.categories[nid_codes[a]]): (a, b)
+            for a, b in zip(starts, stops)
+        }
+
+    def rows(self, category: str, neighbourhood_ids, within_m: float = None) -> pd.DataFrame:
+        """
+        POIs of one category in the given neighbourhoods, optionally only
+        those within `within_m` of the centroid. Adjacent runs are merged, so
+        a selection that forms one block is a slice, not a copy.
+        """
+        runs = sorted(self.offsets[(category, n)] for n in neighbourhood_ids if (category, n) in self.offsets)
+        if within_m is not None and self.dist_m is not None:
+            runs = [(a, a + int(np.searchsorted(self.dist_m[a:b], within_m, side="right"))) for a, b in runs]
+        merged = []
+        for a, b in runs:
+            if merged and merged[-1][1] == a:
+                merged[-1][1] = b
+            else:
+                merged.append([a, b])
+        if not merged:
+            return self.frame.iloc[0:0]
+        if len(merged) == 1:
+            return self.frame.iloc[merged[0][0]:merged[0][1]]
+        return self.frame.take(np.concatenate([np.arange(a, b) for a, b in merged]))
+
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+# Tokens shorter than this only match exactly or by prefix, never fuzzily
+FUZZY_MIN_LEN = 4
+
+
+def normalize(text) -> str:
+    """Lowercase, strip accents and punctuation ("Café Ümlaut's" -> "cafe umlauts")."""
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NON_WORD.sub(" ", text.lower().replace("'", "")).strip()
+
+
+class NameIndex:
+    """
+    Inverted index over POI names: sorted vocabulary plus postings, so exact
+    and prefix lookups are binary searches. Fuzzy matching (difflib) is only
+    tried for tokens with no exact or prefix match.
+    """
+
+    def __init__(self, poi_points_df: pd.DataFrame):
+        self.points = poi_points_df[["neighbourhood_id", "category", "name", "lat", "lon"]].reset_index(drop=True)
+        tokens = self.points["name"].map(lambda n: sorted(set(normalize(n).split())))
+        pairs = tokens.explode().dropna()
+        pairs = pd.DataFrame({"token": pairs.to_numpy(dtype=str), "row": pairs.index.to_numpy()})
+        pairs = pairs.sort_values(["token", "row"], kind="stable")
+
+        self.vocab, starts = np.unique(pairs["token"].to_numpy(), return_index=True)
+        self.ptr = np.r_[starts, len(pairs)]
+        self.rows = pairs["row"].to_numpy()
+
+    def _postings(self, token: str, prefix: bool) -> np.ndarray:
+        lo = np.searchsorted(self.vocab, token, side="left")
+        hi = np.searchsorted(self.vocab, token + "\uffff" if prefix else token, side="right")
+        if hi > lo:
+            return np.unique(self.rows[self.ptr[lo]:self.ptr[hi]])
+        if len(token) < FUZZY_MIN_LEN:
+            return np.array([], dtype=np.int64)
+        close = difflib.get_close_matches(token, self.vocab.tolist(), n=5, cutoff=0.8)
+        ids = np.searchsorted(self.vocab, close)
+        return np.unique(np.concatenate([self.rows[self.ptr[i]:self.ptr[i + 1]] for i in ids] or [[]])).astype(np.int64)
+
+    def search(self, query: str) -> pd.DataFrame:
+        """POIs whose names contain every query token (the last one may be a prefix)."""
+        tokens = normalize(query).split()
+        if not tokens:
+            return self.points.iloc[0:0]
+        rows = None
+        for i, token in enumerate(tokens):
+            hit = self._postings(token, prefix=i == len(tokens) - 1)
+            rows = hit if rows is None else np.intersect1d(rows, hit)
+            if len(rows) == 0:
+                break
+        return self.points.iloc[rows]
+
+
+def nearest_places(lat, lon, places: pd.DataFrame):
+    """
+    Distance (km) from each (lat, lon) to the nearest of `places`, and that
+    place's name, in one STRtree query. Coordinates are projected
+    equirectangularly around their mean latitude (fine at city scale).
+    """
+    lat0 = np.radians(np.mean(lat))
+
+    def project(la, lo):
+        la, lo = np.radians(np.asarray(la, dtype=np.float64)), np.radians(np.asarray(lo, dtype=np.float64))
+        return shapely.points(6371.0 * lo * np.cos(lat0), 6371.0 * la)
+
+    tree = shapely.STRtree(project(places["lat"], places["lon"]))
+    (src, dst), dist = tree.query_nearest(project(lat, lon), return_distance=True, all_matches=False)
+    km = np.full(len(lat), np.nan)
+    km[src] = dist
+    name = np.full(len(lat), "", dtype=object)
+    name[src] = places["name"].to_numpy()[dst]
+    return km, name
@@ -0,0 +1,24 @@
+"""
+Fill the app's disk-persisted caches before traffic arrives.
+
+Runs app.py once headlessly with the default sidebar state, so the first
+users after a deploy or restart get compute_scores from ~/.streamlit/cache
+instead of recomputing it, and the POI snapshot (data/osm_pois.arrow) is
+already built. Run from this directory: `python warm_cache.py`.
+"""
+
+import time
+
+import streamlit.testing.v1.app_test as app_test
+from streamlit.runtime.caching.storage.local_disk_cache_storage import LocalDiskCacheStorageManager
+from streamlit.testing.v1 import AppTest
+
+# AppTest keeps caches in memory by default; use the server's disk storage so
+# persist="disk" entries land where `streamlit run` reads them
+app_test.MemoryCacheStorageManager = LocalDiskCacheStorageManager
+
+start = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120).run()
+if at.exception:
+    raise SystemExit(f"App raised during warm-up: {at.exception[0].message}")
+print(f"✅ Warmed cache in {time.perf_counter() - start:.1f}s")